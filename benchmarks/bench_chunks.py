@@ -0,0 +1,65 @@
+# Compara tiempo y memoria máxima (RSS) de AnalizeData completo contra el modo por bloques.
+# Los datos se generan y cada medición corre en un proceso aparte: un proceso hijo hereda
+# la memoria máxima del padre, así que el padre no debe cargar los viajes.
+# Uso: python -m benchmarks.bench_chunks [--rows 2000000] [--chunk-size 100000 500000]
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from benchmarks.synthetic import syntheticTrips
+
+def runOnce(folder, chunkSize):
+    from modules._03analytics import Analytics
+    os.chdir(folder)
+    start = time.perf_counter()
+    Analytics(precision="haversine").AnalizeData(chunkSize=chunkSize or None)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss está en KB en Linux
+    print(json.dumps({"seconds": elapsed, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+def generate(folder, rows):
+    os.makedirs(os.path.join(folder, "data", "input"))
+    syntheticTrips(rows).to_parquet(os.path.join(folder, "data", "input", "data.parquet"), index=False, row_group_size=100_000)
+
+def _child(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_chunks", *args],
+        capture_output=True, text=True, check=True, cwd=os.getcwd()
+    ).stdout
+
+def benchChunks(rows, chunkSizes):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        _child("--generate", folder, str(rows))
+        for chunkSize in [0] + chunkSizes:
+            output = _child("--run", folder, str(chunkSize))
+            result = json.loads(output.strip().splitlines()[-1])
+            result.update({"rows": rows, "mode": f"chunks of {chunkSize}" if chunkSize else "full"})
+            results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del modo por bloques de Analytics")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--run", nargs=2, metavar=("FOLDER", "CHUNK_SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=2, metavar=("FOLDER", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.generate[0], int(args.generate[1]))
+        return
+    if args.run:
+        runOnce(args.run[0], int(args.run[1]))
+        return
+
+    print(f"{'rows':>9} {'mode':>18} {'time (s)':>9} {'max RSS (MB)':>13}")
+    for r in benchChunks(args.rows, args.chunk_size):
+        print(f"{r['rows']:>9} {r['mode']:>18} {r['seconds']:>9.2f} {r['max_rss_mb']:>13.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Compara tiempo y memoria máxima (RSS) de AnalizeData con el motor pandas y con el plan perezoso de polars.
+# Igual que bench_chunks, los datos se generan y cada medición corre en un proceso aparte.
+# Uso: python -m benchmarks.bench_engines [--rows 1000000]
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from benchmarks.synthetic import syntheticTrips
+
+ENGINES = ["pandas", "polars"]
+
+def runOnce(folder, engine):
+    from modules._03analytics import Analytics
+    os.chdir(folder)
+    start = time.perf_counter()
+    Analytics(precision="haversine", engine=engine).AnalizeData()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss está en KB en Linux
+    print(json.dumps({"seconds": elapsed, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+def generate(folder, rows):
+    os.makedirs(os.path.join(folder, "data", "input"))
+    syntheticTrips(rows).to_parquet(os.path.join(folder, "data", "input", "data.parquet"), index=False)
+
+def _child(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_engines", *args],
+        capture_output=True, text=True, check=True, cwd=os.getcwd()
+    ).stdout
+
+def benchEngines(rows, engines):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        _child("--generate", folder, str(rows))
+        for engine in engines:
+            result = json.loads(_child("--run", folder, engine).strip().splitlines()[-1])
+            result.update({"rows": rows, "engine": engine})
+            results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los motores de AnalizeData")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--engines", nargs="+", default=ENGINES, choices=ENGINES)
+    parser.add_argument("--run", nargs=2, metavar=("FOLDER", "ENGINE"), help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=2, metavar=("FOLDER", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.generate[0], int(args.generate[1]))
+        return
+    if args.run:
+        runOnce(args.run[0], args.run[1])
+        return
+
+    print(f"{'rows':>9} {'engine':>8} {'time (s)':>9} {'max RSS (MB)':>13}")
+    for r in benchEngines(args.rows, args.engines):
+        print(f"{r['rows']:>9} {r['engine']:>8} {r['seconds']:>9.2f} {r['max_rss_mb']:>13.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Memoria de los viajes por columna antes y después del esquema compacto, por cada 100k viajes.
+# Uso: python -m benchmarks.bench_memory [--rows 100000] [--file data/input/data.parquet]
+import time
+import argparse
+from modules._06storage import applyTripSchema, loadData
+from benchmarks.synthetic import syntheticTrips
+
+def benchMemory(df):
+    start = time.perf_counter()
+    typed = applyTripSchema(df)
+    elapsed = time.perf_counter() - start
+    scale = 100_000 / max(len(df), 1) / 2**20
+    before = df.memory_usage(deep=True, index=False) * scale
+    after = typed.memory_usage(deep=True, index=False) * scale
+    columns = [{
+        "column": column,
+        "before_dtype": str(df[column].dtype),
+        "after_dtype": str(typed[column].dtype),
+        "before_mb": before[column],
+        "after_mb": after[column]
+    } for column in df.columns]
+    return columns, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria del esquema de viajes")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--file", help="Archivo de viajes a medir en lugar de datos sintéticos")
+    args = parser.parse_args()
+
+    df = loadData(args.file) if args.file else syntheticTrips(args.rows)
+    columns, elapsed = benchMemory(df)
+
+    print(f"{len(df)} viajes, esquema aplicado en {elapsed:.3f} s. Memoria por 100k viajes:")
+    print(f"{'column':>26} {'before':>10} {'after':>20} {'before (MB)':>12} {'after (MB)':>11}")
+    for c in columns:
+        print(f"{c['column']:>26} {c['before_dtype']:>10} {c['after_dtype']:>20} {c['before_mb']:>12.2f} {c['after_mb']:>11.2f}")
+    before = sum(c["before_mb"] for c in columns)
+    after = sum(c["after_mb"] for c in columns)
+    print(f"{'total':>26} {'':>10} {'':>20} {before:>12.2f} {after:>11.2f}  ({before / after:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Escalamiento de AnalizeData con 1 a N procesos (particiones por hash de la estación de origen).
+# Uso: python -m benchmarks.bench_parallel [--rows 1000000] [--workers 1 2 4 8]
+import os
+import time
+import argparse
+import tempfile
+from modules._03analytics import Analytics
+from benchmarks.synthetic import syntheticTrips
+
+def benchParallel(rows, workers, precision, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        os.makedirs(os.path.join(folder, "data", "input"))
+        syntheticTrips(rows).to_parquet(os.path.join(folder, "data", "input", "data.parquet"), index=False)
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            for n in workers:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    Analytics(precision=precision, workers=n).AnalizeData()
+                    best = min(best, time.perf_counter() - start)
+                results.append({"rows": rows, "workers": n, "seconds": best})
+        finally:
+            os.chdir(cwd)
+    for r in results:
+        r["speedup"] = results[0]["seconds"] / r["seconds"]
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalamiento del modo paralelo de Analytics")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--precision", default="vincenty", choices=["haversine", "vincenty", "geopy"])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU disponibles")
+    print(f"{'rows':>9} {'workers':>8} {'time (s)':>9} {'speedup':>8}")
+    for r in benchParallel(args.rows, args.workers, args.precision, args.repeat):
+        print(f"{r['rows']:>9} {r['workers']:>8} {r['seconds']:>9.2f} {r['speedup']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
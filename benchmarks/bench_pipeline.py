@@ -0,0 +1,169 @@
+# Suite de pytest-benchmark del pipeline completo con viajes sintéticos: interpretación y
+# escritura de getData, etapas de AnalizeData, cada gráfico del reporte y el armado del PDF.
+# Cada ejecución se guarda en .benchmarks/ y se compara con la anterior; falla si la mediana
+# de alguna medición empeora más que el umbral.
+# Uso: python -m benchmarks.bench_pipeline [--rows 10000 100000 1000000] [--threshold 20] [-k analytics]
+import os
+import sys
+import json
+import argparse
+from io import BytesIO
+import pytest
+from modules._02request import getData
+from modules._03analytics import Analytics
+from modules._04report import (create_bar_chart, create_box_plots, create_distribution_plot1, create_distribution_plot2,
+                               create_heatmap, create_map_plot, create_scatter_plot, report)
+from modules._06storage import applyTripSchema
+from modules._09statistics import ExactStats, StreamingStats, statsTable
+from modules._10aggregates import routeAggregates, topRoutes
+from benchmarks.synthetic import syntheticTrips
+
+ROWS = [10_000, 100_000]
+STORAGE = ".benchmarks"
+
+# Respuesta HTTP en memoria: mide la interpretación y la escritura sin depender de la red
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+class FakeSession:
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, **options):
+        return FakeResponse(self.content)
+
+# Tamaños a medir: BENCH_ROWS="10000,100000,1000000" (main lo completa con --rows)
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        rows = os.environ.get("BENCH_ROWS")
+        metafunc.parametrize("rows", [int(n) for n in rows.split(",")] if rows else ROWS, scope="module")
+
+@pytest.fixture(scope="module")
+def trips(rows, tmp_path_factory):
+    raw = syntheticTrips(rows)
+    folder = tmp_path_factory.mktemp("bench")
+    raw.to_parquet(folder / "data.parquet", index=False)
+    typed = applyTripSchema(raw)
+    prepared, stations = Analytics(precision="haversine")._prepare(typed)
+    analized = Analytics(precision="haversine", dataPath=str(folder / "data.parquet")).AnalizeData()
+    return {
+        "raw": raw,
+        "json": raw.to_json(orient="records").encode(),
+        "folder": folder,
+        "typed": typed,
+        "prepared": prepared,
+        "stations": stations,
+        "analized": analized
+    }
+
+@pytest.mark.benchmark(group="getData")
+@pytest.mark.parametrize("stream", [False, True], ids=["json", "stream"])
+def test_get_data(benchmark, trips, stream):
+    session = FakeSession(trips["json"])
+    folder = trips["folder"] / "download"
+    folder.mkdir(exist_ok=True)
+    assert benchmark(getData, "http://bench/trips.json", str(folder), stream=stream, session=session, cache=False)
+
+@pytest.mark.benchmark(group="analytics")
+def test_analytics_load(benchmark, trips):
+    analytics = Analytics(dataPath=str(trips["folder"] / "data.parquet"))
+    assert len(benchmark(analytics._load)) == len(trips["raw"])
+
+@pytest.mark.benchmark(group="analytics")
+@pytest.mark.parametrize("precision", ["haversine", "vincenty"])
+def test_analytics_prepare(benchmark, trips, precision):
+    # Analytics nuevo en cada ronda: las distancias no salen de la caché en memoria
+    benchmark(lambda: Analytics(precision=precision)._prepare(trips["typed"]))
+
+@pytest.mark.benchmark(group="analytics")
+def test_analytics_routes(benchmark, trips):
+    tables = benchmark(lambda: topRoutes(routeAggregates(trips["prepared"]), trips["stations"]))
+    assert len(tables[0]) == 10
+
+# Tabla de estadísticas como la arma AnalizeData en memoria (exacta)
+@pytest.mark.benchmark(group="analytics")
+def test_analytics_stats(benchmark, trips):
+    data = trips["prepared"]
+    table = benchmark(lambda: statsTable({"Duration": ExactStats(data["duration"]), "Distance (km)": ExactStats(data["distance_km"])}))
+    assert len(table) == 8
+
+# Estadísticas en una pasada de los modos por bloques, en paralelo y por rango de meses
+@pytest.mark.benchmark(group="analytics")
+def test_analytics_streaming_stats(benchmark, trips):
+    data = trips["prepared"]
+    benchmark(lambda: statsTable({"Duration": StreamingStats().update(data["duration"]), "Distance (km)": StreamingStats().update(data["distance_km"])}))
+
+@pytest.mark.benchmark(group="analytics")
+def test_analytics_total(benchmark, trips):
+    analytics = lambda: Analytics(precision="vincenty", dataPath=str(trips["folder"] / "data.parquet")).AnalizeData()
+    assert set(benchmark(analytics)) == set(trips["analized"])
+
+CHARTS = {
+    "map": lambda data: create_map_plot(data["stations"], offline=True),
+    "most_popular": lambda data: create_bar_chart(data["most_popular_routes"], "count", "Most Popular Routes"),
+    "distances": lambda data: create_bar_chart(data["distance_between_routes"], "distance_km", "Longest Distances Between Stations"),
+    "longest_duration": lambda data: create_bar_chart(data["longest_duration_routes"], "avg_duration", "Longest Average Durations"),
+    "distribution_duration": lambda data: create_distribution_plot1(data["data"][["duration"]]),
+    "distribution_distance": lambda data: create_distribution_plot2(data["data"][["distance_km"]]),
+    "scatter": lambda data: create_scatter_plot(data["data"][["duration", "distance_km"]]),
+    "box": lambda data: create_box_plots(data["data"][["duration", "distance_km"]]),
+    "heatmap": lambda data: create_heatmap(data["data"][["duration", "distance_km"]])
+}
+
+@pytest.mark.benchmark(group="charts")
+@pytest.mark.parametrize("chart", list(CHARTS))
+def test_chart(benchmark, trips, chart):
+    data = dict(trips["analized"], stations=trips["prepared"])
+    benchmark(CHARTS[chart], data)
+
+# report abre el PDF con el visor de Windows al terminar
+@pytest.fixture
+def no_viewer(monkeypatch):
+    monkeypatch.setattr(os, "startfile", lambda path: None, raising=False)
+
+# Solo el armado del PDF: los gráficos ya renderizados se entregan como PNG
+@pytest.mark.benchmark(group="pdf")
+def test_pdf_assembly(benchmark, trips, monkeypatch, no_viewer):
+    pngs = {name: chart(dict(trips["analized"], stations=trips["prepared"])).getvalue() for name, chart in CHARTS.items()}
+    monkeypatch.setattr("modules._04report.render_charts", lambda tasks, **kwargs: {name: BytesIO(png) for name, png in pngs.items()})
+    filePath = trips["folder"] / "report.pdf"
+    benchmark(report, str(filePath), trips["analized"], "bench", offline=True)
+    assert filePath.stat().st_size > 0
+
+@pytest.mark.benchmark(group="pdf")
+def test_report_total(benchmark, trips, no_viewer):
+    filePath = trips["folder"] / "report_total.pdf"
+    benchmark.pedantic(report, (str(filePath), trips["analized"], "bench"), {"offline": True}, rounds=3)
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del pipeline (pytest-benchmark)")
+    parser.add_argument("--rows", type=int, nargs="+", default=ROWS)
+    parser.add_argument("--threshold", type=int, default=20, help="Empeoramiento máximo de la mediana en %% respecto de la última ejecución guardada")
+    parser.add_argument("--no-save", action="store_true", help="No guardar esta ejecución en .benchmarks/")
+    args, extra = parser.parse_known_args()
+
+    os.environ["BENCH_ROWS"] = ",".join(str(rows) for rows in args.rows)
+    options = [__file__, "-q", "-p", "no:cacheprovider", f"--benchmark-storage={STORAGE}", "--benchmark-sort=name"]
+    if not args.no_save:
+        options.append("--benchmark-autosave")
+    # Solo se compara si ya hay una ejecución guardada
+    if os.path.isdir(STORAGE) and any(name.endswith(".json") for _, _, files in os.walk(STORAGE) for name in files):
+        options += ["--benchmark-compare", f"--benchmark-compare-fail=median:{args.threshold}%"]
+    sys.exit(pytest.main(options + extra))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Compara el cálculo de los top 10 de rutas: tres pasadas con textos por fila (anterior)
+# contra un groupby por código de ruta con nlargest (actual).
+# Uso: python -m benchmarks.bench_routes [--rows 100000 1000000]
+import time
+import argparse
+from modules._10aggregates import routeAggregates, topRoutes
+from modules._05distance import DistanceCache
+from modules._06storage import applyTripSchema
+from modules._08stations import encodeRoutes
+from benchmarks.synthetic import syntheticTrips
+
+# Camino anterior: columna de texto por viaje, value_counts, orden completo y groupby aparte
+def previousTopRoutes(data):
+    data = data.assign(route=data["start_station_name"].astype(str) + " to " + data["end_station_name"].astype(str))
+    most_popular_routes = data["route"].value_counts().reset_index().head(10)
+    distance_between_routes = data[["route", "distance_km"]].sort_values(by="distance_km", ascending=False).drop_duplicates().head(10)
+    average_route_durations = data.groupby("route").agg(
+        avg_duration=("duration", "mean"),
+        trip_count=("route", "count")
+    ).reset_index()
+    longest_duration_routes = average_route_durations.sort_values(by="avg_duration", ascending=False).head(10)
+    return most_popular_routes, distance_between_routes, longest_duration_routes
+
+def fusedTopRoutes(data):
+    routes, stations = encodeRoutes(data)
+    return topRoutes(routeAggregates(data.assign(route_code=routes)), stations)
+
+def benchRoutes(rows, repeat):
+    results = []
+    for n in rows:
+        data = applyTripSchema(syntheticTrips(n))
+        data = data[data["start_station_name"] != data["end_station_name"]]
+        data = data.assign(distance_km=DistanceCache().resolve(data, mode="haversine"))
+        for name, function in (("previous", previousTopRoutes), ("fused", fusedTopRoutes)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                tables = function(data)
+                best = min(best, time.perf_counter() - start)
+            results.append({"rows": n, "path": name, "seconds": best, "top_count": int(tables[0].iloc[0, 1])})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cálculo de rutas top 10")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'path':>9} {'time (s)':>9} {'top count':>10}")
+    for r in benchRoutes(args.rows, args.repeat):
+        print(f"{r['rows']:>9} {r['path']:>9} {r['seconds']:>9.3f} {r['top_count']:>10}")
+
+if __name__ == "__main__":
+    main()
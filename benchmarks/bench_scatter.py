@@ -0,0 +1,44 @@
+# Compara tiempo de renderizado y tamaño del PNG/PDF del scatter según el modo.
+# Uso: python -m benchmarks.bench_scatter [--rows 10000 1000000]
+import time
+import argparse
+from io import BytesIO
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Image
+from modules._04report import create_scatter_plot
+from modules._05distance import haversine
+from benchmarks.synthetic import syntheticTrips
+
+def pdfSize(png):
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build([Image(BytesIO(png), width=5.5*inch, height=3*inch)])
+    return len(buffer.getvalue())
+
+def benchScatter(rows, modes):
+    results = []
+    for n in rows:
+        trips = syntheticTrips(n)
+        trips["distance_km"] = haversine(trips["start_station_latitude"], trips["start_station_longitude"],
+                                         trips["end_station_latitude"], trips["end_station_longitude"])
+        data = trips[["duration", "distance_km"]]
+        for mode in modes:
+            start = time.perf_counter()
+            png = create_scatter_plot(data, mode=mode).getvalue()
+            elapsed = time.perf_counter() - start
+            results.append({"rows": n, "mode": mode, "render_s": elapsed,
+                            "png_kb": len(png) / 1024, "pdf_kb": pdfSize(png) / 1024})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del gráfico scatter")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", default=["points", "hexbin", "sample"])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'mode':>7} {'render (s)':>11} {'png (KB)':>9} {'pdf (KB)':>9}")
+    for r in benchScatter(args.rows, args.modes):
+        print(f"{r['rows']:>9} {r['mode']:>7} {r['render_s']:>11.3f} {r['png_kb']:>9.1f} {r['pdf_kb']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Compara escritura + lectura y tamaño en disco de los formatos intermedios.
+# Uso: python -m benchmarks.bench_storage [--rows 10000 100000 1000000]
+import os
+import time
+import argparse
+import tempfile
+from modules._06storage import FORMATS, dataFile, saveData, loadData
+from benchmarks.synthetic import syntheticTrips
+
+def benchStorage(rows, formats, excelMaxRows):
+    results = []
+    for n in rows:
+        df = syntheticTrips(n)
+        for fmt in formats:
+            # Excel es demasiado lento por encima de unos cientos de miles de filas
+            if fmt == "excel" and n > excelMaxRows:
+                continue
+            with tempfile.TemporaryDirectory() as folder:
+                filePath = dataFile(folder, fmt)
+                start = time.perf_counter()
+                saveData(df, filePath)
+                written = time.perf_counter()
+                loadData(filePath)
+                read = time.perf_counter()
+                results.append({
+                    "rows": n,
+                    "format": fmt,
+                    "write_s": written - start,
+                    "read_s": read - written,
+                    "size_mb": os.path.getsize(filePath) / 2**20
+                })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de formatos de almacenamiento")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    parser.add_argument("--excel-max-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'format':>8} {'write (s)':>10} {'read (s)':>9} {'size (MB)':>10}")
+    for r in benchStorage(args.rows, args.formats, args.excel_max_rows):
+        print(f"{r['rows']:>9} {r['format']:>8} {r['write_s']:>10.3f} {r['read_s']:>9.3f} {r['size_mb']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
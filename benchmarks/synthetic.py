@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Área aproximada del sistema de bicicletas de Bergen
+BERGEN_BBOX = (5.28, 60.34, 5.38, 60.41)  # (lon_min, lat_min, lon_max, lat_max)
+
+# Genera un DataFrame con el mismo esquema que los viajes de data.urbansharing.com
+def syntheticTrips(rows, stations=120, seed=0, month="2024-09"):
+    rng = np.random.default_rng(seed)
+    lon_min, lat_min, lon_max, lat_max = BERGEN_BBOX
+
+    station_ids = rng.choice(np.arange(100, 5000), size=stations, replace=False)
+    station_names = np.array([f"Stasjon {i}" for i in station_ids], dtype=object)
+    station_descriptions = np.array([f"Ved gate {i}" for i in station_ids], dtype=object)
+    station_lat = rng.uniform(lat_min, lat_max, stations).round(6)
+    station_lon = rng.uniform(lon_min, lon_max, stations).round(6)
+
+    # Popularidad desigual entre estaciones, como en el sistema real
+    weights = 1.0 / np.arange(1, stations + 1) ** 0.8
+    weights /= weights.sum()
+    start = rng.choice(stations, size=rows, p=weights)
+    end = rng.choice(stations, size=rows, p=weights)
+
+    duration = np.clip(rng.lognormal(6.4, 0.7, rows), 61, 3 * 3600).astype(np.int64)
+    month_start = pd.Timestamp(f"{month}-01", tz="UTC")
+    # Resolución de microsegundos, como las fechas del servicio
+    started = (month_start + pd.to_timedelta(rng.uniform(0, 30 * 86400, rows), unit="s")).floor("us")
+    ended = started + pd.to_timedelta(duration, unit="s")
+
+    return pd.DataFrame({
+        "started_at": started.astype(str),
+        "ended_at": ended.astype(str),
+        "duration": duration,
+        "start_station_id": station_ids[start],
+        "start_station_name": station_names[start],
+        "start_station_description": station_descriptions[start],
+        "start_station_latitude": station_lat[start],
+        "start_station_longitude": station_lon[start],
+        "end_station_id": station_ids[end],
+        "end_station_name": station_names[end],
+        "end_station_description": station_descriptions[end],
+        "end_station_latitude": station_lat[end],
+        "end_station_longitude": station_lon[end],
+    })
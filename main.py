@@ -1,9 +1,26 @@
 # main.py
 import os
-from modules import Authentication, Analytics, report, getData, spinner
+import sys
+import json
+import argparse
+from contextlib import nullcontext
+import pandas as pd
+from modules import Authentication, Analytics, getData, getDataRange, spinner
+from modules._02request import monthRange, monthUrl
+from modules._05distance import PRECISION_MODES
+from modules._06storage import dataFile, loadData
+from modules._11lazy import ENGINES
+from modules._12metrics import configureMetrics, metrics
+from modules._13profiling import StageProfiler
+from modules._14reportcache import REPORT_CACHE_DIR, REPORT_CACHE_MB
 from getpass import getpass
 import threading
 
+# El módulo de reportes (matplotlib, geopandas, reportlab) se carga solo al generar un reporte
+def report(*args, **kwargs):
+    from modules._04report import report as buildReport
+    return buildReport(*args, **kwargs)
+
 class dataBase:  # Fake
     def __init__(self) -> None:
         pass
@@ -12,7 +29,13 @@ class dataBase:  # Fake
     def db(self):  # Stub
         return {"user1": "pass1", "user2": "pass2"}
 
-def main():
+# inMemory=True descarga los viajes y los pasa a Analytics sin escribirlos a disco.
+# Con metricsPath se registran tiempo, CPU, memoria y filas de cada etapa como líneas JSON
+# (y con spansPath como spans OTLP/JSON); traceMemory agrega el pico de tracemalloc.
+def main(month="2024-09", inputPath="data/input", outputPath="data/output/report.pdf", inMemory=False,
+         metricsPath=None, spansPath=None, traceMemory=False):
+    if metricsPath or spansPath:
+        configureMetrics(metricsPath, spansPath, traceMemory)
     AuthSystem = Authentication(dataBase())
 
     # Crear un hilo paralelo para el spinner de carga
@@ -38,24 +61,194 @@ def main():
         print(f"===========================================================")
         print(f"==================== Bienvenid@ {user} ====================")
         print(f"===========================================================")
-        print("Obteniendo datos de ... https://data.urbansharing.com/bergenbysykkel.no/trips/v1/2024/09.json")
+        with metrics.stage("run", month=month, in_memory=inMemory):
+            url = monthUrl(month)
+            print(f"Obteniendo datos de ... {url}")
 
-        data_response = getData("https://data.urbansharing.com/bergenbysykkel.no/trips/v1/2024/09.json", "data/input") 
+            if inMemory:
+                data = getData(url, None, returnData=True)
+                data_response = data is not None
+            else:
+                data = None
+                data_response = getData(url, inputPath)
 
-        AnalyticsModule = Analytics()
-        analized_data = AnalyticsModule.AnalizeData()
+            if data_response:
+                AnalyticsModule = Analytics(cachePath="data/cache/distances.sqlite", dataPath=dataFile(inputPath))
+                try:
+                    analized_data = AnalyticsModule.AnalizeData(data)
+                except ValueError as error:
+                    # Mes sin viajes entre estaciones distintas
+                    print(error)
+                    analized_data = None
 
-        if data_response:
-            print("Generando reporte...")
-            spinner_thread.start()
-            report("data/output/report.pdf", analized_data, user)
-            stop_event.set()
-        else:
-            print("No hay datos para generar reporte.")
+            if data_response and analized_data is not None:
+                print("Generando reporte...")
+                spinner_thread.start()
+                os.makedirs(os.path.dirname(outputPath) or ".", exist_ok=True)
+                report(outputPath, analized_data, user, cachePath=REPORT_CACHE_DIR)
+                stop_event.set()
+            elif not data_response:
+                print("No hay datos para generar reporte.")
 
     spinner_thread.join()
     print("=================== Programa finalizado ===================")
 
+# Credenciales para el modo sin interfaz: archivo JSON {"user": ..., "password": ...} o
+# variables de entorno BIKES_USER y BIKES_PASSWORD
+def loadCredentials(credentialsPath=None):
+    if credentialsPath:
+        with open(credentialsPath, encoding="utf-8") as f:
+            credentials = json.load(f)
+        if not isinstance(credentials, dict):
+            return None, None
+        return credentials.get("user"), credentials.get("password")
+    return os.environ.get("BIKES_USER"), os.environ.get("BIKES_PASSWORD")
+
+def authenticate(credentialsPath=None):
+    user, password = loadCredentials(credentialsPath)
+    # Valores que no son texto (números, listas, null) cuentan como credenciales faltantes
+    if not isinstance(user, str) or not isinstance(password, str) or not user or not password:
+        print("Faltan credenciales: use --credentials o las variables BIKES_USER y BIKES_PASSWORD.")
+        return None
+    return user if Authentication(dataBase()).login(user, password) else None
+
+def _analytics(args):
+    return Analytics(precision=args.precision, cachePath=args.cache, aggregatesPath=args.aggregates,
+                     workers=args.workers, engine=args.engine)
+
+def _months(args):
+    return monthRange(args.start, args.end or args.start)
+
+# Viajes de los meses que salen o llegan a alguna de las estaciones pedidas
+def stationTrips(months, inputPath, stations):
+    frames = []
+    for month in months:
+        data = loadData(dataFile(os.path.join(inputPath, month)))
+        frames.append(data[data["start_station_name"].isin(stations) | data["end_station_name"].isin(stations)])
+    return pd.concat(frames, ignore_index=True)
+
+# Resultados a reportar: (etiqueta, datos analizados), uno por mes con --each-month o uno para todo el rango
+def analyzeMonths(args):
+    months = _months(args)
+    groups = [[month] for month in months] if args.each_month else [months]
+    analytics = _analytics(args)
+    for group in groups:
+        label = group[0] if len(group) == 1 else f"{group[0]}_{group[-1]}"
+        if args.station:
+            yield label, analytics.AnalizeData(stationTrips(group, args.input, args.station))
+        else:
+            yield label, analytics.AnalizeRange(group[0], group[-1], path=args.input, force=args.force)
+
+def fetchCommand(args, user):
+    results = getDataRange(args.start, args.end or args.start, args.input, workers=args.download_workers, stream=args.stream)
+    failed = [month for month, ok in results.items() if not ok]
+    if failed:
+        print(f"No se pudieron descargar: {', '.join(failed)}")
+    return 1 if failed else 0
+
+# Meses del rango sin archivo de viajes en --input (nunca descargados con fetch)
+def missingMonths(args):
+    return [month for month in _months(args) if not os.path.exists(dataFile(os.path.join(args.input, month)))]
+
+def _checkMonths(args):
+    missing = missingMonths(args)
+    if missing:
+        print(f"Faltan los viajes de: {', '.join(missing)}. Descárguelos con: python main.py fetch {args.start} {args.end or args.start}")
+    return 1 if missing else 0
+
+def analyzeCommand(args, user):
+    if _checkMonths(args):
+        return 1
+    try:
+        for label, analized_data in analyzeMonths(args):
+            print(f"Rutas más populares ({label}):")
+            print(analized_data["most_popular_routes"].to_string(index=False))
+    except ValueError as error:
+        # Sin viajes entre estaciones distintas (por ejemplo una --station sin viajes)
+        print(error)
+        return 1
+    return 0
+
+def reportCommand(args, user):
+    if _checkMonths(args):
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    try:
+        for label, analized_data in analyzeMonths(args):
+            filePath = os.path.join(args.output, f"report_{label}.pdf")
+            report(filePath, analized_data, user, workers=args.report_workers, offline=args.offline, openFile=False,
+                   cachePath=args.report_cache, cacheMb=args.report_cache_mb)
+            print(f"Reporte {label}: {filePath}")
+    except ValueError as error:
+        print(error)
+        return 1
+    return 0
+
+def runCommand(args, user):
+    return fetchCommand(args, user) or reportCommand(args, user)
+
+COMMANDS = {"fetch": fetchCommand, "analyze": analyzeCommand, "report": reportCommand, "run": runCommand}
+
+def buildParser():
+    parser = argparse.ArgumentParser(description="Sistema de análisis de datos de Bergen Bysykkel")
+    parser.add_argument("--profile", metavar="DIR", help="Perfilar cada etapa (cProfile + pilas muestreadas) y guardar los resultados en DIR")
+    parser.add_argument("--metrics", metavar="FILE", help="Registrar tiempo, CPU, memoria y filas de cada etapa como líneas JSON")
+    parser.add_argument("--spans", metavar="FILE", help="Exportar las etapas como spans OTLP/JSON")
+    parser.add_argument("--credentials", metavar="FILE", help="Archivo JSON con user y password (por defecto BIKES_USER y BIKES_PASSWORD)")
+    commands = parser.add_subparsers(dest="command", help="Sin comando se inicia el modo interactivo")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("start", metavar="FROM", help="Primer mes (YYYY-MM)")
+    common.add_argument("end", metavar="TO", nargs="?", help="Último mes (YYYY-MM); por defecto FROM")
+    common.add_argument("--input", default="data/input", help="Carpeta de los viajes: {input}/{YYYY-MM}/data.parquet")
+
+    download = argparse.ArgumentParser(add_help=False)
+    download.add_argument("--download-workers", type=int, default=4, help="Descargas simultáneas")
+    download.add_argument("--stream", action="store_true", help="Descargar por lotes con memoria acotada")
+
+    analysis = argparse.ArgumentParser(add_help=False)
+    analysis.add_argument("--workers", type=int, default=1, help="Procesos para el análisis")
+    analysis.add_argument("--precision", default="vincenty", choices=PRECISION_MODES)
+    analysis.add_argument("--engine", default="pandas", choices=ENGINES, help="Motor de AnalizeData; solo aplica con --station (los rangos se combinan desde los agregados mensuales)")
+    analysis.add_argument("--cache", default="data/cache/distances.sqlite", help="Caché de distancias")
+    analysis.add_argument("--aggregates", default="data/aggregates", help="Carpeta de los agregados mensuales")
+    analysis.add_argument("--force", action="store_true", help="Recalcular los agregados aunque los viajes no hayan cambiado")
+    analysis.add_argument("--each-month", action="store_true", help="Un resultado por mes en lugar de uno para todo el rango")
+    analysis.add_argument("--station", action="append", metavar="NAME", help="Solo viajes que salen o llegan a la estación (repetible)")
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--output", default="data/output", help="Carpeta de los reportes: report_{mes o rango}.pdf")
+    output.add_argument("--report-workers", type=int, default=1, help="Procesos para los gráficos")
+    output.add_argument("--offline", action="store_true", help="Usar solo la caché local de teselas para el mapa")
+    output.add_argument("--report-cache", default=REPORT_CACHE_DIR, help="Caché de gráficos y PDF por huella de los datos (\"\" la desactiva)")
+    output.add_argument("--report-cache-mb", type=float, default=REPORT_CACHE_MB, help="Tamaño máximo de la caché de reportes")
+
+    commands.add_parser("fetch", parents=[common, download], help="Descargar los viajes de los meses")
+    commands.add_parser("analyze", parents=[common, analysis], help="Calcular y guardar los agregados de los meses")
+    commands.add_parser("report", parents=[common, analysis, output], help="Generar los reportes PDF")
+    commands.add_parser("run", parents=[common, download, analysis, output], help="Descargar y generar los reportes")
+    return parser
+
+# Punto de entrada: sin comando inicia el modo interactivo; con comando corre sin interfaz
+# (sin input, getpass ni spinner) y retorna el código de salida
+def cli(argv=None):
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    # Sin --station se combinan los agregados mensuales, que siempre se calculan con pandas
+    if getattr(args, "engine", "pandas") != "pandas" and not args.station:
+        parser.error(f"--engine {args.engine} solo aplica junto con --station")
+    if args.metrics or args.spans:
+        configureMetrics(args.metrics, args.spans)
+    with StageProfiler(args.profile) if args.profile else nullcontext():
+        if args.command is None:
+            main()
+            return 0
+        user = authenticate(args.credentials)
+        if user is None:
+            return 2
+        with metrics.stage(args.command, start=args.start, end=args.end or args.start):
+            return COMMANDS[args.command](args, user)
+
 # Solo ejecuta el main si se ejecuta directamente
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -1,20 +1,271 @@
+import os
+import json
+import codecs
+import threading
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ._06storage import DEFAULT_FORMAT, BatchWriter, applyTripSchema, dataFile, loadData, saveData
+from ._12metrics import metrics
 
-def getData(url,path):
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
+BASE_URL = "https://data.urbansharing.com/bergenbysykkel.no/trips/v1"
+CHUNK_SIZE = 1 << 16
+BATCH_SIZE = 50_000
+
+# Índice de la caché de descargas (URL -> ETag/Last-Modified) dentro de cada carpeta de datos
+DOWNLOAD_INDEX = ".downloads.json"
+_cacheLock = threading.Lock()
+
+_NUMBER_CHARS = set("0123456789+-.eE")
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+# Un error de decodificación es un registro incompleto (sigue en el próximo bloque) solo si
+# ocurre al final del búfer: un texto, número o literal cortado; cualquier otro error es JSON inválido
+def _incomplete(error, buffer):
+    rest = buffer[error.pos:]
+    if not rest or error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX") and len(rest) < 6:
+        return True
+    return set(rest) <= _NUMBER_CHARS or any(literal.startswith(rest) for literal in _LITERALS)
+
+# Parser incremental de un arreglo JSON de objetos: recibe bloques de bytes
+# y entrega cada registro en cuanto está completo, sin cargar todo el documento.
+# Un registro inválido se rechaza en cuanto llega, sin seguir acumulando bloques.
+def iterJsonArray(chunks):
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    # start: antes de "["; first: primer registro o "]"; value: registro después de ","; next: "," o "]"
+    state = "start"
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if state == "start":
+                if buffer[pos] != "[":
+                    raise ValueError("Se esperaba un arreglo JSON.")
+                state, pos = "first", pos + 1
+            elif state in ("first", "next") and buffer[pos] == "]":
+                return
+            elif state == "next":
+                if buffer[pos] != ",":
+                    raise ValueError("Se esperaba ',' o ']' entre los registros del arreglo JSON.")
+                state, pos = "value", pos + 1
+            else:
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as error:
+                    if _incomplete(error, buffer):
+                        break  # Registro incompleto, esperar el siguiente bloque
+                    raise ValueError(f"Registro JSON inválido: {error.msg}.") from error
+                if not isinstance(record, dict):
+                    raise ValueError("Los elementos del arreglo JSON deben ser objetos.")
+                yield record
+                state, pos = "next", end
+        buffer = buffer[pos:]
+    raise ValueError("El arreglo JSON está incompleto o es inválido.")
+
+# Escribe a disco en lotes de batchSize registros a medida que llegan los bloques de la respuesta
+# (sin filePath, los lotes quedan en memoria). Retorna el BatchWriter ya cerrado.
+# Cada lote trae sus propias estaciones, así que las categorías se crean al leer el archivo completo.
+def streamData(response, filePath, limit=None, batchSize=BATCH_SIZE):
+    rows = 0
+    batch = []
+    try:
+        with BatchWriter(filePath) as writer:
+            for record in iterJsonArray(response.iter_content(chunk_size=CHUNK_SIZE)):
+                if limit is not None and rows >= limit:
+                    break
+                batch.append(record)
+                rows += 1
+                if len(batch) == batchSize:
+                    writer.write(applyTripSchema(pd.DataFrame(batch), categories=False))
+                    batch = []
+            if batch or writer.rows == 0:
+                writer.write(applyTripSchema(pd.DataFrame(batch), categories=False))
+    except Exception:
+        if filePath is not None and os.path.exists(filePath):
+            os.remove(filePath)
+        raise
+    finally:
+        response.close()
+    return writer
+
+def _readCacheIndex(cachePath):
+    try:
+        with open(cachePath, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Encabezados de GET condicional si el archivo local sigue siendo el de la última descarga de url
+def conditionalHeaders(cachePath, url, filePath, limit=None):
+    with _cacheLock:
+        entry = _readCacheIndex(cachePath).get(url)
+    filePath = os.path.abspath(filePath)
+    if (not entry or entry["file"] != filePath or entry["limit"] != limit
+            or not os.path.exists(filePath) or os.path.getmtime(filePath) != entry["mtime"]):
+        return {}
+    headers = {}
+    if entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+# Registra ETag/Last-Modified de la descarga para la próxima petición condicional.
+# La caché es un complemento: si no se puede actualizar, la descarga sigue siendo válida.
+def rememberDownload(cachePath, url, filePath, limit, responseHeaders):
+    etag = responseHeaders.get("ETag")
+    lastModified = responseHeaders.get("Last-Modified")
+    with _cacheLock:
+        index = _readCacheIndex(cachePath)
+        if etag or lastModified:
+            filePath = os.path.abspath(filePath)
+            index[url] = {
+                "file": filePath,
+                "limit": limit,
+                "mtime": os.path.getmtime(filePath),
+                "etag": etag,
+                "last_modified": lastModified
+            }
+        else:
+            index.pop(url, None)
+        try:
+            content = json.dumps(index, indent=2)
+            with open(cachePath + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(cachePath + ".tmp", cachePath)
+        except (OSError, TypeError):
+            print("No se pudo actualizar la caché de descargas.")
+
+# Con returnData=True retorna los viajes como DataFrame (con el esquema compacto) en lugar de
+# True, o None si falla. Con path=None no se escribe nada a disco: los datos pasan directo
+# a Analytics sin ida y vuelta por archivo (requiere returnData=True).
+def getData(url, path, fmt=DEFAULT_FORMAT, exportExcel=False, limit=None, stream=False, batchSize=BATCH_SIZE, session=None, cache=True, returnData=False):
+    with metrics.stage("getData", url=url, stream=stream):
+        return _getData(url, path, fmt, exportExcel, limit, stream, batchSize, session, cache, returnData)
+
+def _getData(url, path, fmt, exportExcel, limit, stream, batchSize, session, cache, returnData):
+    if path is None and not returnData:
+        raise ValueError("Sin carpeta de destino getData debe usarse con returnData=True.")
+    failed = None if returnData else False
+    filePath = dataFile(path, fmt) if path is not None else None
+    cache = cache and path is not None
+    cachePath = os.path.join(path, DOWNLOAD_INDEX) if cache else None
+    options = {"stream": True} if stream else {}
+    headers = conditionalHeaders(cachePath, url, filePath, limit) if cache else {}
+    if headers:
+        options["headers"] = headers
+    with metrics.stage("getData.download"):
+        response = (session or requests).get(url, **options)
+
+    # 304: el archivo local sigue vigente, no hace falta interpretar ni escribir nada
+    if response.status_code == 304:
+        response.close()
+        print(f"Los datos no han cambiado, se reutiliza {filePath}.")
+        return applyTripSchema(loadData(filePath)) if returnData else True
+
+    if response.status_code != 200:
+        response.close()
+        print("Error obteniendo datos del servidor.")
+        return failed
+
+    # Modo streaming: memoria acotada por batchSize sin importar el tamaño del archivo
+    if stream:
         try:
-            df = pd.DataFrame(data)
-            df = df.iloc[0:10000] 
-            print("Guardando datos en data/input/datos.xlsx ...")
-            df.to_excel(f"{path}/data.xlsx",index=False)
-            print("Datos obtenidos y guardados.")
+            print(f"Descargando y guardando datos por lotes en {filePath} ..." if filePath else "Descargando datos por lotes ...")
+            with metrics.stage("getData.stream") as span:
+                writer = streamData(response, filePath, limit=limit, batchSize=batchSize)
+                span["rows"] = writer.rows
         except:
             print("Error al convertir y almacenar el archivo.")
-            return False
-        return True
+            return failed
+        print(f"Datos obtenidos y guardados ({writer.rows} registros)." if filePath else f"Datos obtenidos ({writer.rows} registros).")
+        if returnData:
+            df = applyTripSchema(loadData(filePath) if filePath else writer.frame())
     else:
-        print("Error obteniendo datos del servidor.")
-        return False
\ No newline at end of file
+        with metrics.stage("getData.parse") as span:
+            data = response.json()
+            try:
+                df = pd.DataFrame(data)
+                if limit is not None:
+                    df = df.iloc[0:limit]
+                typed = applyTripSchema(df)
+            except:
+                print("Error al convertir y almacenar el archivo.")
+                return failed
+            span["rows"] = len(typed)
+        try:
+            if filePath:
+                print(f"Guardando datos en {filePath} ...")
+                with metrics.stage("getData.write", rows=len(typed), format=fmt):
+                    # Excel no admite fechas con zona horaria: se guarda tal como llega del servidor
+                    saveData(df if fmt == "excel" else typed, filePath)
+                    # Excel solo como exportación opcional para consulta manual
+                    if exportExcel and fmt != "excel":
+                        saveData(df, dataFile(path, "excel"))
+                print("Datos obtenidos y guardados.")
+            else:
+                print("Datos obtenidos.")
+            df = typed
+        except:
+            print("Error al convertir y almacenar el archivo.")
+            return failed
+
+    if cache:
+        rememberDownload(cachePath, url, filePath, limit, response.headers)
+    return df if returnData else True
+
+# URL del archivo mensual de viajes
+def monthUrl(month, baseUrl=BASE_URL):
+    year, number = month.split("-")
+    return f"{baseUrl}/{int(year)}/{int(number):02d}.json"
+
+# Meses entre start y end (inclusive) en formato "YYYY-MM"
+def monthRange(start, end):
+    months = pd.period_range(start=start, end=end, freq="M")
+    if len(months) == 0:
+        raise ValueError(f"Rango de meses inválido: {start} a {end}.")
+    return [str(month) for month in months]
+
+# Sesión HTTP con pool de conexiones reutilizables y reintentos con backoff exponencial
+def createSession(poolSize=4, retries=3, backoff=0.5):
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Descarga concurrente de varios meses sobre una sesión compartida.
+# Cada mes se guarda en su propia carpeta: {path}/{YYYY-MM}/data.parquet
+def getDataRange(start, end, path, workers=4, baseUrl=BASE_URL, retries=3, backoff=0.5, **options):
+    months = monthRange(start, end)
+
+    def download(month):
+        folder = os.path.join(path, month)
+        os.makedirs(folder, exist_ok=True)
+        try:
+            return getData(monthUrl(month, baseUrl), folder, session=session, **options)
+        except requests.RequestException:
+            print(f"Error obteniendo datos del servidor para {month}.")
+            return False
+
+    with createSession(poolSize=workers, retries=retries, backoff=backoff) as session:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(download, months))
+    return dict(zip(months, results))
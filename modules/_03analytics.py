@@ -1,84 +1,210 @@
-from ._01authentication import Authentication
-from ._02request import getData
-from ._04report import report
+import os
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from ._02request import monthRange
+from ._05distance import DistanceCache
+from ._06storage import applyTripSchema, dataFile, iterData, loadData
+from ._08stations import encodeRoutes
+from ._09statistics import DEFAULT_COMPRESSION, ExactStats, statsTable
+from ._10aggregates import AGGREGATES_DIR, TripAggregates, routeAggregates, topRoutes
+from ._11lazy import ENGINES, analizeLazy
+from ._12metrics import metrics
 import pandas as pd
-from geopy.distance import geodesic
+import pyarrow as pa
+
+# Archivo de viajes por defecto (el que escribe getData en data/input)
+DATA_FILE = "data/input/data.parquet"
+
+# Particiona por un hash estable (igual en todos los procesos) de la estación de origen:
+# cada ruta y cada par de estaciones queda en una sola partición
+def partitionTrips(data, partitions):
+    keys = pd.util.hash_pandas_object(data["start_station_name"], index=False).to_numpy() % partitions
+    return [data[keys == partition] for partition in range(partitions)]
+
+# Sin viajes entre estaciones distintas no hay nada que analizar: el mismo error en todos los modos
+def _requireTrips(count):
+    if not count:
+        raise ValueError("No hay viajes para analizar.")
+
+# Distancias y agregados de una partición, en un proceso del pool
+def _aggregatePartition(data, precision, compression, cachePath):
+    analytics = Analytics(precision=precision, cachePath=cachePath, compression=compression)
+    data, _ = analytics._prepare(data)
+    return TripAggregates.fromTrips(data, compression=compression)
 
 class Analytics:
-    def __init__(self):
-        pass
+    def __init__(self, precision="vincenty", cachePath=None, compression=DEFAULT_COMPRESSION, aggregatesPath=AGGREGATES_DIR, workers=1, dataPath=DATA_FILE, engine="pandas"):
+        # Modo de precisión para las distancias: "haversine", "vincenty" o "geopy"
+        self.precision = precision
+        # Compresión del t-digest usado para los percentiles
+        self.compression = compression
+        self.distanceCache = DistanceCache(cachePath)
+        # Carpeta de los agregados mensuales persistidos (ver AnalizeRange)
+        self.aggregatesPath = aggregatesPath
+        # Procesos para el modo paralelo; con 1 todo corre en el proceso actual
+        self.workers = workers
+        # Archivo de viajes que se lee cuando AnalizeData no recibe los datos
+        self.dataPath = dataPath
+        # Motor de AnalizeData: "pandas" (por defecto) o "polars" (plan perezoso, ver _11lazy)
+        if engine not in ENGINES:
+            raise ValueError(f"Motor no soportado: {engine}. Use uno de {ENGINES}.")
+        self.engine = engine
 
-    def AnalizeData(self):
-        print("Leyendo datos...")
-        data = pd.read_excel("data/input/data.xlsx")
+    # Viajes a analizar: los recibidos (DataFrame o tabla de Arrow) o los de dataPath
+    def _load(self, data=None):
+        if data is None:
+            data = loadData(self.dataPath)
+        elif isinstance(data, pa.Table):
+            data = data.to_pandas()
+        return applyTripSchema(data)
 
-        print("Analizando datos...")
+    def _chunks(self, data, chunkSize):
+        if data is None:
+            yield from iterData(self.dataPath, chunkSize)
+        elif isinstance(data, pa.Table):
+            for batch in data.to_batches(max_chunksize=chunkSize):
+                yield batch.to_pandas()
+        else:
+            for start in range(0, len(data), chunkSize):
+                yield data.iloc[start:start + chunkSize]
 
-        # Borrar duplicados
+    # Filtra los viajes a la misma estación y agrega código de ruta y distancia
+    def _prepare(self, data):
         data = data[data["start_station_name"] != data["end_station_name"]]
+        routes, stations = encodeRoutes(data)
+        data["route_code"] = routes
+        data["distance_km"] = self.distanceCache.resolve(data, mode=self.precision)
+        return data, stations
 
-        # Rutas más populares
-        data["route"] = data["start_station_name"] + " to " + data["end_station_name"] 
-        most_popular_routes = data["route"].value_counts().reset_index().head(10)
-
-        # Distancias más grandes entre estaciones
-        def CalculateDistance(row):
-            start_coords = (row["start_station_latitude"], row["start_station_longitude"])
-            end_coords = (row["end_station_latitude"], row["end_station_longitude"])
-            return geodesic(start_coords, end_coords).kilometers
-
-        data["distance_km"] = data.apply(CalculateDistance, axis=1) 
-        distance_between_routes = data[["route","distance_km"]].sort_values(by="distance_km", ascending=False).drop_duplicates().reset_index().drop(columns="index").head(10) 
-
-        # Mayor duración promedio
-        average_route_durations = data.groupby('route').agg(
-            avg_duration=('duration', 'mean'), 
-            trip_count=('route', 'count')
-        ).reset_index()
-
-        longest_duration_routes = average_route_durations.sort_values(by='avg_duration', ascending=False).reset_index().drop(columns="index").head(10)
-
-        # New analysis for duration and distance statistics
-        data['duration']
-        duration_stats = {
-            'mean': data['duration'].mean(),
-            'variance': data['duration'].var(),
-            'std_dev': data['duration'].std(),
-            'max': data['duration'].max(),
-            'min': data['duration'].min(),
-            '25th_percentile': data['duration'].quantile(0.25),
-            '50th_percentile': data['duration'].quantile(0.50),
-            '75th_percentile': data['duration'].quantile(0.75)
-        }
+    # data puede ser un DataFrame o una tabla de Arrow ya en memoria (por ejemplo el retorno de
+    # getData(..., returnData=True)); sin data se lee dataPath. Con chunkSize los viajes se procesan
+    # por bloques (ver _analizeChunks) y con workers > 1 por particiones en paralelo (ver _analizeParallel).
+    # Con engine="polars" el análisis es un plan perezoso de polars; retorna además "stations"
+    # y "data" solo con las columnas duration y distance_km.
+    def AnalizeData(self, data=None, chunkSize=None):
+        with metrics.stage("analytics", engine=self.engine, workers=self.workers, chunk_size=chunkSize, precision=self.precision):
+            return self._analize(data, chunkSize)
 
-        distance_stats = {
-            'mean': data['distance_km'].mean(),
-            'variance': data['distance_km'].var(),
-            'std_dev': data['distance_km'].std(),
-            'max': data['distance_km'].max(),
-            'min': data['distance_km'].min(),
-            '25th_percentile': data['distance_km'].quantile(0.25),
-            '50th_percentile': data['distance_km'].quantile(0.50),
-            '75th_percentile': data['distance_km'].quantile(0.75)
-        }
+    def _analize(self, data, chunkSize):
+        if self.engine == "polars":
+            print("Analizando datos con polars...")
+            self.analizedData = analizeLazy(self.dataPath if data is None else data, self.distanceCache, self.precision)
+            return self.analizedData
+        if chunkSize:
+            return self._analizeChunks(data, chunkSize)
+        if self.workers > 1:
+            return self._analizeParallel(data)
+
+        print("Leyendo datos...")
+        with metrics.stage("analytics.load") as span:
+            data = self._load(data)
+            span["rows"] = len(data)
+
+        print("Analizando datos...")
+
+        # Borrar viajes a la misma estación; código entero por ruta (etiquetas solo para los top 10) y distancia
+        with metrics.stage("analytics.prepare") as span:
+            data, stations = self._prepare(data)
+            span["rows"] = len(data)
+        _requireTrips(len(data))
 
-        # Combine stats into a single DataFrame for reporting
-        stats_df = pd.DataFrame({
-            'Statistic': ['Mean', 'Variance', 'Standard Deviation', 'Max', 'Min', '25th Percentile', '50th Percentile', '75th Percentile'],
-            'Duration': [duration_stats['mean'], duration_stats['variance'], duration_stats['std_dev'], duration_stats['max'], duration_stats['min'], duration_stats['25th_percentile'], duration_stats['50th_percentile'], duration_stats['75th_percentile']],
-            'Distance (km)': [distance_stats['mean'], distance_stats['variance'], distance_stats['std_dev'], distance_stats['max'], distance_stats['min'], distance_stats['25th_percentile'], distance_stats['50th_percentile'], distance_stats['75th_percentile']]
-        })
+        # Viajes, duración y distancia por ruta en un solo groupby
+        with metrics.stage("analytics.routes", rows=len(data)):
+            most_popular_routes, distance_between_routes, longest_duration_routes = topRoutes(routeAggregates(data), stations)
+
+        # Estadísticas exactas de duración y distancia: los viajes ya están todos en memoria
+        # (StreamingStats queda para los modos por bloques, en paralelo y por rango de meses)
+        with metrics.stage("analytics.stats", rows=len(data)):
+            duration_stats = ExactStats(data["duration"])
+            distance_stats = ExactStats(data["distance_km"])
+            stats_df = statsTable({"Duration": duration_stats, "Distance (km)": distance_stats})
 
         self.analizedData = {
             "data": data,
             "most_popular_routes": most_popular_routes,
             "distance_between_routes": distance_between_routes,
             "longest_duration_routes": longest_duration_routes,
-            "stats": stats_df  # Add the new stats DataFrame
+            "stats": stats_df
         }
         return self.analizedData
-    
-        
-        
-    
-    
+
+    # Modo fuera de memoria: cada bloque de chunkSize viajes se filtra, se le calculan las
+    # distancias y se acumula en TripAggregates, así la memoria no depende del tamaño del archivo.
+    # Retorna las claves de AnalizeData más "stations"; "data" es una muestra de viajes.
+    def _analizeChunks(self, data, chunkSize):
+        print(f"Leyendo y analizando datos por bloques de {chunkSize} viajes...")
+        total = None
+        for chunk in self._chunks(data, chunkSize):
+            with metrics.stage("analytics.chunk", rows=len(chunk)):
+                data, _ = self._prepare(applyTripSchema(chunk))
+                aggregates = TripAggregates.fromTrips(data, compression=self.compression)
+            total = aggregates if total is None else total.merge(aggregates)
+        _requireTrips(total and total.population)
+        self.analizedData = total.analizedData()
+        return self.analizedData
+
+    # Modo paralelo: una partición por proceso (hash de la estación de origen). Las
+    # distancias y agregados se calculan en cada proceso y se combinan en el orden de las
+    # particiones, así el resultado no depende de qué proceso termine primero.
+    # Retorna las claves de AnalizeData más "stations"; "data" es una muestra de viajes.
+    def _analizeParallel(self, data):
+        print("Leyendo datos...")
+        with metrics.stage("analytics.load") as span:
+            data = self._load(data)
+            span["rows"] = len(data)
+
+        print(f"Analizando datos en {self.workers} procesos...")
+        partitions = partitionTrips(data, self.workers)
+        del data
+        with metrics.stage("analytics.partitions", rows=sum(len(partition) for partition in partitions)):
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(
+                    _aggregatePartition, partitions,
+                    repeat(self.precision), repeat(self.compression), repeat(self.distanceCache.path)
+                ))
+        total = results[0]
+        for aggregates in results[1:]:
+            total.merge(aggregates)
+        _requireTrips(total.population)
+        self.analizedData = total.analizedData()
+        return self.analizedData
+
+    # Agregados de un mes: se reutilizan los guardados si el archivo de viajes no cambió
+    # desde que se calcularon; si no, se procesan solo los viajes de ese mes y se guardan.
+    def monthAggregates(self, month, filePath, force=False):
+        folder = os.path.join(self.aggregatesPath, month)
+        meta = {
+            "source": os.path.abspath(filePath),
+            "mtime": os.path.getmtime(filePath),
+            "size": os.path.getsize(filePath),
+            "precision": self.precision,
+            "compression": self.compression
+        }
+        if not force and TripAggregates.savedMeta(folder) == meta:
+            return TripAggregates.load(folder)
+
+        print(f"Procesando viajes de {month}...")
+        data, _ = self._prepare(applyTripSchema(loadData(filePath)))
+        aggregates = TripAggregates.fromTrips(data, compression=self.compression)
+        aggregates.save(folder, meta)
+        return aggregates
+
+    # Reporte de varios meses combinando los agregados mensuales (uno por carpeta
+    # {path}/{YYYY-MM}/ como las descarga getDataRange). Retorna las mismas claves que
+    # AnalizeData más "stations"; "data" es una muestra de viajes para los gráficos.
+    def AnalizeRange(self, start, end, path="data/input", force=False):
+        months = monthRange(start, end)
+        files = [dataFile(os.path.join(path, month)) for month in months]
+        if self.workers > 1:
+            # Un mes por proceso; los resultados llegan en el orden de los meses
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                monthly = list(executor.map(self.monthAggregates, months, files, repeat(force)))
+        else:
+            monthly = [self.monthAggregates(month, filePath, force) for month, filePath in zip(months, files)]
+
+        print("Combinando agregados mensuales...")
+        total = monthly[0]
+        for aggregates in monthly[1:]:
+            total.merge(aggregates)
+        self.analizedData = total.analizedData()
+        return self.analizedData
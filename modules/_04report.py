@@ -1,11 +1,9 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from geopy.distance import geodesic
-import geopandas as gpd
-from shapely.geometry import Point
-import contextily as ctx
+import matplotlib
+from matplotlib.figure import Figure
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
@@ -13,7 +11,10 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from datetime import datetime
-import seaborn as sns
+from ._07tiles import DEFAULT_ZOOM, addCachedBasemap
+from ._08stations import stationRegistry
+from ._12metrics import metrics
+from ._14reportcache import REPORT_CACHE_MB, ReportCache, fingerprint
 
 class PDFWithHeaderFooter(SimpleDocTemplate):
     def __init__(self, *args, **kwargs):
@@ -45,125 +46,241 @@ class PDFWithHeaderFooter(SimpleDocTemplate):
 
         canvas.restoreState()
 
-# Function to generate the bar chart and return a buffer
-def create_bar_chart(df, y_column, title):
-    plt.figure(figsize=(8, 6))
-    df.plot(kind='bar', y=y_column, legend=False)
-    plt.title(title)
-    plt.ylabel(y_column)
-    plt.xticks(rotation=90)
-    
-    # Save to a buffer
+# Guarda la figura en un buffer PNG. Se usa la API orientada a objetos (Figure)
+# en lugar del estado global de pyplot para poder renderizar en paralelo.
+def figure_to_buffer(fig, **kwargs):
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
+    fig.savefig(buffer, format='png', **kwargs)
     buffer.seek(0)
-    plt.close() 
     return buffer
 
+# Function to generate the bar chart and return a buffer
+def create_bar_chart(df, y_column, title):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    df.plot(kind='bar', y=y_column, legend=False, ax=ax)
+    ax.set_title(title)
+    ax.set_ylabel(y_column)
+    ax.tick_params(axis='x', labelrotation=90)
+    fig.tight_layout()
+    return figure_to_buffer(fig)
+
 # Function to convert DataFrame to a ReportLab Table
 def dataframe_to_table(df):
     table_data = [list(df.columns)] + df.values.tolist()
     return Table(table_data)
 
 # Create the map plot for bike stations
-def create_map_plot(data):
-    # Create GeoDataFrames for start and end stations
-    gdf_start = gpd.GeoDataFrame(data, geometry=gpd.points_from_xy(data['start_station_longitude'], data['start_station_latitude']))
-    gdf_end = gpd.GeoDataFrame(data, geometry=gpd.points_from_xy(data['end_station_longitude'], data['end_station_latitude']))
-
-    # Combine start and end stations into one GeoDataFrame, keeping unique stations
-    gdf_all_stations = pd.concat([gdf_start[['start_station_name', 'geometry']],
-                                  gdf_end[['end_station_name', 'geometry']].rename(columns={'end_station_name': 'start_station_name'})]).drop_duplicates()
-
-    gdf_all_stations = gdf_all_stations.set_crs(epsg=4326)
+def create_map_plot(data, zoom=DEFAULT_ZOOM, offline=False):
+    # geopandas se importa aquí y no al cargar el módulo: es la dependencia más lenta de cargar
+    import geopandas as gpd
+    # Solo se dibuja una fila por estación: acepta los viajes o un registro de estaciones ya calculado
+    stations = stationRegistry(data)
+    gdf_all_stations = gpd.GeoDataFrame(
+        stations,
+        geometry=gpd.points_from_xy(stations['longitude'], stations['latitude']),
+        crs="EPSG:4326"
+    )
 
     # Plotting the stations with a basemap
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
     gdf_all_stations.plot(ax=ax, marker='o', color='red', markersize=5)
+    # Mapa base desde la caché local de teselas (data/tiles); en modo offline nunca se usa la red
+    basemap = False
     try:
-        ctx.add_basemap(ax, crs=gdf_all_stations.crs)
+        basemap = addCachedBasemap(ax, zoom=zoom, offline=offline)
+        if not basemap:
+            print("No hay mapa de fondo en la caché local para el modo offline.")
     except:
         print("No se pudo obtener la imagen del mapa de fondo. Problemas de conexión con el servidor.")
 
     # Customize the map
-    plt.title('Ubicación de las estaciones')
-    plt.xlabel('Longitud')
-    plt.ylabel('Latitud')
+    ax.set_title('Ubicación de las estaciones')
+    ax.set_xlabel('Longitud')
+    ax.set_ylabel('Latitud')
     ax.set_aspect('equal', 'box')
 
-    # Save the plot to a buffer
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    plt.close()
+    # Un mapa sin mapa base no se guarda en la caché de reportes: se vuelve a intentar la próxima vez
+    buffer = figure_to_buffer(fig)
+    buffer.cacheable = basemap
     return buffer
 
 # Función para crear el gráfico de distribuciones (histogramas para Duration y Distance)
 def create_distribution_plot1(data):
-    plt.figure(figsize=(7, 4))  # tamaño más proporcional
-    plt.hist(data['duration'], bins=30, color='blue', alpha=0.7)
-    plt.title('Distribution of Duration')
-    plt.xlabel('Duration')
-    plt.ylabel('Frequency')
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight') 
-    buffer.seek(0)
-    plt.close()
-    return buffer
+    fig = Figure(figsize=(7, 4))  # tamaño más proporcional
+    ax = fig.subplots()
+    ax.hist(data['duration'], bins=30, color='blue', alpha=0.7)
+    ax.set_title('Distribution of Duration')
+    ax.set_xlabel('Duration')
+    ax.set_ylabel('Frequency')
+    return figure_to_buffer(fig, bbox_inches='tight')
 
 def create_distribution_plot2(data):
-    plt.figure(figsize=(7, 4))
-    plt.hist(data['distance_km'], bins=30, color='green', alpha=0.7)
-    plt.title('Distribution of Distance')
-    plt.xlabel('Distance (km)')
-    plt.ylabel('Frequency')
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    return buffer
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+    ax.hist(data['distance_km'], bins=30, color='green', alpha=0.7)
+    ax.set_title('Distribution of Distance')
+    ax.set_xlabel('Distance (km)')
+    ax.set_ylabel('Frequency')
+    return figure_to_buffer(fig, bbox_inches='tight')
+
+# Por encima de SCATTER_THRESHOLD viajes el scatter se dibuja agregado (densidad hexagonal)
+SCATTER_THRESHOLD = 20_000
+SCATTER_MODES = ("auto", "points", "hexbin", "sample")
+
+def scatter_mode(rows, mode="auto", threshold=SCATTER_THRESHOLD):
+    if mode not in SCATTER_MODES:
+        raise ValueError(f"Modo de scatter no soportado: {mode}. Use uno de {SCATTER_MODES}.")
+    if mode == "auto":
+        return "points" if rows <= threshold else "hexbin"
+    return mode
+
+# Muestreo estratificado por cuantiles de duración: conserva la forma de la distribución
+# con como máximo max_points puntos y es reproducible gracias a la semilla fija.
+def stratified_sample(data, max_points=SCATTER_THRESHOLD, strata=20, seed=0):
+    if len(data) <= max_points:
+        return data
+    strata = min(strata, len(data))
+    bins = pd.qcut(data['duration'].rank(method='first'), strata, labels=False)
+    return data.groupby(bins, group_keys=False).sample(frac=max_points / len(data), random_state=seed)
 
 # Función para crear el gráfico scatter (Duration vs Distance)
-def create_scatter_plot(data):
-    plt.figure(figsize=(7, 5))
-    plt.scatter(data['duration'], data['distance_km'], alpha=0.5)
-    plt.title('Duration vs Distance')
-    plt.xlabel('Duration')
-    plt.ylabel('Distance (km)')
-    
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    return buffer
+def create_scatter_plot(data, mode="auto", threshold=SCATTER_THRESHOLD):
+    mode = scatter_mode(len(data), mode, threshold)
+    fig = Figure(figsize=(7, 5))
+    ax = fig.subplots()
+    if mode == "hexbin":
+        hexbin = ax.hexbin(data['duration'], data['distance_km'], gridsize=60, bins='log', mincnt=1, cmap='viridis')
+        fig.colorbar(hexbin, ax=ax, label='Trips (log)')
+    else:
+        points = stratified_sample(data, threshold) if mode == "sample" else data
+        ax.scatter(points['duration'], points['distance_km'], alpha=0.5)
+    ax.set_title('Duration vs Distance')
+    ax.set_xlabel('Duration')
+    ax.set_ylabel('Distance (km)')
+    return figure_to_buffer(fig, bbox_inches='tight')
+
+# boxplot(orientation=...) existe desde matplotlib 3.10; antes se usa vert=False (obsoleto desde 3.11)
+BOX_HORIZONTAL = ({"orientation": "horizontal"} if tuple(int(part) for part in matplotlib.__version__.split(".")[:2]) >= (3, 10)
+                  else {"vert": False})
 
 # Función para crear box plots para Duration y Distance
 def create_box_plots(data):
-    plt.figure(figsize=(12, 6))
-    plt.subplot(1, 2, 1)
-    plt.boxplot(data['duration'], vert=False)
-    plt.title('Box Plot of Duration')
-    plt.xlabel('Duration')
-    
-    plt.subplot(1, 2, 2)
-    plt.boxplot(data['distance_km'], vert=False)
-    plt.title('Box Plot of Distance (km)')
-    plt.xlabel('Distance (km)')
-    
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    plt.close()
-    return buffer
+    fig = Figure(figsize=(12, 6))
+    ax_duration, ax_distance = fig.subplots(1, 2)
+    ax_duration.boxplot(data['duration'], **BOX_HORIZONTAL)
+    ax_duration.set_title('Box Plot of Duration')
+    ax_duration.set_xlabel('Duration')
+
+    ax_distance.boxplot(data['distance_km'], **BOX_HORIZONTAL)
+    ax_distance.set_title('Box Plot of Distance (km)')
+    ax_distance.set_xlabel('Distance (km)')
+    return figure_to_buffer(fig)
+
+# Mapa de correlación entre Duration y Distance
+def create_heatmap(data):
+    import seaborn as sns
+    correlation_matrix = data[['duration', 'distance_km']].corr()
+    fig = Figure(figsize=(6, 5))
+    ax = fig.subplots()
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f', square=True, ax=ax)
+    ax.set_title('Mapa de Correlacion')
+    return figure_to_buffer(fig)
+
+# Ejecuta una tarea de gráfico y retorna los bytes PNG (los BytesIO no cruzan procesos)
+# y si el gráfico se puede guardar en la caché
+def _render_task(task):
+    function, args = task
+    buffer = function(*args)
+    png = buffer.getvalue()
+    buffer.close()
+    return png, getattr(buffer, "cacheable", True)
+
+# Huella de cada gráfico: función, columnas y parámetros que recibe
+def chart_keys(tasks):
+    return {name: fingerprint(*tasks[name]) for name in tasks}
+
+# Renderiza todos los gráficos del reporte. Con workers > 1 cada figura se genera
+# en un proceso distinto; a cada tarea solo se le envían las columnas que necesita.
+# Con cache (ReportCache) solo se dibujan los gráficos cuya huella (keys) no está guardada.
+def render_charts(tasks, workers=1, cache=None, keys=None):
+    if cache and keys is None:
+        keys = chart_keys(tasks)
+    pngs = {}
+    for name in (keys if cache else ()):
+        png = cache.get(keys[name], "png")
+        if png is not None:
+            pngs[name] = png, True
+    missing = [name for name in tasks if name not in pngs]
+    if missing and (workers is None or workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pngs.update(zip(missing, executor.map(_render_task, [tasks[name] for name in missing])))
+    else:
+        for name in missing:
+            with metrics.stage(f"report.chart.{name}"):
+                pngs[name] = _render_task(tasks[name])
+    charts = {}
+    for name in tasks:
+        png, cacheable = pngs[name]
+        if cache and cacheable and name in missing:
+            cache.put(keys[name], "png", png)
+        charts[name] = BytesIO(png)
+        charts[name].cacheable = cacheable
+    return charts
+
+# Guarda el PDF en un archivo y lo abre
+def _save(filePath, pdf, openFile):
+    with open(filePath, 'wb') as f:
+        f.write(pdf)
 
-# Función principal que genera el reporte PDF
-def report(filePath, analized_data, username):
+    print("Reporte generado con éxito.")
+
+    # Abrir el archivo PDF (solo en Windows)
+    if openFile:
+        os.startfile(".\\"+filePath)
+    # Para otros sistemas operativos:
+    # os.system(f'xdg-open "{filePath}"')  # Linux
+    # os.system(f'open "{filePath}"')       # macOS
+
+# Función principal que genera el reporte PDF. Con openFile=False no se abre el visor (modo sin interfaz).
+# Con cachePath se reutilizan los gráficos y el PDF ya generados para los mismos datos y parámetros:
+# si solo cambia el usuario (o la fecha) se vuelve a armar el documento con los gráficos guardados.
+def report(filePath, analized_data, username, workers=1, zoom=DEFAULT_ZOOM, offline=False, openFile=True,
+           cachePath=None, cacheMb=REPORT_CACHE_MB):
+    with metrics.stage("report", rows=len(analized_data["data"]), workers=workers) as span:
+        cache = ReportCache(cachePath, cacheMb) if cachePath else None
+        span["cached"] = _report(filePath, analized_data, username, workers, zoom, offline, openFile, cache)
+
+def _report(filePath, analized_data, username, workers, zoom, offline, openFile, cache=None):
     most_popular_routes = analized_data["most_popular_routes"]
     distance_between_routes = analized_data["distance_between_routes"]
     longest_duration_routes = analized_data["longest_duration_routes"]
     data = analized_data["data"]
+    # Los reportes de varios meses traen el registro de estaciones junto a una muestra de viajes
+    stations = analized_data["stations"] if "stations" in analized_data else stationRegistry(data)
+
+    report_date = datetime.now().strftime('%Y-%m-%d')
+    tasks = {
+        'map': (create_map_plot, (stations, zoom, offline)),
+        'most_popular': (create_bar_chart, (most_popular_routes, 'count', 'Most Popular Routes')),
+        'distances': (create_bar_chart, (distance_between_routes, 'distance_km', 'Longest Distances Between Stations')),
+        'longest_duration': (create_bar_chart, (longest_duration_routes, 'avg_duration', 'Longest Average Durations')),
+        'distribution_duration': (create_distribution_plot1, (data[['duration']],)),
+        'distribution_distance': (create_distribution_plot2, (data[['distance_km']],)),
+        'scatter': (create_scatter_plot, (data[['duration', 'distance_km']],)),
+        'box': (create_box_plots, (data[['duration', 'distance_km']],)),
+        'heatmap': (create_heatmap, (data[['duration', 'distance_km']],)),
+    }
+
+    # El PDF completo se reutiliza solo si coinciden los gráficos, las tablas, el usuario y la fecha
+    keys = chart_keys(tasks) if cache else None
+    if cache:
+        pdf_key = fingerprint(keys, analized_data["stats"], username, report_date)
+        pdf = cache.get(pdf_key, "pdf")
+        if pdf is not None:
+            _save(filePath, pdf, openFile)
+            return True
 
     pdf_buffer = BytesIO()
     doc = PDFWithHeaderFooter(pdf_buffer, pagesize=letter, 
@@ -174,7 +291,6 @@ def report(filePath, analized_data, username):
     styles = getSampleStyleSheet()
 
     # Párrafos descriptivos
-    report_date = datetime.now().strftime('%Y-%m-%d')
     description = ("Este reporte presenta las rutas de bicicleta más populares en el sistema de bicicletas públicas de Noruega, "
                    "las distancias más largas entre estaciones, y la mayor duración promedio de rutas en base a los datos proporcionados.")
     elements.append(Paragraph(description, styles['BodyText']))
@@ -183,9 +299,12 @@ def report(filePath, analized_data, username):
     elements.append(Paragraph(created, styles['BodyText']))
     elements.append(Spacer(1, 12))
 
+    # Generar todos los gráficos antes de armar el documento
+    with metrics.stage("report.charts", workers=workers):
+        charts = render_charts(tasks, workers=workers, cache=cache, keys=keys)
+
     # Agregar el mapa
-    map_buffer = create_map_plot(data)
-    elements.append(Image(map_buffer, width=500, height=400))
+    elements.append(Image(charts['map'], width=500, height=400))
 
     # Tabla y gráfico de Most Popular Routes
     elements.append(Paragraph("Most Popular Routes", styles['Heading2']))
@@ -200,8 +319,7 @@ def report(filePath, analized_data, username):
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige)
     ]))
     elements.append(table_most_popular)
-    buffer_most_popular = create_bar_chart(most_popular_routes, 'count', 'Most Popular Routes')
-    elements.append(Image(buffer_most_popular, width=400, height=300))
+    elements.append(Image(charts['most_popular'], width=400, height=300))
 
     # Tabla y gráfico de Routes with the Largest Distances
     elements.append(Paragraph("Routes with the Largest Distances", styles['Heading2']))
@@ -216,8 +334,7 @@ def report(filePath, analized_data, username):
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige)
     ]))
     elements.append(table_distances)
-    buffer_distances = create_bar_chart(distance_between_routes, 'distance_km', 'Longest Distances Between Stations')
-    elements.append(Image(buffer_distances, width=400, height=300))
+    elements.append(Image(charts['distances'], width=400, height=300))
 
     # Tabla y gráfico de Routes with the Longest Average Duration
     elements.append(Paragraph("Routes with the Longest Average Duration", styles['Heading2']))
@@ -232,8 +349,7 @@ def report(filePath, analized_data, username):
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige)
     ]))
     elements.append(table_longest_duration)
-    buffer_longest_duration = create_bar_chart(longest_duration_routes, 'avg_duration', 'Longest Average Durations')
-    elements.append(Image(buffer_longest_duration, width=400, height=300))
+    elements.append(Image(charts['longest_duration'], width=400, height=300))
 
     # Tabla de estadísticas
     elements.append(Paragraph("Statistics for Duration and Distance", styles['Heading2']))
@@ -251,56 +367,32 @@ def report(filePath, analized_data, username):
     elements.append(Spacer(1, 0.2*inch))  
 
 
-    buffer_distribution = create_distribution_plot1(data)
-    elements.append(Image(buffer_distribution, width=5.5*inch, height=3*inch))  
+    elements.append(Image(charts['distribution_duration'], width=5.5*inch, height=3*inch))
     elements.append(Spacer(1, 0.2*inch))  
 
-    buffer_distribution = create_distribution_plot2(data)
-    elements.append(Image(buffer_distribution, width=5.5*inch, height=3*inch))
+    elements.append(Image(charts['distribution_distance'], width=5.5*inch, height=3*inch))
 
     # Gráfico scatter (Duration vs Distance)
-    buffer_scatter = create_scatter_plot(data)
-    elements.append(Image(buffer_scatter, width=5.5*inch, height=3*inch))
+    elements.append(Image(charts['scatter'], width=5.5*inch, height=3*inch))
     elements.append(Spacer(1, 0.2*inch)) 
     
     # Gráfico de box plots (Duration y Distance)
-    buffer_box = create_box_plots(data)
-    elements.append(Image(buffer_box, width=5.5*inch, height=3*inch))
+    elements.append(Image(charts['box'], width=5.5*inch, height=3*inch))
     
     # Correlation Heatmap
-    correlation_matrix = data[['duration', 'distance_km']].corr()
-    plt.figure(figsize=(6, 5))
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f', square=True)
-    plt.title('Mapa de Correlacion')
-    buffer_heatmap = BytesIO()
-    plt.savefig(buffer_heatmap, format='png')
-    buffer_heatmap.seek(0)
-    plt.close()
-    elements.append(Image(buffer_heatmap, width=6*inch, height=3.5*inch))
+    elements.append(Image(charts['heatmap'], width=6*inch, height=3.5*inch))
 
     # Construir el PDF
-    doc.build(elements)
+    with metrics.stage("report.pdf"):
+        doc.build(elements)
 
     # Cerrar buffers utilizados
-    buffer_most_popular.close()
-    buffer_distances.close()
-    buffer_longest_duration.close()
-    map_buffer.close()
-    buffer_distribution.close()
-    buffer_scatter.close()
-    buffer_box.close()
-    buffer_heatmap.close()
-
-    # Guardar el PDF en un archivo
-    with open(filePath, 'wb') as f:
-        f.write(pdf_buffer.getvalue())
-
-    print("Reporte generado con éxito.")
-
-    # Abrir el archivo PDF (solo en Windows)
-    os.startfile(".\\"+filePath)
-    # Para otros sistemas operativos:
-    # os.system(f'xdg-open "{filePath}"')  # Linux
-    # os.system(f'open "{filePath}"')       # macOS
+    for buffer in charts.values():
+        buffer.close()
 
+    pdf = pdf_buffer.getvalue()
     pdf_buffer.close()
+    if cache and all(buffer.cacheable for buffer in charts.values()):
+        cache.put(pdf_key, "pdf", pdf)
+    _save(filePath, pdf, openFile)
+    return False
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+from contextlib import closing
+import numpy as np
+import pandas as pd
+from geopy.distance import geodesic
+
+# Radio medio de la Tierra (IUGG) y parámetros del elipsoide WGS-84
+EARTH_RADIUS_KM = 6371.0088
+WGS84_A = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+PRECISION_MODES = ("haversine", "vincenty", "geopy")
+
+def _asCoordinates(*columns):
+    coords = [np.asarray(column, dtype=np.float64) for column in columns]
+    if any(np.isnan(c).any() for c in coords):
+        raise ValueError("Las coordenadas contienen valores inválidos (NaN o None).")
+    return coords
+
+# Distancia sobre la esfera, rápida pero con error de hasta ~0.5%
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = np.radians(_asCoordinates(lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+# Problema inverso de Vincenty sobre el elipsoide WGS-84, iterado para todas las filas a la vez.
+# Los pares que no convergen (casi antipodales) se resuelven con geopy (algoritmo de Karney).
+def vincenty(lat1, lon1, lat2, lon2, tol=1e-12, maxIter=200):
+    lat1, lon1, lat2, lon2 = _asCoordinates(lat1, lon1, lat2, lon2)
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    L = np.radians(lon2 - lon1)
+
+    U1 = np.arctan((1 - WGS84_F) * np.tan(phi1))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(phi2))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    converged = np.zeros(L.shape, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(maxIter):
+            sinLam, cosLam = np.sin(lam), np.cos(lam)
+            sinSigma = np.hypot(cosU2 * sinLam, cosU1 * sinU2 - sinU1 * cosU2 * cosLam)
+            cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+            sigma = np.arctan2(sinSigma, cosSigma)
+            sinAlpha = np.where(sinSigma == 0, 0.0, cosU1 * cosU2 * sinLam / sinSigma)
+            cos2Alpha = 1 - sinAlpha ** 2
+            # En líneas ecuatoriales cos2Alpha es 0 y cos2SigmaM no está definido
+            cos2SigmaM = np.where(cos2Alpha == 0, 0.0, cosSigma - 2 * sinU1 * sinU2 / cos2Alpha)
+            C = WGS84_F / 16 * cos2Alpha * (4 + WGS84_F * (4 - 3 * cos2Alpha))
+            lamPrev = lam
+            lam = L + (1 - C) * WGS84_F * sinAlpha * (
+                sigma + C * sinSigma * (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2))
+            )
+            converged = np.abs(lam - lamPrev) < tol
+            if converged.all():
+                break
+
+        u2 = cos2Alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (
+            cosSigma * (-1 + 2 * cos2SigmaM ** 2)
+            - B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)
+        ))
+        distance = WGS84_B * A * (sigma - deltaSigma)
+
+    distance = np.where(sinSigma == 0, 0.0, distance)
+    for i in np.flatnonzero(~converged):
+        distance.flat[i] = geodesic((lat1.flat[i], lon1.flat[i]), (lat2.flat[i], lon2.flat[i])).kilometers
+    return distance
+
+# Referencia fila a fila con geopy; exacta pero lenta
+def geopyDistance(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = _asCoordinates(lat1, lon1, lat2, lon2)
+    distances = [geodesic((a, b), (c, d)).kilometers for a, b, c, d in zip(lat1.ravel(), lon1.ravel(), lat2.ravel(), lon2.ravel())]
+    return np.array(distances, dtype=np.float64).reshape(lat1.shape)
+
+# Calcula la distancia en km entre columnas de coordenadas completas según el modo de precisión
+def distanceKm(lat1, lon1, lat2, lon2, mode="vincenty"):
+    if mode == "haversine":
+        return haversine(lat1, lon1, lat2, lon2)
+    if mode == "vincenty":
+        return vincenty(lat1, lon1, lat2, lon2)
+    if mode == "geopy":
+        return geopyDistance(lat1, lon1, lat2, lon2)
+    raise ValueError(f"Modo de precisión no soportado: {mode}. Use uno de {PRECISION_MODES}.")
+
+# Columnas que identifican a la estación de inicio y fin; si no hay ids se usan los nombres
+def stationKeyColumns(data):
+    if "start_station_id" in data.columns and "end_station_id" in data.columns:
+        return ["start_station_id", "end_station_id"]
+    return ["start_station_name", "end_station_name"]
+
+# Decimales de las coordenadas guardadas junto a cada par (1e-6 grados son ~0.1 m)
+COORDINATE_DECIMALS = 6
+
+# Resuelve distancias por par único (inicio, fin) de estaciones en lugar de por viaje.
+# Con path se guarda además una caché persistente en SQLite para reutilizarla entre ejecuciones;
+# las coordenadas son parte de la clave, así una estación movida entre meses se vuelve a calcular.
+class DistanceCache:
+    def __init__(self, path=None):
+        self.path = path
+        self.distances = {}
+
+    @staticmethod
+    def _table(conn):
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(distances)")]
+        # Las cachés de versiones anteriores no guardan coordenadas: se descartan
+        if columns and "start_lat" not in columns:
+            conn.execute("DROP TABLE distances")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS distances ("
+            "start_key TEXT, end_key TEXT, start_lat REAL, start_lon REAL, end_lat REAL, end_lon REAL, "
+            "mode TEXT, distance_km REAL, "
+            "PRIMARY KEY (start_key, end_key, start_lat, start_lon, end_lat, end_lon, mode))"
+        )
+
+    def _load(self, mode):
+        if mode in self.distances:
+            return self.distances[mode]
+        known = {}
+        if self.path and os.path.exists(self.path):
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                self._table(conn)
+                rows = conn.execute(
+                    "SELECT start_key, end_key, start_lat, start_lon, end_lat, end_lon, distance_km "
+                    "FROM distances WHERE mode = ?", (mode,)
+                ).fetchall()
+            known = {tuple(row[:-1]): row[-1] for row in rows}
+        self.distances[mode] = known
+        return known
+
+    def _store(self, mode, rows):
+        if not self.path:
+            return
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            self._table(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*key, mode, km) for key, km in rows.items()]
+            )
+
+    # Pares por estaciones y coordenadas redondeadas; retorna los pares y el par de cada viaje
+    @staticmethod
+    def _locatedPairs(data, keys, coords):
+        located = data[keys].reset_index(drop=True)
+        for column in coords:
+            located[column] = np.round(data[column].to_numpy(dtype=np.float64), COORDINATE_DECIMALS)
+        codes = located.groupby(keys + coords, sort=False, dropna=False).ngroup().to_numpy()
+        first = np.unique(codes, return_index=True)[1]
+        return data[keys + coords].iloc[first], codes
+
+    def resolve(self, data, mode="vincenty"):
+        keys = stationKeyColumns(data)
+        coords = ["start_station_latitude", "start_station_longitude", "end_station_latitude", "end_station_longitude"]
+        pairs = data[keys + coords].drop_duplicates(subset=keys)
+        if len(pairs) == 0:
+            return np.empty(0, dtype=np.float64)
+        pairIndex = pd.MultiIndex.from_frame(pairs[keys])
+        positions = pairIndex.get_indexer(pd.MultiIndex.from_frame(data[keys]))
+        # Si una estación se movió (por ejemplo varios meses juntos) cada ubicación es un par distinto
+        if any((data[column].to_numpy() != pairs[column].to_numpy()[positions]).any() for column in coords):
+            pairs, positions = self._locatedPairs(data, keys, coords)
+
+        known = self._load(mode)
+        located = (np.round(pairs[column].to_numpy(dtype=np.float64), COORDINATE_DECIMALS).tolist() for column in coords)
+        pairKeys = list(zip(pairs[keys[0]].astype(str), pairs[keys[1]].astype(str), *located))
+        distances = np.array([known.get(key, np.nan) for key in pairKeys], dtype=np.float64)
+
+        missing = np.isnan(distances)
+        if missing.any():
+            new = pairs[missing]
+            distances[missing] = distanceKm(*(new[column] for column in coords), mode=mode)
+            computed = {key: float(km) for key, km, isNew in zip(pairKeys, distances, missing) if isNew}
+            known.update(computed)
+            self._store(mode, computed)
+
+        # Propagar la distancia de cada par a todos sus viajes
+        return distances[positions]
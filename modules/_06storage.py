@@ -0,0 +1,203 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Formatos soportados para los datos intermedios y su extensión de archivo
+FORMATS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "csv": ".csv",
+    "excel": ".xlsx"
+}
+DEFAULT_FORMAT = "parquet"
+DEFAULT_COMPRESSION = "zstd"
+
+# Esquema compacto de los viajes: fechas como datetime64 UTC, duración int32,
+# coordenadas float32 (~0.4 m de resolución en Bergen) y estaciones como categorías
+TIME_COLUMNS = ["started_at", "ended_at"]
+DURATION_COLUMN = "duration"
+COORDINATE_COLUMNS = ["start_station_latitude", "start_station_longitude", "end_station_latitude", "end_station_longitude"]
+STATION_FIELDS = ["id", "name", "description"]
+
+# Tipos de Arrow fijos de las columnas de viajes al escribir por lotes (los mismos que deja
+# applyTripSchema), así un lote con una columna vacía o con la duración como float no cambia el esquema
+TRIP_TYPES = {
+    **{column: pa.timestamp("us", tz="UTC") for column in TIME_COLUMNS},
+    DURATION_COLUMN: pa.int32(),
+    **{column: pa.float32() for column in COORDINATE_COLUMNS},
+    **{f"{side}_station_{field}": pa.string() for side in ("start", "end") for field in ("name", "description")}
+}
+
+# Ruta del archivo de datos dentro de una carpeta según el formato
+def dataFile(path, fmt=DEFAULT_FORMAT):
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}. Use uno de {list(FORMATS)}.")
+    return os.path.join(path, "data" + FORMATS[fmt])
+
+def formatOf(filePath):
+    extension = os.path.splitext(filePath)[1].lower()
+    for fmt, ext in FORMATS.items():
+        if ext == extension:
+            return fmt
+    raise ValueError(f"No se reconoce el formato del archivo: {filePath}")
+
+# Guarda el DataFrame en el formato indicado por la extensión del archivo
+def saveData(df, filePath, compression=DEFAULT_COMPRESSION):
+    fmt = formatOf(filePath)
+    if fmt == "parquet":
+        df.to_parquet(filePath, index=False, compression=compression)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(filePath, compression=compression)
+    elif fmt == "csv":
+        df.to_csv(filePath, index=False)
+    else:
+        df.to_excel(filePath, index=False)
+    return filePath
+
+# Lee el archivo de datos según su extensión, opcionalmente solo algunas columnas
+def loadData(filePath, columns=None):
+    fmt = formatOf(filePath)
+    if fmt == "parquet":
+        return pd.read_parquet(filePath, columns=columns)
+    if fmt == "feather":
+        return pd.read_feather(filePath, columns=columns)
+    if fmt == "csv":
+        return pd.read_csv(filePath, usecols=columns)
+    return pd.read_excel(filePath, usecols=columns)
+
+# Fechas ISO 8601 a datetime64 UTC: Arrow convierte el formato del servicio sin pasar por
+# Python; si no lo reconoce se usa el parser de pandas
+def _parseTimes(values):
+    try:
+        parsed = pa.array(values, from_pandas=True).cast(pa.timestamp("us", tz="UTC")).to_pandas()
+        return parsed.set_axis(values.index).rename(values.name)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pd.to_datetime(values, utc=True, format="ISO8601", errors="coerce")
+
+# Inicio y fin comparten las mismas categorías para poder compararse y unirse sin convertir
+def _sharedCategories(start, end):
+    if (isinstance(start.dtype, pd.CategoricalDtype) and isinstance(end.dtype, pd.CategoricalDtype)
+            and start.cat.categories.equals(end.cat.categories)):
+        return start, end
+    categories = pd.Index(pd.concat([start, end], ignore_index=True).dropna().unique())
+    try:
+        categories = categories.sort_values()
+    except TypeError:
+        pass  # Tipos mezclados: se deja el orden de aparición
+    return pd.Categorical(start, categories=categories), pd.Categorical(end, categories=categories)
+
+# Aplica el esquema compacto a las columnas de viajes presentes (las demás no se tocan).
+# Con categories=False no se crean categorías, por ejemplo al escribir lotes independientes.
+# Es idempotente; Parquet conserva las categorías de textos pero no las de ids enteros,
+# que se recrean al volver a aplicarlo después de leer.
+def applyTripSchema(df, categories=True):
+    columns = {}
+    for column in TIME_COLUMNS:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            columns[column] = _parseTimes(df[column])
+
+    if DURATION_COLUMN in df.columns:
+        duration = pd.to_numeric(df[DURATION_COLUMN])
+        if (pd.api.types.is_integer_dtype(duration) and len(duration)
+                and duration.min() >= -2**31 and duration.max() < 2**31):
+            duration = duration.astype("int32")
+        columns[DURATION_COLUMN] = duration
+
+    for column in COORDINATE_COLUMNS:
+        if column in df.columns:
+            columns[column] = pd.to_numeric(df[column]).astype("float32")
+
+    if categories:
+        for field in STATION_FIELDS:
+            start, end = f"start_station_{field}", f"end_station_{field}"
+            if start in df.columns and end in df.columns:
+                columns[start], columns[end] = _sharedCategories(df[start], df[end])
+
+    return df.assign(**columns)
+
+# Lee el archivo por bloques de hasta chunkSize filas sin cargarlo completo:
+# Parquet por lotes de sus row groups, Feather lote de Arrow por lote y CSV con chunksize
+def iterData(filePath, chunkSize, columns=None):
+    fmt = formatOf(filePath)
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(filePath).iter_batches(batch_size=chunkSize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "feather":
+        with pa.memory_map(filePath) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, chunkSize):
+                    yield batch.slice(offset, chunkSize).to_pandas()
+    elif fmt == "csv":
+        with pd.read_csv(filePath, usecols=columns, chunksize=chunkSize) as reader:
+            yield from reader
+    else:
+        raise ValueError(f"El formato {fmt} no admite lectura por bloques.")
+
+# Esquema del archivo a partir del primer lote: las columnas de viajes con su tipo fijo y las
+# demás con el tipo inferido; una columna sin valores (tipo null) se guarda como texto
+def batchSchema(schema):
+    fields = []
+    for field in schema:
+        if field.name in TRIP_TYPES:
+            field = field.with_type(TRIP_TYPES[field.name])
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field.with_nullable(True))
+    return pa.schema(fields)
+
+# Convierte un lote al esquema del archivo; las columnas que faltan en el lote quedan nulas
+# y las que no estaban en el primer lote se descartan (Parquet no admite agregar columnas)
+def conformTable(table, schema):
+    columns = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names else pa.nulls(len(table), field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+# Escritor incremental: agrega lotes de registros al archivo a medida que llegan.
+# Solo Parquet (un row group por lote) y CSV admiten escritura por partes.
+# Sin filePath los lotes se acumulan en memoria y se obtienen con frame().
+class BatchWriter:
+    def __init__(self, filePath, compression=DEFAULT_COMPRESSION):
+        self.fmt = formatOf(filePath) if filePath is not None else None
+        if self.fmt not in ("parquet", "csv", None):
+            raise ValueError(f"El formato {self.fmt} no admite escritura por lotes.")
+        self.filePath = filePath
+        self.compression = compression
+        self.writer = None
+        self.batches = []
+        self.rows = 0
+
+    def write(self, df):
+        if self.fmt is None:
+            self.batches.append(df)
+        elif self.fmt == "parquet":
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.filePath, batchSchema(table.schema), compression=self.compression)
+            self.writer.write_table(conformTable(table, self.writer.schema))
+        else:
+            df.to_csv(self.filePath, mode="a" if self.rows else "w", header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def frame(self):
+        if self.fmt is not None:
+            raise ValueError("frame() solo está disponible sin archivo de destino.")
+        return pd.concat(self.batches, ignore_index=True) if self.batches else pd.DataFrame()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
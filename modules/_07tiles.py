@@ -0,0 +1,84 @@
+import os
+import glob
+import argparse
+import numpy as np
+
+# Caché local del mapa base: cada archivo guarda el mosaico de teselas ya reproyectado
+# a EPSG:4326 para un área y un zoom, de modo que se dibuja sin volver al servidor.
+TILE_CACHE_DIR = "data/tiles"
+DEFAULT_ZOOM = 13
+BERGEN_BBOX = (5.25, 60.33, 5.42, 60.43)  # (oeste, sur, este, norte)
+
+# Nombre de ctx.providers.OpenStreetMap.Mapnik, el proveedor por defecto
+DEFAULT_PROVIDER = "OpenStreetMap.Mapnik"
+
+# contextily (y rasterio detrás) se importa solo al descargar teselas: tarda en cargarse.
+# Buscar en la caché usa solo el nombre del proveedor, así el modo offline no lo importa.
+def _provider(source):
+    import contextily as ctx
+    return source if source is not None else ctx.providers.OpenStreetMap.Mapnik
+
+def _providerName(source):
+    return (DEFAULT_PROVIDER if source is None else source.name).replace(".", "-")
+
+def _cacheFile(bbox, zoom, source, cacheDir):
+    west, south, east, north = bbox
+    name = _providerName(source)
+    return os.path.join(cacheDir, f"{name}_z{zoom}_{west:.4f}_{south:.4f}_{east:.4f}_{north:.4f}.npz")
+
+# Busca en la caché un mosaico del mismo proveedor y zoom que cubra el área pedida
+def findBasemap(bbox, zoom=DEFAULT_ZOOM, source=None, cacheDir=TILE_CACHE_DIR):
+    west, south, east, north = bbox
+    name = _providerName(source)
+    for path in sorted(glob.glob(os.path.join(cacheDir, f"{name}_z{zoom}_*.npz"))):
+        # El área se lee desde la derecha: el nombre del proveedor puede tener "_" (CartoDB.Positron_NoLabels)
+        prefix, *bounds = os.path.basename(path)[:-4].rsplit("_", 4)
+        if prefix != f"{name}_z{zoom}":
+            continue
+        try:
+            cw, cs, ce, cn = (float(v) for v in bounds)
+        except ValueError:
+            continue
+        if cw <= west and cs <= south and ce >= east and cn >= north:
+            return path
+    return None
+
+# Descarga las teselas del área (por defecto Bergen) y las guarda reproyectadas en la caché
+def seedBasemap(bbox=BERGEN_BBOX, zoom=DEFAULT_ZOOM, source=None, cacheDir=TILE_CACHE_DIR):
+    import contextily as ctx
+    west, south, east, north = bbox
+    image, extent = ctx.bounds2img(west, south, east, north, zoom=zoom, source=_provider(source), ll=True)
+    image, extent = ctx.warp_tiles(image, extent, t_crs="EPSG:4326")
+    os.makedirs(cacheDir, exist_ok=True)
+    path = _cacheFile(bbox, zoom, source, cacheDir)
+    np.savez_compressed(path, image=image, extent=np.asarray(extent))
+    return path
+
+# Dibuja el mapa base desde la caché; si falta y no estamos en modo offline, lo descarga primero.
+# Retorna False cuando no hay mapa base disponible.
+def addCachedBasemap(ax, zoom=DEFAULT_ZOOM, offline=False, source=None, cacheDir=TILE_CACHE_DIR, margin=0.01):
+    xmin, xmax, ymin, ymax = ax.axis()
+    bbox = (xmin, ymin, xmax, ymax)
+    path = findBasemap(bbox, zoom, source, cacheDir)
+    if path is None:
+        if offline:
+            return False
+        seedArea = (min(xmin - margin, BERGEN_BBOX[0]), min(ymin - margin, BERGEN_BBOX[1]),
+                    max(xmax + margin, BERGEN_BBOX[2]), max(ymax + margin, BERGEN_BBOX[3]))
+        path = seedBasemap(seedArea, zoom, source, cacheDir)
+
+    with np.load(path) as cached:
+        image, extent = cached["image"], tuple(cached["extent"])
+    ax.imshow(image, extent=extent, interpolation="bilinear", zorder=0)
+    ax.axis((xmin, xmax, ymin, ymax))
+    return True
+
+# Pre-carga de la caché para entornos sin conexión: python -m modules._07tiles --zoom 12 13
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-carga la caché de teselas del mapa base de Bergen")
+    parser.add_argument("--zoom", type=int, nargs="+", default=[DEFAULT_ZOOM])
+    parser.add_argument("--bbox", type=float, nargs=4, default=list(BERGEN_BBOX), metavar=("OESTE", "SUR", "ESTE", "NORTE"))
+    parser.add_argument("--cache-dir", default=TILE_CACHE_DIR)
+    args = parser.parse_args()
+    for zoom in args.zoom:
+        print(f"Guardado {seedBasemap(tuple(args.bbox), zoom, cacheDir=args.cache_dir)}")
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+# Columnas del registro de estaciones
+STATION_COLUMNS = ["station_id", "station_name", "latitude", "longitude"]
+
+# Extrae una fila por estación (id, nombre, latitud, longitud) a partir de los viajes.
+# Cada lado se deduplica antes de unirlos, así nunca se copian todas las filas de viajes.
+# Si los datos no traen ids se identifica a la estación por su nombre.
+def stationRegistry(data):
+    if set(STATION_COLUMNS).issubset(data.columns):
+        return data  # Ya es un registro de estaciones
+
+    hasIds = "start_station_id" in data.columns and "end_station_id" in data.columns
+    sides = []
+    for side in ("start", "end"):
+        columns = {
+            f"{side}_station_name": "station_name",
+            f"{side}_station_latitude": "latitude",
+            f"{side}_station_longitude": "longitude"
+        }
+        if hasIds:
+            columns[f"{side}_station_id"] = "station_id"
+        key = f"{side}_station_id" if hasIds else f"{side}_station_name"
+        sides.append(data[list(columns)].drop_duplicates(subset=key).rename(columns=columns))
+
+    stations = pd.concat(sides, ignore_index=True)
+    if not hasIds:
+        stations["station_id"] = stations["station_name"]
+    stations = stations.drop_duplicates(subset="station_id")
+    return stations[STATION_COLUMNS].sort_values("station_id").reset_index(drop=True)
+
+# Código entero por ruta: origen * número de estaciones + destino, con las estaciones
+# numeradas en orden alfabético en un mismo catálogo para ambos lados, de modo que ordenar
+# por código equivale a ordenar por (origen, destino). Las rutas sin nombre de estación quedan en -1.
+def encodeRoutes(data):
+    rows = len(data)
+    codes, stations = pd.factorize(pd.concat([data["start_station_name"], data["end_station_name"]], ignore_index=True), sort=True)
+    start, end = codes[:rows].astype(np.int64), codes[rows:].astype(np.int64)
+    routes = start * len(stations) + end
+    routes[(start < 0) | (end < 0)] = -1
+    return routes, np.asarray(stations, dtype=object)
+
+# Etiquetas "Origen to Destino" solo para los códigos pedidos (por ejemplo un top 10)
+def routeLabels(routes, stations):
+    routes = np.asarray(routes, dtype=np.int64)
+    known = routes >= 0
+    labels = np.full(len(routes), None, dtype=object)
+    if len(stations):
+        labels[known] = stations[routes[known] // len(stations)] + " to " + stations[routes[known] % len(stations)]
+    return labels
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+# Compresión del t-digest: a mayor valor, más centroides y cuantiles más precisos
+DEFAULT_COMPRESSION = 200
+QUANTILES = (0.25, 0.50, 0.75)
+
+# Filas de la tabla de estadísticas del reporte y la clave de cada una en summary()
+STAT_LABELS = {
+    "Mean": "mean",
+    "Variance": "variance",
+    "Standard Deviation": "std_dev",
+    "Max": "max",
+    "Min": "min",
+    "25th Percentile": "25th_percentile",
+    "50th Percentile": "50th_percentile",
+    "75th Percentile": "75th_percentile"
+}
+
+# Valores como float64 sin NaN (pandas también los ignora en sus reducciones)
+def _finite(values):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[~np.isnan(values)]
+
+# Media, varianza, mínimo y máximo en una sola pasada.
+# Cada bloque aporta (count, media, M2) y se combina con la fórmula de Chan,
+# así el resultado no depende de cómo se partan los datos.
+class RunningMoments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = _finite(values)
+        if values.size == 0:
+            return self
+        chunk = RunningMoments()
+        chunk.count = values.size
+        chunk.mean = values.mean()
+        chunk.m2 = np.square(values - chunk.mean).sum()
+        chunk.min = values.min()
+        chunk.max = values.max()
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        # Varianza muestral (ddof=1), igual que pandas
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+# Cuantiles aproximados con un t-digest: los valores se agrupan en centroides (media, peso)
+# más pequeños en las colas que en el centro. El tamaño es O(compression) sin importar
+# cuántos valores se agreguen, y dos digests se pueden combinar.
+class TDigest:
+    def __init__(self, compression=DEFAULT_COMPRESSION, bufferSize=None):
+        if compression <= 0:
+            raise ValueError("La compresión del t-digest debe ser positiva.")
+        self.compression = compression
+        self.bufferSize = bufferSize or 10 * int(compression)
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _add(self, means, weights):
+        self._buffer.append((means, weights))
+        self._buffered += means.size
+        if self._buffered > self.bufferSize:
+            self._compress()
+
+    def update(self, values):
+        values = _finite(values)
+        if values.size == 0:
+            return self
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._add(values, np.ones(values.size))
+        return self
+
+    def merge(self, other):
+        means, weights = other._centroids()
+        if means.size == 0:
+            return self
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._add(means, weights)
+        return self
+
+    # Centroides y valores pendientes, ordenados, sin comprimir
+    def _centroids(self):
+        if not self._buffer:
+            return self.means, self.weights
+        means = np.concatenate([self.means] + [m for m, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        order = np.argsort(means, kind="stable")
+        return means[order], weights[order]
+
+    # Agrupa los centroides consecutivos cuyo cuantil cae en la misma unidad de la
+    # función de escala k(q) = compression / (2π) · asin(2q - 1)
+    def _compress(self):
+        means, weights = self._centroids()
+        self._buffer = []
+        self._buffered = 0
+        if means.size == 0:
+            return
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        group = np.floor(k - k[0]).astype(np.int64)
+        # Numera los grupos de forma consecutiva (floor puede dejar saltos)
+        group = np.unique(group, return_inverse=True)[1]
+        weightSum = np.bincount(group, weights=weights)
+        self.means = np.bincount(group, weights=means * weights) / weightSum
+        self.weights = weightSum
+
+    # Cuantil q con interpolación lineal entre centroides; mientras todos los centroides
+    # tienen peso uno coincide con Series.quantile (interpolation="linear")
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        means, weights = self._centroids()
+        ranks = np.cumsum(weights) - weights + (weights - 1) / 2
+        xs = np.concatenate([[0.0], ranks, [self.count - 1.0]])
+        ys = np.concatenate([[self.min], means, [self.max]])
+        return float(np.interp(q * (self.count - 1), xs, ys))
+
+# Momentos y cuantiles de una columna en una sola pasada, combinables entre bloques o meses
+class StreamingStats:
+    def __init__(self, compression=DEFAULT_COMPRESSION, quantiles=QUANTILES):
+        self.moments = RunningMoments()
+        self.digest = TDigest(compression)
+        self.quantiles = quantiles
+
+    def update(self, values):
+        values = _finite(values)
+        self.moments.update(values)
+        self.digest.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        return self
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    # Estado serializable a JSON para guardar agregados y combinarlos más tarde
+    def toDict(self):
+        means, weights = self.digest._centroids()
+        return {
+            "count": self.moments.count,
+            "mean": float(self.moments.mean),
+            "m2": float(self.moments.m2),
+            "min": float(self.moments.min),
+            "max": float(self.moments.max),
+            "compression": self.digest.compression,
+            "quantiles": list(self.quantiles),
+            "centroids": [means.tolist(), weights.tolist()]
+        }
+
+    @classmethod
+    def fromDict(cls, state):
+        stats = cls(state["compression"], tuple(state["quantiles"]))
+        stats.moments.count = state["count"]
+        stats.moments.mean = state["mean"]
+        stats.moments.m2 = state["m2"]
+        stats.moments.min = state["min"]
+        stats.moments.max = state["max"]
+        means, weights = (np.asarray(values, dtype=np.float64) for values in state["centroids"])
+        digest = stats.digest
+        digest.means, digest.weights = means, weights
+        digest.count = int(weights.sum())
+        digest.min, digest.max = state["min"], state["max"]
+        return stats
+
+    def summary(self):
+        empty = self.count == 0
+        result = {
+            "mean": np.nan if empty else self.moments.mean,
+            "variance": self.moments.variance,
+            "std_dev": np.sqrt(self.moments.variance),
+            "max": np.nan if empty else self.moments.max,
+            "min": np.nan if empty else self.moments.min
+        }
+        for q in self.quantiles:
+            result[f"{round(q * 100)}th_percentile"] = self.digest.quantile(q)
+        return result
+
+# Estadísticas exactas de una columna que ya está completa en memoria (los mismos valores
+# que Series.mean, var, std y quantile); mismo summary() que StreamingStats para statsTable
+class ExactStats:
+    def __init__(self, values, quantiles=QUANTILES):
+        self.values = pd.Series(values)
+        self.quantiles = quantiles
+
+    def summary(self):
+        values = self.values
+        result = {
+            "mean": values.mean(),
+            "variance": values.var(),
+            "std_dev": values.std(),
+            "max": values.max(),
+            "min": values.min()
+        }
+        for q in self.quantiles:
+            result[f"{round(q * 100)}th_percentile"] = values.quantile(q)
+        return result
+
+# Tabla de estadísticas del reporte: una columna por cada StreamingStats o ExactStats
+def statsTable(columns):
+    table = {"Statistic": list(STAT_LABELS)}
+    for name, stats in columns.items():
+        summary = stats.summary()
+        table[name] = [summary[key] for key in STAT_LABELS.values()]
+    return pd.DataFrame(table)
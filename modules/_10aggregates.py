@@ -0,0 +1,183 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from ._08stations import encodeRoutes, routeLabels
+from ._09statistics import DEFAULT_COMPRESSION, StreamingStats, statsTable
+
+TOP_ROUTES = 10
+# Carpeta de agregados: {AGGREGATES_DIR}/{YYYY-MM}/ con rutas, estaciones, estadísticas y muestra
+AGGREGATES_DIR = "data/aggregates"
+# Viajes que se guardan por mes para los gráficos de distribución
+SAMPLE_SIZE = 20_000
+
+ROUTE_KEYS = ["start_station_name", "end_station_name"]
+ROUTE_SUMS = {"trip_count": "sum", "duration_sum": "sum", "duration_sq_sum": "sum", "distance_km": "max"}
+STATION_SUMS = {"latitude": "first", "longitude": "first", "departures": "sum", "arrivals": "sum",
+                "duration_sum": "sum", "duration_sq_sum": "sum"}
+STATION_COUNTS = {"departures": "int64", "arrivals": "int64"}
+
+# Agregados por ruta en una sola pasada: viajes, suma de duraciones y distancia
+def routeAggregates(data):
+    return data.groupby("route_code", sort=False).agg(
+        trip_count=("duration", "size"),
+        duration_sum=("duration", "sum"),
+        distance_km=("distance_km", "max")
+    ).drop(-1, errors="ignore")
+
+# Tablas del reporte a partir de los agregados: selección parcial con nlargest en lugar de ordenar
+# todos los viajes. Los empates se resuelven por (origen, destino) ordenando los códigos de ruta,
+# así las tablas no dependen del orden en que se combinaron bloques, meses o particiones.
+def topRoutes(aggregates, stations, n=TOP_ROUTES):
+    aggregates = aggregates.sort_index()
+    aggregates = aggregates.assign(avg_duration=aggregates["duration_sum"] / aggregates["trip_count"])
+
+    def table(column, *columns):
+        top = aggregates.nlargest(n, column)
+        result = {"route": routeLabels(top.index, stations)}
+        for name in (column,) + columns:
+            result[name] = top[name].to_numpy()
+        return pd.DataFrame(result)
+
+    most_popular_routes = table("trip_count").rename(columns={"trip_count": "count"})
+    distance_between_routes = table("distance_km")
+    longest_duration_routes = table("avg_duration", "trip_count")
+    return most_popular_routes, distance_between_routes, longest_duration_routes
+
+# Muestra uniforme de la unión de varias muestras: cada una aporta según la cantidad
+# de viajes que representa (hipergeométrica multivariada), con semilla fija
+def mergeSamples(samples, populations, size=SAMPLE_SIZE, seed=0):
+    populations = np.asarray(populations, dtype=np.int64)
+    size = min(size, int(populations.sum()))
+    if size == 0:
+        return samples[0].iloc[0:0]
+    rng = np.random.default_rng(seed)
+    counts = rng.multivariate_hypergeometric(populations, size)
+    parts = [sample.sample(n=int(count), random_state=seed) for sample, count in zip(samples, counts) if count]
+    return pd.concat(parts, ignore_index=True)
+
+# Agregados combinables de un conjunto de viajes (un mes o la unión de varios):
+# - routes: por (origen, destino) viajes, suma y suma de cuadrados de la duración y distancia
+# - stations: por estación coordenadas, salidas, llegadas y duración de los viajes que salen
+# - duration/distance: StreamingStats (momentos + t-digest)
+# - sample: muestra acotada de viajes (duración y distancia) para los gráficos
+class TripAggregates:
+    def __init__(self, routes, stations, duration, distance, sample, population):
+        self.routes = routes
+        self.stations = stations
+        self.duration = duration
+        self.distance = distance
+        self.sample = sample
+        self.population = population
+
+    # Espera los viajes ya filtrados y con la columna distance_km
+    @classmethod
+    def fromTrips(cls, data, compression=DEFAULT_COMPRESSION, sampleSize=SAMPLE_SIZE, seed=0):
+        data = data.assign(duration_sq=data["duration"].astype(np.float64) ** 2)
+        routes = data.groupby(ROUTE_KEYS, observed=True, sort=False).agg(
+            trip_count=("duration", "size"),
+            duration_sum=("duration", "sum"),
+            duration_sq_sum=("duration_sq", "sum"),
+            distance_km=("distance_km", "max")
+        )
+        routes.index = pd.MultiIndex.from_arrays([routes.index.get_level_values(level).astype(str) for level in (0, 1)], names=ROUTE_KEYS)
+
+        departures = data.groupby("start_station_name", observed=True).agg(
+            latitude=("start_station_latitude", "first"),
+            longitude=("start_station_longitude", "first"),
+            departures=("duration", "size"),
+            duration_sum=("duration", "sum"),
+            duration_sq_sum=("duration_sq", "sum")
+        )
+        arrivals = data.groupby("end_station_name", observed=True).agg(
+            latitude=("end_station_latitude", "first"),
+            longitude=("end_station_longitude", "first"),
+            arrivals=("duration", "size")
+        )
+        for side in (departures, arrivals):
+            side.index = side.index.astype(str).rename("station_name")
+        stations = pd.concat([departures, arrivals]).groupby(level=0).agg(STATION_SUMS).astype(STATION_COUNTS)
+
+        sample = data[["duration", "distance_km"]]
+        sample = sample.sample(n=min(sampleSize, len(sample)), random_state=seed).reset_index(drop=True)
+        return cls(
+            routes=routes,
+            stations=stations,
+            duration=StreamingStats(compression).update(data["duration"]),
+            distance=StreamingStats(compression).update(data["distance_km"]),
+            sample=sample,
+            population=len(data)
+        )
+
+    def merge(self, other, sampleSize=SAMPLE_SIZE, seed=0):
+        self.routes = pd.concat([self.routes, other.routes]).groupby(level=[0, 1], sort=False).agg(ROUTE_SUMS)
+        self.stations = pd.concat([self.stations, other.stations]).groupby(level=0).agg(STATION_SUMS)
+        self.duration.merge(other.duration)
+        self.distance.merge(other.distance)
+        self.sample = mergeSamples([self.sample, other.sample], [self.population, other.population], sampleSize, seed)
+        self.population += other.population
+        return self
+
+    # Registro de estaciones con las columnas que usa el mapa del reporte
+    def stationRegistry(self):
+        names = self.stations.index.to_numpy()
+        return pd.DataFrame({
+            "station_id": names,
+            "station_name": names,
+            "latitude": self.stations["latitude"].to_numpy(),
+            "longitude": self.stations["longitude"].to_numpy()
+        })
+
+    # Mismas claves que Analytics.AnalizeData; "data" es la muestra de viajes
+    def analizedData(self, n=TOP_ROUTES):
+        routes, stations = encodeRoutes(self.routes.index.to_frame(index=False))
+        most_popular_routes, distance_between_routes, longest_duration_routes = topRoutes(self.routes.set_axis(routes), stations, n)
+        return {
+            "data": self.sample,
+            "most_popular_routes": most_popular_routes,
+            "distance_between_routes": distance_between_routes,
+            "longest_duration_routes": longest_duration_routes,
+            "stats": statsTable({"Duration": self.duration, "Distance (km)": self.distance}),
+            "stations": self.stationRegistry()
+        }
+
+    def save(self, folder, meta=None):
+        os.makedirs(folder, exist_ok=True)
+        summaryPath = os.path.join(folder, "summary.json")
+        if os.path.exists(summaryPath):
+            os.remove(summaryPath)
+        self.routes.reset_index().to_parquet(os.path.join(folder, "routes.parquet"), index=False)
+        self.stations.reset_index().to_parquet(os.path.join(folder, "stations.parquet"), index=False)
+        self.sample.to_parquet(os.path.join(folder, "sample.parquet"), index=False)
+        summary = {
+            "meta": meta or {},
+            "population": self.population,
+            "duration": self.duration.toDict(),
+            "distance": self.distance.toDict()
+        }
+        # summary.json se escribe al final: si existe, el resto de los archivos está completo
+        with open(summaryPath + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        os.replace(summaryPath + ".tmp", summaryPath)
+
+    # Metadatos guardados junto a los agregados, o None si no hay agregados en la carpeta
+    @staticmethod
+    def savedMeta(folder):
+        try:
+            with open(os.path.join(folder, "summary.json"), encoding="utf-8") as f:
+                return json.load(f)["meta"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def load(cls, folder):
+        with open(os.path.join(folder, "summary.json"), encoding="utf-8") as f:
+            summary = json.load(f)
+        return cls(
+            routes=pd.read_parquet(os.path.join(folder, "routes.parquet")).set_index(ROUTE_KEYS),
+            stations=pd.read_parquet(os.path.join(folder, "stations.parquet")).set_index("station_name"),
+            duration=StreamingStats.fromDict(summary["duration"]),
+            distance=StreamingStats.fromDict(summary["distance"]),
+            sample=pd.read_parquet(os.path.join(folder, "sample.parquet")),
+            population=summary["population"]
+        )
@@ -0,0 +1,87 @@
+import pandas as pd
+import pyarrow as pa
+from ._05distance import stationKeyColumns
+from ._06storage import COORDINATE_COLUMNS, DURATION_COLUMN
+from ._08stations import encodeRoutes, stationRegistry
+from ._09statistics import ExactStats, statsTable
+from ._10aggregates import ROUTE_KEYS, topRoutes
+
+ENGINES = ("pandas", "polars")
+
+# Polars es opcional y solo lo necesita Analytics(engine="polars"): se importa al usarlo
+def _polars():
+    try:
+        import polars
+    except ImportError:
+        raise ImportError("El motor 'polars' requiere el paquete polars (pip install polars).")
+    return polars
+
+# LazyFrame de los viajes: scan del archivo (parquet, feather o csv) o los datos ya en memoria
+def scanTrips(source):
+    pl = _polars()
+    if isinstance(source, pd.DataFrame):
+        return pl.from_pandas(source).lazy()
+    if isinstance(source, pa.Table):
+        return pl.from_arrow(source).lazy()
+    if source.endswith(".parquet"):
+        return pl.scan_parquet(source)
+    if source.endswith(".feather"):
+        return pl.scan_ipc(source)
+    if source.endswith(".csv"):
+        return pl.scan_csv(source)
+    raise ValueError(f"Formato no soportado por el motor polars: {source}")
+
+# Plan perezoso equivalente a AnalizeData: filtro → distancia por par de estaciones →
+# agregados por ruta → top N. El motor lee solo las columnas del plan y paraleliza los
+# group_by; pandas solo recibe los pares de estaciones, los agregados por ruta y las
+# dos columnas de las estadísticas.
+def analizeLazy(source, distanceCache, precision="vincenty"):
+    pl = _polars()
+    trips = scanTrips(source)
+    schema = trips.collect_schema()
+    keys = stationKeyColumns(pd.DataFrame(columns=schema.names()))
+    durationType = pl.Int64 if schema[DURATION_COLUMN].is_integer() else pl.Float64
+    columns = list(dict.fromkeys(ROUTE_KEYS + keys + COORDINATE_COLUMNS + [DURATION_COLUMN]))
+    trips = trips.select(
+        *(pl.col(column).cast(pl.String) for column in dict.fromkeys(ROUTE_KEYS + keys)),
+        *(pl.col(column).cast(pl.Float32) for column in COORDINATE_COLUMNS),
+        pl.col(DURATION_COLUMN).cast(durationType)
+    ).filter(pl.col("start_station_name").ne_missing(pl.col("end_station_name")))
+
+    # Un registro por par de estaciones y coordenadas (una estación movida entre meses es otro par):
+    # distancias y estaciones del mapa
+    pairKeys = keys + COORDINATE_COLUMNS
+    pairs = trips.group_by(pairKeys, maintain_order=True).agg(
+        pl.col(column).first() for column in columns if column not in pairKeys and column != DURATION_COLUMN
+    ).collect().to_pandas()
+    if len(pairs) == 0:
+        raise ValueError("No hay viajes para analizar.")
+    pairs["distance_km"] = distanceCache.resolve(pairs, mode=precision)
+    distances = pl.from_pandas(pairs[pairKeys + ["distance_km"]]).lazy()
+    trips = trips.join(distances, on=pairKeys, how="left", nulls_equal=True)
+
+    routes, values = pl.collect_all([
+        trips.group_by(ROUTE_KEYS).agg(
+            trip_count=pl.len().cast(pl.Int64),
+            duration_sum=pl.col(DURATION_COLUMN).sum(),
+            distance_km=pl.col("distance_km").max()
+        ),
+        trips.select(DURATION_COLUMN, "distance_km")
+    ])
+    routes = routes.to_pandas()
+    codes, stations = encodeRoutes(routes)
+    routes = routes.drop(columns=ROUTE_KEYS).set_axis(codes)
+    most_popular_routes, distance_between_routes, longest_duration_routes = topRoutes(routes.drop(-1, errors="ignore"), stations)
+
+    # Los valores ya están en memoria: estadísticas exactas, igual que el motor pandas
+    data = values.to_pandas()
+    duration_stats = ExactStats(data[DURATION_COLUMN])
+    distance_stats = ExactStats(data["distance_km"])
+    return {
+        "data": data,
+        "most_popular_routes": most_popular_routes,
+        "distance_between_routes": distance_between_routes,
+        "longest_duration_routes": longest_duration_routes,
+        "stats": statsTable({"Duration": duration_stats, "Distance (km)": distance_stats}),
+        "stations": stationRegistry(pairs)
+    }
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# resource no existe en Windows: ahí no se informa la memoria máxima del proceso
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SERVICE_NAME = "bikes-report"
+
+# Memoria máxima (RSS) del proceso hasta ahora, en MB; ru_maxrss está en KB en Linux y en bytes en macOS
+def peakRssMb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def _otlpValue(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+# Span en el formato OTLP/JSON (una ExportTraceServiceRequest por línea, como el file exporter del collector)
+def otlpSpan(record):
+    attributes = {key: value for key, value in record.items()
+                  if key not in ("stage", "trace_id", "span_id", "parent_id", "start_ns", "end_ns") and value is not None}
+    span = {
+        "traceId": record["trace_id"],
+        "spanId": record["span_id"],
+        "name": record["stage"],
+        "kind": 1,
+        "startTimeUnixNano": str(record["start_ns"]),
+        "endTimeUnixNano": str(record["end_ns"]),
+        "attributes": [{"key": key, "value": _otlpValue(value)} for key, value in attributes.items()]
+    }
+    if record["parent_id"]:
+        span["parentSpanId"] = record["parent_id"]
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "modules"}, "spans": [span]}]
+    }]}
+
+# Mediciones por etapa: tiempo de pared, tiempo de CPU, memoria máxima del proceso, pico de
+# tracemalloc (opcional, agrega sobrecosto) y filas procesadas. Sin configurar no registra nada.
+# Cada etapa se escribe como una línea JSON en logPath y, con spanPath, como span OTLP/JSON.
+class Metrics:
+    def __init__(self, logPath=None, spanPath=None, traceMemory=False):
+        self.logPath = logPath
+        self.spanPath = spanPath
+        self.traceMemory = traceMemory
+        self.records = []
+        # Objetos con enterStage(record) y exitStage(record), por ejemplo StageProfiler
+        self.listeners = []
+        self.enabled = False
+        self._tracing = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, logPath=None, spanPath=None, traceMemory=False, enabled=True):
+        self.logPath = logPath
+        self.spanPath = spanPath
+        self.traceMemory = traceMemory
+        self.enabled = enabled
+        self.records = []
+        # tracemalloc se detiene solo si lo inició esta instancia
+        if traceMemory and enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        elif not (traceMemory and enabled) and self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        return self
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    # Uso: with metrics.stage("analytics.load") as span: ...; span["rows"] = len(data)
+    @contextmanager
+    def stage(self, name, **attributes):
+        if not self.enabled:
+            yield {}
+            return
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        record = {
+            "stage": name,
+            "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+            "span_id": os.urandom(8).hex(),
+            "parent_id": parent["span_id"] if parent else None,
+            "rows": None,
+            **attributes
+        }
+        tracing = self.traceMemory and tracemalloc.is_tracing()
+        if tracing:
+            # El pico de la etapa padre hasta aquí no se pierde al reiniciar el contador
+            if parent:
+                parent["_peak"] = max(parent.get("_peak", 0), tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            record["_peak"] = 0
+        stack.append(record)
+        for listener in self.listeners:
+            listener.enterStage(record)
+        record["start_ns"] = time.time_ns()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"] = time.process_time() - cpu
+            record["end_ns"] = time.time_ns()
+            record["peak_rss_mb"] = peakRssMb()
+            if tracing:
+                peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                record["tracemalloc_peak_mb"] = peak / 2**20
+                if parent:
+                    parent["_peak"] = max(parent.get("_peak", 0), peak)
+            for listener in self.listeners:
+                listener.exitStage(record)
+            stack.pop()
+            self._emit(record)
+
+    def _emit(self, record):
+        line = {key: value for key, value in record.items() if key not in ("start_ns", "end_ns")}
+        line["start"] = record["start_ns"] / 1e9
+        with self._lock:
+            self.records.append(line)
+            if self.logPath:
+                with open(self.logPath, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(line) + "\n")
+            if self.spanPath:
+                with open(self.spanPath, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(otlpSpan(record)) + "\n")
+
+# Instancia compartida por getData, Analytics y report
+metrics = Metrics()
+
+def configureMetrics(logPath=None, spanPath=None, traceMemory=False):
+    return metrics.configure(logPath, spanPath, traceMemory)
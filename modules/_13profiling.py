@@ -0,0 +1,112 @@
+import os
+import sys
+import cProfile
+import threading
+from collections import Counter
+from ._12metrics import metrics
+
+ROOT_STAGE = "main"
+SAMPLE_INTERVAL = 0.005
+
+def _frameName(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+# Perfila el pipeline por etapa (las mismas de modules._12metrics: descarga, interpretación,
+# análisis, cada gráfico, PDF). Por cada etapa escribe en outputDir:
+# - {etapa}.pstats: cProfile con el tiempo exclusivo de la etapa (las etapas hijas tienen su propio archivo)
+# - {etapa}.collapsed: pilas muestreadas cada interval segundos en formato "a;b;c cuenta" para flamegraph.pl o speedscope
+# y pipeline.collapsed con todas las muestras bajo la ruta de etapas (main;run;analytics;analytics.prepare;...).
+# Solo se perfila el hilo que crea el perfilador.
+class StageProfiler:
+    def __init__(self, outputDir, interval=SAMPLE_INTERVAL, sampling=True):
+        self.outputDir = outputDir
+        self.interval = interval
+        self.sampling = sampling
+        self.profiles = {}
+        self.samples = Counter()
+        self.stages = (ROOT_STAGE,)
+        self._threadId = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._wasEnabled = None
+
+    def _switch(self, previous, current):
+        self.profiles[previous].disable()
+        self.profiles.setdefault(current, cProfile.Profile()).enable()
+
+    def enterStage(self, record):
+        if threading.get_ident() != self._threadId:
+            return
+        previous = self.stages[-1]
+        self.stages = self.stages + (record["stage"],)
+        self._switch(previous, record["stage"])
+
+    def exitStage(self, record):
+        if threading.get_ident() != self._threadId or self.stages[-1] != record["stage"]:
+            return
+        self.stages = self.stages[:-1]
+        self._switch(record["stage"], self.stages[-1])
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._threadId)
+            stages = self.stages
+            stack = []
+            while frame is not None:
+                stack.append(_frameName(frame))
+                frame = frame.f_back
+            self.samples[(stages, ";".join(reversed(stack)))] += 1
+
+    def start(self):
+        os.makedirs(self.outputDir, exist_ok=True)
+        self._threadId = threading.get_ident()
+        # Las etapas se anuncian a través de metrics: se activa (sin archivos) si no lo estaba
+        self._wasEnabled = metrics.enabled
+        if not metrics.enabled:
+            metrics.configure()
+        metrics.listeners.append(self)
+        if self.sampling:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        self.profiles.setdefault(ROOT_STAGE, cProfile.Profile()).enable()
+        return self
+
+    def stop(self):
+        self.profiles[self.stages[-1]].disable()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        metrics.listeners.remove(self)
+        if not self._wasEnabled:
+            metrics.configure(enabled=False)
+        return self.save()
+
+    # Escribe los archivos y retorna el tiempo exclusivo de cada etapa según cProfile
+    def save(self):
+        totals = {}
+        for stage, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(self.outputDir, f"{stage}.pstats"))
+            totals[stage] = sum(entry.inlinetime for entry in profile.getstats())
+
+        byStage = {}
+        for (stages, stack), count in self.samples.items():
+            byStage.setdefault(stages[-1], Counter())[stack] += count
+        for stage, stacks in byStage.items():
+            with open(os.path.join(self.outputDir, f"{stage}.collapsed"), "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        with open(os.path.join(self.outputDir, "pipeline.collapsed"), "w", encoding="utf-8") as f:
+            f.writelines(f"{';'.join(stages)};{stack} {count}\n" for (stages, stack), count in self.samples.most_common())
+        return totals
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        totals = self.stop()
+        print(f"Perfiles por etapa guardados en {self.outputDir}:")
+        for stage, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+            print(f"  {stage:<40} {seconds:8.2f} s")
+        return False
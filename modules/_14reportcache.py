@@ -0,0 +1,136 @@
+import os
+import types
+import hashlib
+import pandas as pd
+
+# Caché de reportes direccionada por contenido: cada gráfico PNG y cada PDF se guarda con la
+# huella (sha256) de los datos y parámetros que lo producen, así pedir el mismo mes otra vez
+# no vuelve a dibujar ni a armar nada. Al superar maxMb se borran los archivos usados hace más tiempo.
+REPORT_CACHE_DIR = "data/cache/report"
+REPORT_CACHE_MB = 256
+# Subirlo al cambiar el diseño del PDF o algo que la huella no ve (por ejemplo una versión de matplotlib)
+CACHE_VERSION = 1
+
+_PLAIN = (bool, int, float, complex, str, bytes, type(None))
+
+# Valores simples con repr estable entre ejecuciones (constantes de módulo como SCATTER_THRESHOLD)
+def _plain(value):
+    if isinstance(value, _PLAIN):
+        return True
+    if isinstance(value, (tuple, list)):
+        return all(_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(_plain(key) and _plain(item) for key, item in value.items())
+    return False
+
+def _updateCode(digest, code, function, seen):
+    constants = tuple(constant for constant in code.co_consts if not isinstance(constant, types.CodeType))
+    digest.update(code.co_code)
+    digest.update(repr(constants).encode())
+    package = function.__module__.split(".")[0]
+    for name in code.co_names:
+        if name not in function.__globals__:
+            continue
+        value = function.__globals__[name]
+        # Funciones del proyecto que usa (figure_to_buffer, addCachedBasemap) y constantes de módulo
+        if isinstance(value, types.FunctionType) and value.__module__.split(".")[0] == package:
+            digest.update(name.encode())
+            _update(digest, value, seen)
+        elif _plain(value):
+            digest.update(f"{name}={value!r}".encode())
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            _updateCode(digest, constant, function, seen)
+
+# El código de la función, sus valores por defecto, su clausura y las funciones y constantes
+# globales que lee entran en la huella: al modificar un gráfico se invalida solo ese gráfico
+def _updateFunction(digest, function, seen):
+    if function in seen:
+        return
+    seen.add(function)
+    digest.update(f"{function.__module__}.{function.__qualname__}".encode())
+    _update(digest, function.__defaults__, seen)
+    _update(digest, function.__kwdefaults__, seen)
+    for cell in function.__closure__ or ():
+        try:
+            _update(digest, cell.cell_contents, seen)
+        except ValueError:
+            pass  # Celda aún sin valor
+    _updateCode(digest, function.__code__, function, seen)
+
+def _update(digest, value, seen=None):
+    seen = set() if seen is None else seen
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(("DataFrame", list(value.columns), [str(dtype) for dtype in value.dtypes], value.shape)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(repr(("Series", value.name, str(value.dtype), len(value))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            _update(digest, key, seen)
+            _update(digest, value[key], seen)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _update(digest, item, seen)
+    elif isinstance(value, types.FunctionType):
+        _updateFunction(digest, value, seen)
+    else:
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+
+# Huella de cualquier combinación de DataFrames, Series, funciones, dict, listas y escalares
+def fingerprint(*values):
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for value in values:
+        _update(digest, value)
+    return digest.hexdigest()
+
+class ReportCache:
+    def __init__(self, path=REPORT_CACHE_DIR, maxMb=REPORT_CACHE_MB):
+        self.path = path
+        self.maxBytes = int(maxMb * 2**20)
+
+    def _file(self, key, extension):
+        return os.path.join(self.path, f"{key}.{extension}")
+
+    # Retorna los bytes guardados o None; cada lectura renueva la fecha de uso del archivo (LRU)
+    def get(self, key, extension):
+        path = self._file(key, extension)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def put(self, key, extension, content):
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(key, extension)
+        # Escritura atómica: otro proceso nunca lee un archivo a medio escribir
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(content)
+        os.replace(temporary, path)
+        self.evict()
+
+    # Borra los archivos usados hace más tiempo hasta quedar bajo maxBytes; retorna cuántos borró
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -1,5 +1,24 @@
-from ._00spinner import spinner
-from ._01authentication import Authentication
-from ._02request import getData
-from ._03analytics import Analytics
-from ._04report import report
+import importlib
+
+# Carga perezosa (PEP 562): cada submódulo se importa la primera vez que se usa su nombre,
+# así autenticarse o descargar datos no carga matplotlib, geopandas ni reportlab
+_EXPORTS = {
+    "spinner": "._00spinner",
+    "Authentication": "._01authentication",
+    "getData": "._02request",
+    "getDataRange": "._02request",
+    "Analytics": "._03analytics",
+    "report": "._04report",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
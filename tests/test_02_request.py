@@ -1,9 +1,13 @@
 import pytest
 import pandas as pd
+import pyarrow.parquet as pq
 import json
 import os
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
-from modules._02request import getData
+from modules._02request import getData, getDataRange, iterJsonArray, monthRange, monthUrl
 import allure
 from allure_commons.types import Severity
 
@@ -18,7 +22,7 @@ def temp_dir(tmp_path):
 # Test para verificar que getData maneja correctamente una respuesta exitosa
 @allure.feature("Data Request System")
 @allure.title("Test Successful Data Retrieval")
-@allure.description("Verifica que la función getData obtiene datos correctamente de una respuesta HTTP exitosa, guarda los datos en un archivo Excel y devuelve True.")
+@allure.description("Verifica que la función getData obtiene datos correctamente de una respuesta HTTP exitosa, guarda los datos en un archivo Parquet y devuelve True.")
 @allure.tag("request", "unit", "positive")
 @allure.severity(Severity.CRITICAL)
 def test_successful_response(temp_dir): 
@@ -30,17 +34,17 @@ def test_successful_response(temp_dir):
         response = getData("https://ejemplo.com/api/data", str(temp_dir))
         assert response == True
         
-        excel_file = temp_dir / "data.xlsx"
-        assert excel_file.exists()
+        data_file = temp_dir / "data.parquet"
+        assert data_file.exists()
         
-        df = pd.read_excel(excel_file)
-        assert len(df) == 10000
+        df = pd.read_parquet(data_file)
+        assert len(df) == 15000  # Sin límite se guardan todos los registros
         assert list(df.columns) == ["id", "name", "value"]
 
 # Test para verificar que getData maneja correctamente una respuesta con error
 @allure.feature("Data Request System")
 @allure.title("Test Error Response Handling")
-@allure.description("Verifica que la función getData maneja correctamente una respuesta HTTP con error (código 404), devuelve False y no crea un archivo Excel.")
+@allure.description("Verifica que la función getData maneja correctamente una respuesta HTTP con error (código 404), devuelve False y no crea un archivo Parquet.")
 @allure.tag("request", "unit", "negative")
 @allure.severity(Severity.NORMAL)
 def test_error_response(temp_dir):
@@ -50,13 +54,13 @@ def test_error_response(temp_dir):
         response = getData("https://example.com/api/data", str(temp_dir))
 
         assert response == False
-        excel_file = temp_dir / "data.xlsx"
-        assert not excel_file.exists()
+        data_file = temp_dir / "data.parquet"
+        assert not data_file.exists()
 
 # Test para verificar que getData maneja correctamente datos JSON inválidos
 @allure.feature("Data Request System")
 @allure.title("Test Invalid JSON Handling")
-@allure.description("Verifica que la función getData maneja correctamente una respuesta con datos JSON inválidos, devuelve False y no crea un archivo Excel.")
+@allure.description("Verifica que la función getData maneja correctamente una respuesta con datos JSON inválidos, devuelve False y no crea un archivo Parquet.")
 @allure.tag("request", "unit", "negative")
 @allure.severity(Severity.NORMAL)
 def test_invalid_json(temp_dir):
@@ -67,26 +71,26 @@ def test_invalid_json(temp_dir):
     with patch("modules._02request.requests.get", return_value=mock_response):
         response = getData("https://example.com/api/data", str(temp_dir))
         assert response == False
-        excel_file = temp_dir / "data.xlsx"
-        assert not excel_file.exists()
+        data_file = temp_dir / "data.parquet"
+        assert not data_file.exists()
 
 # Test para verificar si el código maneja errores de conexión 
 @allure.feature("Data Request System")
 @allure.title("Test Connection Error Handling")
-@allure.description("Verifica que la función getData maneja correctamente errores de conexión, devuelve False y no crea un archivo Excel.")
+@allure.description("Verifica que la función getData maneja correctamente errores de conexión, devuelve False y no crea un archivo Parquet.")
 @allure.tag("request", "unit", "negative")
 @allure.severity(Severity.NORMAL)
 def test_connection_error(temp_dir):
     with patch("modules._02request.requests.get", side_effect=Exception("Connection error")):
         response = getData("https://example.com/api/data", str(temp_dir))
         assert response == False
-        excel_file = temp_dir / "data.xlsx"
-        assert not excel_file.exists()
+        data_file = temp_dir / "data.parquet"
+        assert not data_file.exists()
 
 # Test para verificar que getData maneja correctamente errores de escritura de archivo
 @allure.feature("Data Request System")
 @allure.title("Test File Write Error Handling")
-@allure.description("Verifica que la función getData maneja correctamente errores de escritura de archivo (por ejemplo, directorio de solo lectura), devuelve False y no crea un archivo Excel.")
+@allure.description("Verifica que la función getData maneja correctamente errores de escritura de archivo (por ejemplo, directorio de solo lectura), devuelve False y no crea un archivo Parquet.")
 @allure.tag("request", "unit", "edge")
 @allure.severity(Severity.MINOR)
 def test_file_write_error(temp_dir):
@@ -108,9 +112,262 @@ def test_file_write_error(temp_dir):
         # Verificar que la función retorna False
         assert result == False
         
-        # Verificar que no se creó el archivo Excel
-        excel_file = read_only_dir / "data.xlsx"
-        assert not excel_file.exists()
+        # Verificar que no se creó el archivo Parquet
+        data_file = read_only_dir / "data.parquet"
+        assert not data_file.exists()
     
     # Restaurar permisos para evitar problemas con otros tests
-    os.chmod(read_only_dir, 0o755)
\ No newline at end of file
+    os.chmod(read_only_dir, 0o755)
+
+# Función auxiliar que parte un documento JSON en bloques de bytes de tamaño fijo
+def to_chunks(payload, size):
+    raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+# Test para verificar que el límite de filas es configurable
+@allure.feature("Data Request System")
+@allure.title("Test Configurable Row Limit")
+@allure.description("Verifica que getData guarda solo las primeras filas cuando se indica el parámetro limit.")
+@allure.tag("request", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_row_limit(temp_dir):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = data
+
+    with patch("modules._02request.requests.get", return_value=mock_response):
+        assert getData("https://ejemplo.com/api/data", str(temp_dir), limit=10000) == True
+    assert len(pd.read_parquet(temp_dir / "data.parquet")) == 10000
+
+# Test para verificar el parser JSON incremental con bloques que cortan registros y caracteres
+@allure.feature("Data Request System")
+@allure.title("Test Incremental JSON Parser")
+@allure.description("Verifica que iterJsonArray reconstruye todos los registros aunque los bloques corten objetos y caracteres UTF-8 multibyte.")
+@allure.tag("request", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_incremental_parser(size):
+    payload = [{"id": i, "name": f"Stasjon Ø {i}", "value": i / 3, "small": -i * 1e-7,
+                "active": i % 2 == 0, "note": None} for i in range(50)]
+    assert list(iterJsonArray(to_chunks(payload, size))) == payload
+
+# Test para verificar que el parser rechaza documentos inválidos o incompletos
+@allure.feature("Data Request System")
+@allure.title("Test Incremental JSON Parser Invalid Input")
+@allure.description("Verifica que iterJsonArray lanza ValueError si el documento no es un arreglo de objetos o está truncado.")
+@allure.tag("request", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+@pytest.mark.parametrize("raw", [b'"estructura de datos invalida"', b'[1, 2, 3]', b'[{"id": 1}, {"id": 2',
+                                 b'[,,{}]', b'[{"id": 1},]', b'[{"id": 1} {"id": 2}]'])
+def test_incremental_parser_invalid(raw):
+    with pytest.raises(ValueError):
+        list(iterJsonArray([raw]))
+
+# Test para verificar que un registro inválido se rechaza sin leer el resto de la respuesta
+@allure.feature("Data Request System")
+@allure.title("Test Incremental JSON Parser Fails Fast")
+@allure.description("Verifica que iterJsonArray lanza ValueError en cuanto llega un registro malformado, sin seguir acumulando los bloques siguientes en memoria.")
+@allure.tag("request", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_incremental_parser_fails_fast():
+    def chunks():
+        yield b'[{"id": 1}, {"id": oops}'
+        raise AssertionError("No debe pedir más bloques después de un registro inválido")
+
+    records = iterJsonArray(chunks())
+    assert next(records) == {"id": 1}
+    with pytest.raises(ValueError):
+        next(records)
+
+# Test para verificar la descarga en modo streaming escrita por lotes
+@allure.feature("Data Request System")
+@allure.title("Test Streaming Ingestion")
+@allure.description("Verifica que getData en modo streaming escribe los registros por lotes en Parquet, respeta el límite de filas y no usa response.json().")
+@allure.tag("request", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_streaming_ingestion(temp_dir):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.iter_content.side_effect = lambda chunk_size: iter(to_chunks(data, 1000))
+
+    with patch("modules._02request.requests.get", return_value=mock_response) as mock_get:
+        assert getData("https://ejemplo.com/api/data", str(temp_dir), stream=True, batchSize=4000) == True
+        assert mock_get.call_args.kwargs["stream"] == True
+        mock_response.json.assert_not_called()
+
+        data_file = temp_dir / "data.parquet"
+        assert len(pd.read_parquet(data_file)) == 15000
+        assert pq.ParquetFile(data_file).num_row_groups == 4
+
+        assert getData("https://ejemplo.com/api/data", str(temp_dir), stream=True, limit=500) == True
+        assert len(pd.read_parquet(data_file)) == 500
+
+# Test para verificar que un streaming inválido no deja archivos parciales
+@allure.feature("Data Request System")
+@allure.title("Test Streaming Invalid JSON Handling")
+@allure.description("Verifica que getData en modo streaming devuelve False y elimina el archivo parcial cuando el JSON está truncado.")
+@allure.tag("request", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_streaming_invalid_json(temp_dir):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.iter_content.return_value = iter(to_chunks(data, 1000)[:-3])
+
+    with patch("modules._02request.requests.get", return_value=mock_response):
+        assert getData("https://ejemplo.com/api/data", str(temp_dir), stream=True, batchSize=1000) == False
+    assert not (temp_dir / "data.parquet").exists()
+
+
+# Servidor HTTP local que simula data.urbansharing.com para las descargas mensuales
+class TripsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.clients.add(self.client_address)
+            failures = server.failures.get(self.path, 0)
+            if failures:
+                server.failures[self.path] = failures - 1
+
+        server.conditional.append(self.headers.get("If-None-Match"))
+        etag = None
+        if self.path not in server.files or failures:
+            status, body = (503 if failures else 404), b"{}"
+        else:
+            status, body = 200, server.files[self.path]
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def trips_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TripsHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.clients = set()
+    server.failures = {}
+    server.conditional = []
+    server.files = {
+        f"/trips/v1/2024/{month:02d}.json": json.dumps(data[:month * 10]).encode()
+        for month in range(1, 13)
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+# Test para verificar la construcción de URLs y rangos de meses
+@allure.feature("Data Request System")
+@allure.title("Test Month Range And URLs")
+@allure.description("Verifica que monthRange genera los meses de un rango que cruza años y que monthUrl construye la URL mensual del servicio.")
+@allure.tag("request", "unit", "positive")
+@allure.severity(Severity.MINOR)
+def test_month_range_and_urls():
+    assert monthRange("2023-11", "2024-02") == ["2023-11", "2023-12", "2024-01", "2024-02"]
+    assert monthUrl("2024-09") == "https://data.urbansharing.com/bergenbysykkel.no/trips/v1/2024/09.json"
+    with pytest.raises(ValueError):
+        monthRange("2024-05", "2024-01")
+
+# Test para verificar la descarga concurrente de un año contra un servidor local
+@allure.feature("Data Request System")
+@allure.title("Test Parallel Multi-Month Download")
+@allure.description("Verifica que getDataRange descarga todos los meses de un rango en paralelo, reutiliza conexiones del pool y reintenta respuestas 503.")
+@allure.tag("request", "integration", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_parallel_month_download(trips_server, temp_dir):
+    base_url = f"http://127.0.0.1:{trips_server.server_port}/trips/v1"
+    trips_server.failures["/trips/v1/2024/03.json"] = 2
+
+    results = getDataRange("2024-01", "2024-12", str(temp_dir), workers=3, baseUrl=base_url, backoff=0)
+
+    assert results == {f"2024-{month:02d}": True for month in range(1, 13)}
+    for month in range(1, 13):
+        df = pd.read_parquet(temp_dir / f"2024-{month:02d}" / "data.parquet")
+        assert len(df) == month * 10
+    assert trips_server.requests.count("/trips/v1/2024/03.json") == 3
+    assert len(trips_server.clients) <= 3
+
+# Test para verificar que un mes inexistente no interrumpe el resto del rango
+@allure.feature("Data Request System")
+@allure.title("Test Multi-Month Download With Missing Month")
+@allure.description("Verifica que getDataRange marca como fallido un mes que responde 404 sin afectar a los demás meses del rango.")
+@allure.tag("request", "integration", "negative")
+@allure.severity(Severity.NORMAL)
+def test_parallel_download_missing_month(trips_server, temp_dir):
+    base_url = f"http://127.0.0.1:{trips_server.server_port}/trips/v1"
+    results = getDataRange("2024-11", "2025-01", str(temp_dir), workers=2, baseUrl=base_url, backoff=0, stream=True)
+
+    assert results == {"2024-11": True, "2024-12": True, "2025-01": False}
+    assert not (temp_dir / "2025-01" / "data.parquet").exists()
+
+
+# Test para verificar la caché de descargas con GET condicional
+@allure.feature("Data Request System")
+@allure.title("Test Conditional Download Cache")
+@allure.description("Verifica que getData envía If-None-Match con el ETag de la descarga anterior, no reescribe el archivo ante un 304 y vuelve a descargar cuando el contenido cambia en el servidor.")
+@allure.tag("request", "integration", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_conditional_download_cache(trips_server, temp_dir):
+    url = f"http://127.0.0.1:{trips_server.server_port}/trips/v1/2024/09.json"
+    data_file = temp_dir / "data.parquet"
+
+    assert getData(url, str(temp_dir)) == True
+    assert trips_server.conditional[-1] is None
+    modified = data_file.stat().st_mtime_ns
+
+    # Sin cambios en el servidor: 304 y el archivo queda intacto
+    with patch("modules._02request.saveData") as mock_save:
+        assert getData(url, str(temp_dir)) == True
+        mock_save.assert_not_called()
+    assert trips_server.conditional[-1] is not None
+    assert data_file.stat().st_mtime_ns == modified
+
+    # Un límite distinto no puede reutilizar el archivo guardado
+    assert getData(url, str(temp_dir), limit=5) == True
+    assert trips_server.conditional[-1] is None
+    assert len(pd.read_parquet(data_file)) == 5
+
+    # Contenido nuevo en el servidor: el ETag ya no coincide y se descarga de nuevo
+    trips_server.files["/trips/v1/2024/09.json"] = json.dumps(data[:3]).encode()
+    assert getData(url, str(temp_dir), limit=5, stream=True) == True
+    assert trips_server.conditional[-1] is not None
+    assert len(pd.read_parquet(data_file)) == 3
+
+    # Con cache=False nunca se envían encabezados condicionales
+    assert getData(url, str(temp_dir), limit=5, cache=False) == True
+    assert trips_server.conditional[-1] is None
+
+# Test para verificar la descarga en memoria sin escribir archivos
+@allure.feature("Data Request System")
+@allure.title("Test In-Memory Download")
+@allure.description("Verifica que getData con path=None y returnData=True devuelve el DataFrame tipado, tanto en modo normal como en streaming, sin escribir archivos en disco.")
+@allure.tag("request", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_in_memory_download(trips_server, temp_dir, monkeypatch):
+    url = f"http://127.0.0.1:{trips_server.server_port}/trips/v1/2024/09.json"
+    monkeypatch.chdir(temp_dir)
+
+    df = getData(url, None, returnData=True)
+    streamed = getData(url, None, stream=True, batchSize=7, returnData=True)
+    assert isinstance(df, pd.DataFrame)
+    assert len(df) == len(streamed) == 90
+    pd.testing.assert_frame_equal(streamed.reset_index(drop=True), df.reset_index(drop=True), check_dtype=False)
+    assert trips_server.conditional[-1] is None
+    assert list(temp_dir.iterdir()) == []
+
+    # Sin carpeta de destino hay que pedir los datos en memoria
+    with pytest.raises(ValueError):
+        getData(url, None)
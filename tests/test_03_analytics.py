@@ -1,7 +1,10 @@
 import pytest
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from unittest.mock import patch
-from modules._03analytics import Analytics
+from modules._03analytics import Analytics, partitionTrips, routeAggregates, topRoutes
+from benchmarks.synthetic import syntheticTrips
 import allure
 from allure_commons.types import Severity
 
@@ -10,6 +13,10 @@ class MockDistance:
     def __init__(self, km):
         self.kilometers = km
 
+# Función auxiliar para simular el motor vectorizado de distancias
+def mock_distance_km(km):
+    return lambda lat1, lon1, lat2, lon2, mode="vincenty": np.full(len(lat1), km)
+
 @pytest.fixture
 def sample_data():
     return pd.DataFrame({
@@ -29,8 +36,8 @@ def sample_data():
 @allure.tag("analytics", "unit", "positive")
 @allure.severity(Severity.CRITICAL)
 def test_analyze_data_normal_case(sample_data):
-    with patch("pandas.read_excel", return_value=sample_data): 
-        with patch("modules._03analytics.geodesic", return_value=MockDistance(1.5)):
+    with patch("pandas.read_parquet", return_value=sample_data): 
+        with patch("modules._05distance.distanceKm", side_effect=mock_distance_km(1.5)):
             analytics = Analytics()
             result = analytics.AnalizeData()
 
@@ -58,7 +65,7 @@ def test_analyze_data_normal_case(sample_data):
 # Test para verificar que el analizador de datos funciona correctamente con un DataFrame vacío
 @allure.feature("Data Analytics System")
 @allure.title("Test Data Analysis with Empty DataFrame")
-@allure.description("Verifica que el método AnalizeData maneja un DataFrame vacío, aunque el módulo no lo procesa correctamente y puede fallar. Debería retornar resultados vacíos.")
+@allure.description("Verifica que el método AnalizeData lanza ValueError con un DataFrame vacío, en lugar de retornar tablas vacías y estadísticas NaN.")
 @allure.tag("analytics", "unit", "negative")
 @allure.severity(Severity.NORMAL)
 def test_analyze_data_empty():
@@ -69,18 +76,11 @@ def test_analyze_data_empty():
         "duration"
     ])
     
-    with patch("pandas.read_excel", return_value=empty_data):
+    with patch("pandas.read_parquet", return_value=empty_data):
         with patch("geopy.distance.geodesic", return_value=MockDistance(0)):
             analytics = Analytics()
-            result = analytics.AnalizeData()
-
-            # Verificar que no hay datos procesados
-            assert len(result["data"]) == 0
-            assert len(result["most_popular_routes"]) == 0
-            assert len(result["distance_between_routes"]) == 0
-            assert len(result["longest_duration_routes"]) == 0
-            # Verificar que stats tiene valores NaN o ceros donde corresponde
-            assert result["stats"]["Duration"].iloc[0].isna()  # Media es NaN
+            with pytest.raises(ValueError, match="No hay viajes para analizar"):
+                analytics.AnalizeData()
 
 # Test para verificar que el analizador de datos maneja correctamente un archivo no encontrado
 @allure.feature("Data Analytics System")
@@ -89,7 +89,7 @@ def test_analyze_data_empty():
 @allure.tag("analytics", "unit", "negative")
 @allure.severity(Severity.NORMAL)
 def test_analyze_data_file_not_found():
-    with patch("pandas.read_excel", side_effect=FileNotFoundError):
+    with patch("pandas.read_parquet", side_effect=FileNotFoundError):
         analytics = Analytics()
         with pytest.raises(FileNotFoundError):
             analytics.AnalizeData()
@@ -106,7 +106,7 @@ def test_analyze_data_missing_columns():
         "other_column": [1, 2, 3]
     })
     
-    with patch("pandas.read_excel", return_value=invalid_data):
+    with patch("pandas.read_parquet", return_value=invalid_data):
         analytics = Analytics()
         with pytest.raises(KeyError):
             analytics.AnalizeData()
@@ -122,7 +122,7 @@ def test_analyze_data_same_stations(sample_data):
         "Station A", "Station A", 60.39, 5.32, 60.39, 5.32, 200
     ]
     
-    with patch("pandas.read_excel", return_value=sample_data):
+    with patch("pandas.read_parquet", return_value=sample_data):
         analytics = Analytics()
         result = analytics.AnalizeData()
   
@@ -130,6 +130,19 @@ def test_analyze_data_same_stations(sample_data):
         assert len(result["data"]) == 10  # Una fila menos
         assert not (result["data"]["start_station_name"] == result["data"]["end_station_name"]).any()
 
+# Test para verificar que todos los modos rechazan igual un mes sin viajes entre estaciones distintas
+@allure.feature("Data Analytics System")
+@allure.title("Test All Modes Reject Only Same-Station Trips")
+@allure.description("Verifica que en memoria, por bloques y en paralelo AnalizeData lanza el mismo ValueError cuando al borrar los viajes a la misma estación no queda ninguno.")
+@allure.tag("analytics", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+@pytest.mark.parametrize("options, chunkSize", [({}, None), ({}, 2), ({"workers": 2}, None)], ids=["memory", "chunks", "parallel"])
+def test_analyze_data_only_same_stations(sample_data, options, chunkSize):
+    trips = sample_data.assign(end_station_name=sample_data["start_station_name"])
+    analytics = Analytics(precision="haversine", **options)
+    with pytest.raises(ValueError, match="No hay viajes para analizar"):
+        analytics.AnalizeData(trips, chunkSize=chunkSize)
+
 # Test para verificar que el analizador de datos maneja correctamente coordenadas inválidas
 @allure.feature("Data Analytics System")
 @allure.title("Test Data Analysis with Invalid Coordinates")
@@ -147,7 +160,139 @@ def test_analyze_data_invalid_coordinates():
         "duration": [300]
     })
     
-    with patch("pandas.read_excel", return_value=invalid_data):
+    with patch("pandas.read_parquet", return_value=invalid_data):
         analytics = Analytics()
         with pytest.raises(ValueError):  # geodesic fallará con None
-            analytics.AnalizeData()
\ No newline at end of file
+            analytics.AnalizeData()
+
+# Test para verificar que las tablas top salen de un único groupby por ruta
+@allure.feature("Data Analytics System")
+@allure.title("Test Fused Route Aggregation")
+@allure.description("Verifica que routeAggregates y topRoutes producen en una sola pasada los viajes, la duración promedio y la distancia por ruta, y que cada top queda ordenado de mayor a menor.")
+@allure.tag("analytics", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_fused_route_aggregation():
+    stations = np.array(["Station A", "Station B", "Station C"], dtype=object)
+    data = pd.DataFrame({
+        "route_code": [1, 1, 1, 5, 5, 6, -1],  # A->B, B->C, C->A y una ruta sin estación
+        "duration": [300, 600, 450, 1200, 1000, 200, 9999],
+        "distance_km": [1.5, 1.5, 1.5, 2.5, 2.5, 3.0, 9.0]
+    })
+    aggregates = routeAggregates(data)
+    assert -1 not in aggregates.index
+    assert aggregates.loc[1, "trip_count"] == 3
+
+    most_popular, distances, durations = topRoutes(aggregates, stations, n=2)
+    assert most_popular["route"].tolist() == ["Station A to Station B", "Station B to Station C"]
+    assert most_popular["count"].tolist() == [3, 2]
+    assert distances["route"].tolist() == ["Station C to Station A", "Station B to Station C"]
+    assert distances["distance_km"].tolist() == [3.0, 2.5]
+    assert durations["route"].iloc[0] == "Station B to Station C"
+    assert durations["avg_duration"].iloc[0] == 1100
+    assert list(durations.columns) == ["route", "avg_duration", "trip_count"]
+
+# Test para verificar que el modo por bloques da los mismos resultados que el modo completo
+@allure.feature("Data Analytics System")
+@allure.title("Test Chunked Analysis Matches Full Analysis")
+@allure.description("Verifica que AnalizeData con chunkSize, procesando el archivo por bloques, produce las mismas tablas de rutas y momentos que la lectura completa.")
+@allure.tag("analytics", "integration", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_analyze_data_chunked(tmp_path, monkeypatch):
+    (tmp_path / "data" / "input").mkdir(parents=True)
+    syntheticTrips(5_000, stations=30).to_parquet(tmp_path / "data" / "input" / "data.parquet", index=False)
+    monkeypatch.chdir(tmp_path)
+
+    full = Analytics(precision="haversine").AnalizeData()
+    chunked = Analytics(precision="haversine").AnalizeData(chunkSize=1_200)
+
+    for key in ("most_popular_routes", "distance_between_routes", "longest_duration_routes"):
+        pd.testing.assert_frame_equal(chunked[key], full[key])
+    pd.testing.assert_frame_equal(chunked["stats"].iloc[:5], full["stats"].iloc[:5], rtol=1e-9)
+    assert len(chunked["data"]) == len(full["data"])
+
+# Test para verificar que el análisis en memoria reporta estadísticas exactas
+@allure.feature("Data Analytics System")
+@allure.title("Test In-Memory Stats Are Exact")
+@allure.description("Verifica que AnalizeData sin chunkSize ni workers calcula la media, varianza y percentiles exactos de pandas (sin aproximar con t-digest), así los reportes de un mes no cambian.")
+@allure.tag("analytics", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_analyze_data_exact_stats():
+    result = Analytics(precision="haversine").AnalizeData(syntheticTrips(20_000, stations=30))
+    data = result["data"]
+    for column, name in (("duration", "Duration"), ("distance_km", "Distance (km)")):
+        values = data[column]
+        expected = [values.mean(), values.var(), values.std(), values.max(), values.min(),
+                    values.quantile(0.25), values.quantile(0.50), values.quantile(0.75)]
+        assert result["stats"][name].tolist() == expected
+
+# Test para verificar que las particiones por estación de origen son disjuntas y completas
+@allure.feature("Data Analytics System")
+@allure.title("Test Trip Partitions By Start Station")
+@allure.description("Verifica que partitionTrips reparte todos los viajes sin repetirlos y que cada estación de origen queda en una sola partición.")
+@allure.tag("analytics", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_partition_trips():
+    trips = syntheticTrips(2_000, stations=40)
+    partitions = partitionTrips(trips, 3)
+    assert sum(len(partition) for partition in partitions) == len(trips)
+    owners = [set(partition["start_station_name"]) for partition in partitions]
+    assert not (owners[0] & owners[1] or owners[0] & owners[2] or owners[1] & owners[2])
+
+# Test para verificar que el modo paralelo es determinista e igual al modo secuencial
+@allure.feature("Data Analytics System")
+@allure.title("Test Parallel Analysis Matches Sequential Analysis")
+@allure.description("Verifica que AnalizeData con varios procesos produce las mismas tablas de rutas y momentos que con un solo proceso.")
+@allure.tag("analytics", "integration", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_analyze_data_parallel(tmp_path, monkeypatch):
+    (tmp_path / "data" / "input").mkdir(parents=True)
+    syntheticTrips(5_000, stations=30).to_parquet(tmp_path / "data" / "input" / "data.parquet", index=False)
+    monkeypatch.chdir(tmp_path)
+
+    sequential = Analytics(precision="haversine").AnalizeData()
+    parallel = Analytics(precision="haversine", workers=2).AnalizeData()
+
+    for key in ("most_popular_routes", "distance_between_routes", "longest_duration_routes"):
+        pd.testing.assert_frame_equal(parallel[key], sequential[key])
+    pd.testing.assert_frame_equal(parallel["stats"].iloc[:5], sequential["stats"].iloc[:5], rtol=1e-9)
+
+# Test para verificar que los datos pueden venir de cualquier ruta o de memoria
+@allure.feature("Data Analytics System")
+@allure.title("Test Analyze Data From Path Or Memory")
+@allure.description("Verifica que AnalizeData produce las mismas tablas leyendo un archivo en una ruta configurable, recibiendo un DataFrame o recibiendo una tabla de Arrow.")
+@allure.tag("analytics", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_analyze_data_sources(tmp_path):
+    trips = syntheticTrips(3_000, stations=20)
+    trips.to_parquet(tmp_path / "trips.parquet", index=False)
+
+    from_file = Analytics(precision="haversine", dataPath=str(tmp_path / "trips.parquet")).AnalizeData()
+    from_frame = Analytics(precision="haversine", dataPath=None).AnalizeData(trips)
+    from_arrow = Analytics(precision="haversine", dataPath=None).AnalizeData(pa.Table.from_pandas(trips))
+
+    for result in (from_frame, from_arrow):
+        for key in ("most_popular_routes", "distance_between_routes", "longest_duration_routes", "stats"):
+            pd.testing.assert_frame_equal(result[key], from_file[key])
+
+# Test para verificar que el motor polars produce el mismo resultado que pandas
+@allure.feature("Data Analytics System")
+@allure.title("Test Polars Engine Matches Pandas Engine")
+@allure.description("Verifica que AnalizeData con engine='polars' produce las mismas tablas de rutas y estadísticas que el motor pandas, leyendo el archivo o recibiendo un DataFrame.")
+@allure.tag("analytics", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_analyze_data_polars_engine(tmp_path):
+    pytest.importorskip("polars")
+    trips = syntheticTrips(5_000, stations=30)
+    trips.to_parquet(tmp_path / "trips.parquet", index=False)
+
+    expected = Analytics(precision="haversine", dataPath=str(tmp_path / "trips.parquet")).AnalizeData()
+    lazy = Analytics(precision="haversine", dataPath=str(tmp_path / "trips.parquet"), engine="polars")
+    for result in (lazy.AnalizeData(), lazy.AnalizeData(trips)):
+        for key in ("most_popular_routes", "distance_between_routes", "longest_duration_routes"):
+            pd.testing.assert_frame_equal(result[key], expected[key])
+        pd.testing.assert_frame_equal(result["stats"].iloc[:5], expected["stats"].iloc[:5], rtol=1e-9)
+        assert len(result["data"]) == len(expected["data"])
+        assert set(result["stations"]["station_name"]) == set(expected["data"]["start_station_name"]) | set(expected["data"]["end_station_name"])
+
+    with pytest.raises(ValueError):
+        Analytics(engine="spark")
@@ -1,6 +1,7 @@
 import os
 import io
 import pytest
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib
@@ -15,11 +16,18 @@ from modules._04report import (
     create_bar_chart,
     dataframe_to_table,
     create_map_plot,
-    create_distribution_plots,
+    create_distribution_plot1,
+    create_distribution_plot2,
     create_scatter_plot,
+    scatter_mode,
+    stratified_sample,
     create_box_plots,
+    create_heatmap,
+    render_charts,
     report
 )
+import modules._04report as reportModule
+from modules._14reportcache import ReportCache, fingerprint
 from modules._03analytics import Analytics
 import contextily as ctx
 import allure
@@ -44,8 +52,8 @@ def sample_data():
 # Fixture para analizar los datos simulados y tener los resultados
 @pytest.fixture
 def analized_data(sample_data, monkeypatch):
-    """Datos analizados simulados con monkeypatch para lectura de Excel."""
-    monkeypatch.setattr(pd, 'read_excel', MagicMock(return_value=sample_data))
+    """Datos analizados simulados con monkeypatch para lectura de Parquet."""
+    monkeypatch.setattr(pd, 'read_parquet', MagicMock(return_value=sample_data))
     analytics = Analytics()
     return analytics.AnalizeData()
 
@@ -83,6 +91,13 @@ def global_mocks(monkeypatch):
     """
     monkeypatch.setattr(ctx, "add_basemap", lambda ax, crs: None)
 
+    """
+    Mock para evitar la descarga de teselas al poblar la caché local del mapa base
+    """
+    def no_tiles(*args, **kwargs):
+        raise ConnectionError("Sin conexión en pruebas")
+    monkeypatch.setattr(ctx, "bounds2img", no_tiles)
+
 # Test para crear la tabla
 @allure.feature("Report Generation System")
 @allure.title("Test DataFrame to Table Conversion")
@@ -120,13 +135,14 @@ def test_create_map_plot(sample_data):
 # Test para crear el gráfico de distribución
 @allure.feature("Report Generation System")
 @allure.title("Test Distribution Plots Creation")
-@allure.description("Verifica que la función create_distribution_plots genera correctamente histogramas para duración y distancia en formato PNG y los retorna como un buffer BytesIO.")
+@allure.description("Verifica que la función create_distribution_plot1 y create_distribution_plot2 generan correctamente histogramas para duración y distancia en formato PNG y los retorna como un buffer BytesIO.")
 @allure.tag("report", "unit", "positive")
 @allure.severity(Severity.NORMAL)
 def test_create_distribution_plots(sample_data):
-    buffer = create_distribution_plots(sample_data)
-    assert buffer.getvalue()[:8] == b'\x89PNG\r\n\x1a\n'
-    buffer.close()
+    for create_distribution_plot in (create_distribution_plot1, create_distribution_plot2):
+        buffer = create_distribution_plot(sample_data)
+        assert buffer.getvalue()[:8] == b'\x89PNG\r\n\x1a\n'
+        buffer.close()
 
 # Test para crear el gráfico de dispersión           
 @allure.feature("Report Generation System")
@@ -167,4 +183,194 @@ def test_report_generation(tmp_path, analized_data):
     # Verificación de contenido mínimo
     with open(pdf_path, 'rb') as f:
         content = f.read()
-        assert b'%PDF' in content  # Cabecera de PDF válida
\ No newline at end of file
+        assert b'%PDF' in content  # Cabecera de PDF válida
+
+# Test para verificar que los gráficos no dependen del estado global de pyplot
+@allure.feature("Report Generation System")
+@allure.title("Test Charts Do Not Use Pyplot State")
+@allure.description("Verifica que las funciones de gráficos usan la API orientada a objetos de matplotlib y no dejan figuras abiertas en pyplot.")
+@allure.tag("report", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_charts_do_not_use_pyplot_state(sample_data):
+    plt.close('all')
+    buffers = [
+        create_bar_chart(sample_data, 'distance_km', 'Test Chart'),
+        create_map_plot(sample_data),
+        create_scatter_plot(sample_data),
+        create_box_plots(sample_data),
+        create_heatmap(sample_data),
+    ]
+    assert plt.get_fignums() == []
+    for buffer in buffers:
+        assert buffer.getvalue()[:8] == b'\x89PNG\r\n\x1a\n'
+        buffer.close()
+
+# Test para verificar el renderizado en paralelo de los gráficos
+@allure.feature("Report Generation System")
+@allure.title("Test Parallel Chart Rendering")
+@allure.description("Verifica que render_charts con un pool de procesos genera los mismos gráficos PNG que la ejecución secuencial.")
+@allure.tag("report", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_render_charts_parallel(sample_data):
+    tasks = {
+        'bar': (create_bar_chart, (sample_data, 'distance_km', 'Test Chart')),
+        'scatter': (create_scatter_plot, (sample_data[['duration', 'distance_km']],)),
+        'box': (create_box_plots, (sample_data[['duration', 'distance_km']],)),
+    }
+    sequential = render_charts(tasks, workers=1)
+    parallel = render_charts(tasks, workers=2)
+
+    assert list(parallel) == list(tasks)
+    for name in tasks:
+        assert parallel[name].getvalue() == sequential[name].getvalue()
+
+# Test para verificar el reporte completo con renderizado en paralelo
+@allure.feature("Report Generation System")
+@allure.title("Test Full Report Generation With Workers")
+@allure.description("Verifica que la función report genera un PDF válido cuando los gráficos se renderizan en un pool de procesos.")
+@allure.tag("report", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_report_generation_parallel(tmp_path, analized_data):
+    pdf_path = tmp_path / "report.pdf"
+    report(str(pdf_path), analized_data, "test_user", workers=2)
+    assert pdf_path.stat().st_size > 1024
+
+
+# Test para verificar la caché de reportes por huella de los datos
+@allure.feature("Report Generation System")
+@allure.title("Test Report Cache Reuse")
+@allure.description("Verifica que con cachePath el mismo reporte se copia desde la caché sin dibujar gráficos, que otro usuario reutiliza los gráficos guardados y solo vuelve a armar el PDF, y que datos distintos invalidan la huella.")
+@allure.tag("report", "cache", "positive")
+@allure.severity(Severity.NORMAL)
+def test_report_cache_reuse(tmp_path, analized_data, monkeypatch):
+    rendered = []
+    render = reportModule._render_task
+    monkeypatch.setattr(reportModule, "_render_task", lambda task: rendered.append(task[0].__name__) or render(task))
+    monkeypatch.setattr(reportModule, "addCachedBasemap", lambda ax, **kwargs: True)
+    cache = str(tmp_path / "cache")
+
+    report(str(tmp_path / "first.pdf"), analized_data, "user1", openFile=False, cachePath=cache)
+    assert len(rendered) == 9
+    report(str(tmp_path / "again.pdf"), analized_data, "user1", openFile=False, cachePath=cache)
+    assert len(rendered) == 9
+    assert (tmp_path / "again.pdf").read_bytes() == (tmp_path / "first.pdf").read_bytes()
+
+    report(str(tmp_path / "other.pdf"), analized_data, "user2", openFile=False, cachePath=cache)
+    assert len(rendered) == 9
+    assert (tmp_path / "other.pdf").read_bytes() != (tmp_path / "first.pdf").read_bytes()
+    assert len(list((tmp_path / "cache").glob("*.pdf"))) == 2
+
+    changed = analized_data["data"].assign(duration=analized_data["data"]["duration"] + 1)
+    assert fingerprint(changed) != fingerprint(analized_data["data"])
+
+# Test para verificar que un mapa sin mapa base no queda en la caché
+@allure.feature("Report Generation System")
+@allure.title("Test Report Cache Skips Map Without Basemap")
+@allure.description("Verifica que si el mapa base no se pudo dibujar ni el mapa ni el PDF se guardan en la caché, y que el siguiente reporte vuelve a dibujar el mapa con su mapa base.")
+@allure.tag("report", "cache", "negative")
+@allure.severity(Severity.NORMAL)
+def test_report_cache_skips_map_without_basemap(tmp_path, analized_data, monkeypatch):
+    rendered = []
+    render = reportModule._render_task
+    monkeypatch.setattr(reportModule, "_render_task", lambda task: rendered.append(task[0].__name__) or render(task))
+    attempts = iter([False, True])
+    monkeypatch.setattr(reportModule, "addCachedBasemap", lambda ax, **kwargs: next(attempts))
+    cache = str(tmp_path / "cache")
+
+    report(str(tmp_path / "failed.pdf"), analized_data, "user1", openFile=False, offline=True, cachePath=cache)
+    assert list((tmp_path / "cache").glob("*.pdf")) == []
+    report(str(tmp_path / "ok.pdf"), analized_data, "user1", openFile=False, offline=True, cachePath=cache)
+
+    # Solo el mapa se vuelve a dibujar; los demás gráficos salen de la caché
+    assert rendered.count("create_map_plot") == 2 and len(rendered) == 10
+    assert len(list((tmp_path / "cache").glob("*.pdf"))) == 1
+
+# Gráfico de prueba que lee una constante del módulo al ejecutarse
+CHART_SCALE = 2
+
+def scaled_chart(data):
+    return data * CHART_SCALE
+
+# Test para verificar que la huella de un gráfico cubre lo que la función usa
+@allure.feature("Report Generation System")
+@allure.title("Test Chart Fingerprint Tracks Defaults And Globals")
+@allure.description("Verifica que la huella de un gráfico cambia al modificar un valor por defecto, una constante del módulo, una función auxiliar que usa o el valor capturado en una clausura.")
+@allure.tag("report", "cache", "positive")
+@allure.severity(Severity.NORMAL)
+def test_chart_fingerprint_tracks_dependencies(monkeypatch):
+    base = fingerprint(create_scatter_plot)
+    monkeypatch.setattr(create_scatter_plot, "__defaults__", ("hexbin", 20_000))
+    assert fingerprint(create_scatter_plot) != base
+    monkeypatch.undo()
+
+    monkeypatch.setattr(reportModule, "figure_to_buffer", lambda fig, **kwargs: BytesIO())
+    assert fingerprint(create_scatter_plot) != base
+    monkeypatch.undo()
+
+    def chart(factor):
+        return lambda data: data * factor
+    assert fingerprint(chart(1)) != fingerprint(chart(2))
+
+    scaled = fingerprint(scaled_chart)
+    monkeypatch.setitem(globals(), "CHART_SCALE", 3)
+    assert fingerprint(scaled_chart) != scaled
+
+# Test para verificar el límite de tamaño de la caché de reportes
+@allure.feature("Report Generation System")
+@allure.title("Test Report Cache Eviction")
+@allure.description("Verifica que al superar el tamaño máximo la caché borra primero los archivos usados hace más tiempo y que una lectura renueva la fecha de uso.")
+@allure.tag("report", "cache", "positive")
+@allure.severity(Severity.MINOR)
+def test_report_cache_eviction(tmp_path):
+    cache = ReportCache(str(tmp_path), maxMb=2.5)
+    cache.put("a", "png", bytes(2**20))
+    cache.put("b", "png", bytes(2**20))
+    os.utime(tmp_path / "a.png", ns=(1, 1))
+    os.utime(tmp_path / "b.png", ns=(2, 2))
+    assert cache.get("a", "png") is not None  # "a" pasa a ser el más reciente
+    cache.put("c", "png", bytes(2**20))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.png", "c.png"]
+    assert cache.get("b", "png") is None
+
+# Test para verificar la selección automática del modo del scatter
+@allure.feature("Report Generation System")
+@allure.title("Test Scatter Mode Selection")
+@allure.description("Verifica que el scatter usa puntos hasta el umbral de filas, densidad hexagonal por encima, y que rechaza modos desconocidos.")
+@allure.tag("report", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_scatter_mode_selection():
+    assert scatter_mode(10_000) == "points"
+    assert scatter_mode(1_000_000) == "hexbin"
+    assert scatter_mode(1_000_000, mode="sample") == "sample"
+    assert scatter_mode(50, threshold=10) == "hexbin"
+    with pytest.raises(ValueError):
+        scatter_mode(10, mode="violin")
+
+# Test para verificar el muestreo estratificado con tope de puntos
+@allure.feature("Report Generation System")
+@allure.title("Test Stratified Scatter Sampling")
+@allure.description("Verifica que stratified_sample respeta el tope de puntos, cubre todo el rango de duraciones y es reproducible.")
+@allure.tag("report", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_stratified_sample():
+    large = pd.DataFrame({'duration': np.arange(50_000), 'distance_km': np.linspace(0, 5, 50_000)})
+    sample = stratified_sample(large, max_points=1_000)
+    assert len(sample) <= 1_000
+    assert sample['duration'].min() < 2_500 and sample['duration'].max() > 47_500
+    assert sample.index.equals(stratified_sample(large, max_points=1_000).index)
+    assert len(stratified_sample(large.head(10), max_points=1_000)) == 10
+
+# Test para verificar los modos agregados del scatter
+@allure.feature("Report Generation System")
+@allure.title("Test Aggregated Scatter Rendering")
+@allure.description("Verifica que create_scatter_plot genera un PNG válido en los modos hexbin y sample.")
+@allure.tag("report", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+@pytest.mark.parametrize("mode", ["hexbin", "sample"])
+def test_aggregated_scatter(mode):
+    rng = np.random.default_rng(0)
+    large = pd.DataFrame({'duration': rng.lognormal(6, 0.5, 30_000), 'distance_km': rng.gamma(2, 0.8, 30_000)})
+    buffer = create_scatter_plot(large, mode=mode)
+    assert buffer.getvalue()[:8] == b'\x89PNG\r\n\x1a\n'
+    buffer.close()
@@ -0,0 +1,179 @@
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from geopy.distance import geodesic
+from modules._05distance import DistanceCache, distanceKm, haversine, vincenty
+import allure
+from allure_commons.types import Severity
+
+# Fixture con coordenadas aleatorias en el área de Bergen y algunos casos lejanos
+@pytest.fixture
+def coordinates():
+    rng = np.random.default_rng(7)
+    lat1 = rng.uniform(60.33, 60.43, 200)
+    lon1 = rng.uniform(5.25, 5.40, 200)
+    lat2 = rng.uniform(60.33, 60.43, 200)
+    lon2 = rng.uniform(5.25, 5.40, 200)
+    lat1 = np.append(lat1, [0.0, -33.9, 60.39])
+    lon1 = np.append(lon1, [0.0, 18.4, 5.32])
+    lat2 = np.append(lat2, [0.0, 40.7, 60.39])
+    lon2 = np.append(lon2, [90.0, -74.0, 5.32])
+    return lat1, lon1, lat2, lon2
+
+def reference(lat1, lon1, lat2, lon2):
+    return np.array([geodesic((a, b), (c, d)).kilometers for a, b, c, d in zip(lat1, lon1, lat2, lon2)])
+
+# Test para verificar que el modo elipsoidal coincide con geopy
+@allure.feature("Distance Engine")
+@allure.title("Test Vincenty Agreement With Geopy")
+@allure.description("Verifica que el modo vincenty vectorizado coincide con geopy.distance.geodesic con un error menor a 1 mm en todas las filas.")
+@allure.tag("distance", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_vincenty_matches_geopy(coordinates):
+    expected = reference(*coordinates)
+    result = distanceKm(*coordinates, mode="vincenty")
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-6)
+
+# Test para verificar la precisión del modo haversine
+@allure.feature("Distance Engine")
+@allure.title("Test Haversine Tolerance")
+@allure.description("Verifica que el modo haversine se mantiene dentro del 0.5% de error relativo frente a geopy.")
+@allure.tag("distance", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_haversine_within_tolerance(coordinates):
+    expected = reference(*coordinates)
+    result = haversine(*coordinates)
+    np.testing.assert_allclose(result, expected, rtol=5e-3, atol=1e-9)
+
+# Test para verificar que los casos que no convergen usan el respaldo de geopy
+@allure.feature("Distance Engine")
+@allure.title("Test Vincenty Near-Antipodal Fallback")
+@allure.description("Verifica que vincenty resuelve puntos casi antipodales, donde la iteración no converge, usando geopy como respaldo.")
+@allure.tag("distance", "unit", "edge")
+@allure.severity(Severity.MINOR)
+def test_vincenty_antipodal_fallback():
+    result = vincenty([0.0], [0.0], [0.5], [179.7])
+    expected = geodesic((0.0, 0.0), (0.5, 179.7)).kilometers
+    assert result[0] == pytest.approx(expected, abs=1e-6)
+
+# Test para verificar que columnas vacías retornan un arreglo vacío
+@allure.feature("Distance Engine")
+@allure.title("Test Empty Columns")
+@allure.description("Verifica que distanceKm retorna un arreglo vacío cuando las columnas de coordenadas están vacías.")
+@allure.tag("distance", "unit", "edge")
+@allure.severity(Severity.MINOR)
+def test_empty_columns():
+    for mode in ("haversine", "vincenty", "geopy"):
+        assert len(distanceKm([], [], [], [], mode=mode)) == 0
+
+# Test para verificar el manejo de coordenadas inválidas
+@allure.feature("Distance Engine")
+@allure.title("Test Invalid Coordinates")
+@allure.description("Verifica que distanceKm lanza ValueError cuando alguna coordenada es None o NaN.")
+@allure.tag("distance", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_invalid_coordinates():
+    with pytest.raises(ValueError):
+        distanceKm([None], [5.32], [60.40], [5.33])
+
+# Test para verificar el manejo de un modo de precisión inválido
+@allure.feature("Distance Engine")
+@allure.title("Test Unsupported Precision Mode")
+@allure.description("Verifica que distanceKm lanza ValueError cuando se solicita un modo de precisión desconocido.")
+@allure.tag("distance", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_unsupported_mode():
+    with pytest.raises(ValueError):
+        distanceKm([60.39], [5.32], [60.40], [5.33], mode="planar")
+
+# Fixture con viajes que repiten pares de estaciones
+@pytest.fixture
+def trips():
+    return pd.DataFrame({
+        "start_station_id": [1, 2, 1, 1, 3],
+        "end_station_id": [2, 3, 2, 3, 1],
+        "start_station_latitude": [60.39, 60.40, 60.39, 60.39, 60.41],
+        "start_station_longitude": [5.32, 5.33, 5.32, 5.32, 5.34],
+        "end_station_latitude": [60.40, 60.41, 60.40, 60.41, 60.39],
+        "end_station_longitude": [5.33, 5.34, 5.33, 5.34, 5.32],
+    })
+
+# Test para verificar que cada par de estaciones se calcula una sola vez
+@allure.feature("Distance Engine")
+@allure.title("Test Station Pair Deduplication")
+@allure.description("Verifica que DistanceCache calcula la distancia una sola vez por par (inicio, fin) y la propaga a todos los viajes en el orden original.")
+@allure.tag("distance", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_resolve_deduplicates_pairs(trips):
+    with patch("modules._05distance.distanceKm", wraps=distanceKm) as spy:
+        result = DistanceCache().resolve(trips)
+        assert spy.call_count == 1
+        assert len(spy.call_args.args[0]) == 4
+
+    expected = distanceKm(trips["start_station_latitude"], trips["start_station_longitude"],
+                          trips["end_station_latitude"], trips["end_station_longitude"])
+    np.testing.assert_allclose(result, expected)
+
+# Test para verificar que la caché persistente evita recalcular en ejecuciones posteriores
+@allure.feature("Distance Engine")
+@allure.title("Test Persistent Distance Cache")
+@allure.description("Verifica que una nueva instancia de DistanceCache con el mismo archivo SQLite solo calcula los pares de estaciones nuevos.")
+@allure.tag("distance", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_persistent_cache(trips, tmp_path):
+    cache_path = tmp_path / "cache" / "distances.sqlite"
+    first = DistanceCache(str(cache_path)).resolve(trips)
+    assert cache_path.exists()
+
+    new_trip = pd.DataFrame({
+        "start_station_id": [4], "end_station_id": [1],
+        "start_station_latitude": [60.42], "start_station_longitude": [5.35],
+        "end_station_latitude": [60.39], "end_station_longitude": [5.32],
+    })
+    with patch("modules._05distance.distanceKm", wraps=distanceKm) as spy:
+        second = DistanceCache(str(cache_path)).resolve(pd.concat([trips, new_trip], ignore_index=True))
+        assert spy.call_count == 1
+        assert len(spy.call_args.args[0]) == 1
+
+    np.testing.assert_allclose(second[:len(trips)], first)
+
+# Test para verificar que una estación movida no reutiliza la distancia guardada
+@allure.feature("Distance Engine")
+@allure.title("Test Relocated Station Is Recomputed")
+@allure.description("Verifica que si una estación cambia de coordenadas entre ejecuciones con el mismo id, la caché persistente no retorna la distancia anterior y calcula la nueva.")
+@allure.tag("distance", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_relocated_station_is_recomputed(trips, tmp_path):
+    cache_path = str(tmp_path / "distances.sqlite")
+    first = DistanceCache(cache_path).resolve(trips)
+
+    moved = trips.copy()
+    moved.loc[moved["end_station_id"] == 2, "end_station_latitude"] = 60.50
+    second = DistanceCache(cache_path).resolve(moved)
+
+    expected = distanceKm(moved["start_station_latitude"], moved["start_station_longitude"],
+                          moved["end_station_latitude"], moved["end_station_longitude"])
+    np.testing.assert_allclose(second, expected)
+    assert second[0] > first[0]
+    # Los pares que no cambiaron siguen saliendo de la caché
+    with patch("modules._05distance.distanceKm", wraps=distanceKm) as spy:
+        DistanceCache(cache_path).resolve(moved)
+        spy.assert_not_called()
+
+# Test para verificar que una estación movida dentro del mismo conjunto de viajes tiene su propia distancia
+@allure.feature("Distance Engine")
+@allure.title("Test Relocated Station Within One Frame")
+@allure.description("Verifica que si los viajes de varios meses traen la misma estación en dos ubicaciones, cada viaje recibe la distancia calculada con sus propias coordenadas.")
+@allure.tag("distance", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_relocated_station_within_frame(trips):
+    moved = trips.copy()
+    moved.loc[moved["end_station_id"] == 2, "end_station_latitude"] = 60.50
+    months = pd.concat([trips, moved], ignore_index=True)
+
+    result = DistanceCache().resolve(months)
+    expected = distanceKm(months["start_station_latitude"], months["start_station_longitude"],
+                          months["end_station_latitude"], months["end_station_longitude"])
+    np.testing.assert_allclose(result, expected)
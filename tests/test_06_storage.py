@@ -0,0 +1,167 @@
+import pytest
+import pandas as pd
+from unittest.mock import patch, MagicMock
+from modules._06storage import BatchWriter, applyTripSchema, dataFile, iterData, saveData, loadData
+from modules._02request import getData
+import allure
+from allure_commons.types import Severity
+
+@pytest.fixture
+def trips():
+    return pd.DataFrame({
+        "start_station_id": [641, 1894, 641],
+        "start_station_name": ["Krohnviken", "Kong Oscars gate", "Krohnviken"],
+        "start_station_latitude": [60.378107, 60.393323, 60.378107],
+        "duration": [518, 757, 300]
+    })
+
+# Test para verificar que cada formato conserva los datos y los tipos
+@allure.feature("Data Storage System")
+@allure.title("Test Round Trip For Every Format")
+@allure.description("Verifica que saveData y loadData conservan filas, columnas y tipos numéricos en Parquet, Feather, CSV y Excel.")
+@allure.tag("storage", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv", "excel"])
+def test_round_trip(trips, tmp_path, fmt):
+    file_path = saveData(trips, dataFile(str(tmp_path), fmt))
+    loaded = loadData(file_path)
+    pd.testing.assert_frame_equal(loaded, trips, check_dtype=False)
+    assert pd.api.types.is_integer_dtype(loaded["duration"])
+
+# Test para verificar la lectura de un subconjunto de columnas
+@allure.feature("Data Storage System")
+@allure.title("Test Column Projection")
+@allure.description("Verifica que loadData lee únicamente las columnas solicitadas del archivo Parquet.")
+@allure.tag("storage", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_column_projection(trips, tmp_path):
+    file_path = saveData(trips, dataFile(str(tmp_path)))
+    loaded = loadData(file_path, columns=["duration"])
+    assert list(loaded.columns) == ["duration"]
+
+# Test para verificar el manejo de formatos desconocidos
+@allure.feature("Data Storage System")
+@allure.title("Test Unsupported Format")
+@allure.description("Verifica que dataFile y loadData lanzan ValueError ante un formato o extensión desconocidos.")
+@allure.tag("storage", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        dataFile(str(tmp_path), "xml")
+    with pytest.raises(ValueError):
+        loadData(str(tmp_path / "data.xml"))
+
+# Test para verificar la exportación opcional a Excel desde getData
+@allure.feature("Data Storage System")
+@allure.title("Test Optional Excel Export")
+@allure.description("Verifica que getData guarda Parquet por defecto y solo genera el archivo Excel cuando se solicita la exportación.")
+@allure.tag("storage", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_optional_excel_export(trips, tmp_path):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = trips.to_dict(orient="records")
+
+    with patch("modules._02request.requests.get", return_value=mock_response):
+        assert getData("https://example.com/api/data", str(tmp_path)) == True
+        assert (tmp_path / "data.parquet").exists()
+        assert not (tmp_path / "data.xlsx").exists()
+
+        assert getData("https://example.com/api/data", str(tmp_path), exportExcel=True) == True
+        assert (tmp_path / "data.xlsx").exists()
+
+# Fixture con el esquema completo de los viajes tal como llegan del servidor
+@pytest.fixture
+def raw_trips():
+    return pd.DataFrame({
+        "started_at": ["2024-09-01 03:37:20.636000+00:00", "2024-09-01 03:40:09.449000+00:00"],
+        "ended_at": ["2024-09-01 03:45:58.713000+00:00", "2024-09-01 03:52:46.932000+00:00"],
+        "duration": [518, 757],
+        "start_station_id": [641, 1894],
+        "start_station_name": ["Krohnviken", "Kong Oscars gate"],
+        "start_station_latitude": [60.378107, 60.393323],
+        "start_station_longitude": [5.331021, 5.330654],
+        "end_station_id": [1894, 810],
+        "end_station_name": ["Kong Oscars gate", "Amalie Skrams vei"],
+        "end_station_latitude": [60.393323, 60.408097],
+        "end_station_longitude": [5.330654, 5.325511]
+    })
+
+# Test para verificar los tipos compactos del esquema de viajes
+@allure.feature("Data Storage System")
+@allure.title("Test Compact Trip Schema")
+@allure.description("Verifica que applyTripSchema convierte fechas a datetime64 UTC, la duración a int32, coordenadas a float32 y estaciones a categorías compartidas entre inicio y fin.")
+@allure.tag("storage", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_trip_schema_types(raw_trips):
+    typed = applyTripSchema(raw_trips)
+    assert str(typed["started_at"].dtype) == "datetime64[us, UTC]"
+    assert typed["ended_at"].iloc[0] == pd.Timestamp("2024-09-01 03:45:58.713", tz="UTC")
+    assert typed["duration"].dtype == "int32"
+    assert typed["start_station_latitude"].dtype == "float32"
+    assert typed["start_station_latitude"].iloc[0] == pytest.approx(60.378107, abs=1e-5)
+    assert isinstance(typed["start_station_name"].dtype, pd.CategoricalDtype)
+    assert typed["start_station_name"].cat.categories.equals(typed["end_station_name"].cat.categories)
+    assert (typed["start_station_name"] != typed["end_station_name"]).all()
+    # El DataFrame original no se modifica
+    assert raw_trips["duration"].dtype == "int64"
+
+# Test para verificar que el esquema se conserva al guardar y es idempotente
+@allure.feature("Data Storage System")
+@allure.title("Test Trip Schema Survives Parquet Round Trip")
+@allure.description("Verifica que getData guarda el Parquet con el esquema compacto y que volver a aplicarlo al leer no cambia los tipos.")
+@allure.tag("storage", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_trip_schema_round_trip(raw_trips, tmp_path):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = raw_trips.to_dict(orient="records")
+
+    with patch("modules._02request.requests.get", return_value=mock_response):
+        assert getData("https://example.com/api/data", str(tmp_path)) == True
+    loaded = loadData(dataFile(str(tmp_path)))
+    assert loaded["duration"].dtype == "int32"
+    assert isinstance(loaded["end_station_name"].dtype, pd.CategoricalDtype)
+    # Parquet no conserva categorías de enteros: los ids se vuelven a categorizar al leer
+    typed = applyTripSchema(loaded)
+    assert isinstance(typed["end_station_id"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(applyTripSchema(typed), typed)
+
+# Test para verificar la lectura por bloques en cada formato
+@allure.feature("Data Storage System")
+@allure.title("Test Chunked Reading")
+@allure.description("Verifica que iterData entrega bloques de a lo sumo chunkSize filas que juntos reconstruyen el archivo, y que Excel no admite lectura por bloques.")
+@allure.tag("storage", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv"])
+def test_iter_data_chunks(trips, tmp_path, fmt):
+    trips = pd.concat([trips] * 5, ignore_index=True)
+    file_path = saveData(trips, dataFile(str(tmp_path), fmt))
+    chunks = list(iterData(file_path, 4, columns=["duration"]))
+    assert all(len(chunk) <= 4 for chunk in chunks)
+    assert pd.concat(chunks, ignore_index=True)["duration"].tolist() == trips["duration"].tolist()
+
+    with pytest.raises(ValueError):
+        next(iterData(saveData(trips, dataFile(str(tmp_path), "excel")), 4))
+
+# Test para verificar la escritura por lotes cuando los tipos cambian entre lotes
+@allure.feature("Data Storage System")
+@allure.title("Test Batch Writer Type Drift")
+@allure.description("Verifica que BatchWriter escribe con un esquema fijo de viajes: un lote con columnas vacías y otro con la duración como float o faltante se guardan sin error en el mismo archivo Parquet.")
+@allure.tag("storage", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_batch_writer_type_drift(raw_trips, tmp_path):
+    first = raw_trips.assign(start_station_description=None)
+    second = raw_trips.assign(start_station_description=["Ved kaien", "Sentrum"], duration=[518.0, None])
+    third = raw_trips
+
+    filePath = str(tmp_path / "data.parquet")
+    with BatchWriter(filePath) as writer:
+        for batch in (first, second, third):
+            writer.write(applyTripSchema(batch, categories=False))
+
+    saved = pd.read_parquet(filePath)
+    assert len(saved) == writer.rows == 6
+    assert saved["duration"].tolist()[:3] == [518, 757, 518] and saved["duration"].isna().sum() == 1
+    assert saved["start_station_description"].tolist()[2:4] == ["Ved kaien", "Sentrum"]
+    assert saved["start_station_description"].isna().sum() == 4
@@ -0,0 +1,119 @@
+import math
+import pytest
+import numpy as np
+import pandas as pd
+import contextily as ctx
+from matplotlib.figure import Figure
+from modules._07tiles import seedBasemap, findBasemap, addCachedBasemap, BERGEN_BBOX
+from modules._04report import create_map_plot
+import allure
+from allure_commons.types import Severity
+
+def to_web_mercator(lon, lat):
+    radius = 6378137.0
+    return radius * math.radians(lon), radius * math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+# Doble de prueba para contextily.bounds2img: imagen fija sin acceso a la red
+@pytest.fixture
+def fake_tiles(monkeypatch):
+    calls = []
+    def fake_bounds2img(w, s, e, n, zoom=None, source=None, ll=False, **kwargs):
+        calls.append((w, s, e, n, zoom))
+        xmin, ymin = to_web_mercator(w, s)
+        xmax, ymax = to_web_mercator(e, n)
+        image = np.tile(np.arange(64, dtype=np.uint8), (64, 1))[:, :, None].repeat(3, axis=2)
+        return image, (xmin, xmax, ymin, ymax)
+    monkeypatch.setattr(ctx, "bounds2img", fake_bounds2img)
+    return calls
+
+@pytest.fixture
+def stations():
+    return pd.DataFrame({
+        'start_station_name': ['Station A', 'Station B'],
+        'end_station_name': ['Station B', 'Station C'],
+        'start_station_latitude': [60.39, 60.38],
+        'start_station_longitude': [5.32, 5.33],
+        'end_station_latitude': [60.38, 60.37],
+        'end_station_longitude': [5.33, 5.34],
+    })
+
+# Test para verificar la pre-carga de la caché y la búsqueda por cobertura
+@allure.feature("Basemap Tile Cache")
+@allure.title("Test Seed And Find Cached Basemap")
+@allure.description("Verifica que seedBasemap guarda el mosaico reproyectado de Bergen y que findBasemap lo encuentra para áreas contenidas, pero no para otro zoom o un área mayor.")
+@allure.tag("tiles", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_seed_and_find(fake_tiles, tmp_path):
+    path = seedBasemap(zoom=12, cacheDir=str(tmp_path))
+    assert len(fake_tiles) == 1
+
+    assert findBasemap((5.30, 60.35, 5.35, 60.40), zoom=12, cacheDir=str(tmp_path)) == path
+    assert findBasemap((5.30, 60.35, 5.35, 60.40), zoom=13, cacheDir=str(tmp_path)) is None
+    assert findBasemap((5.00, 60.35, 5.35, 60.40), zoom=12, cacheDir=str(tmp_path)) is None
+
+    with np.load(path) as cached:
+        west, east, south, north = cached["extent"]
+    assert west == pytest.approx(BERGEN_BBOX[0], abs=1e-2)
+    assert north == pytest.approx(BERGEN_BBOX[3], abs=1e-2)
+
+# Test para verificar proveedores con "_" en el nombre
+@allure.feature("Basemap Tile Cache")
+@allure.title("Test Provider Name With Underscore")
+@allure.description("Verifica que findBasemap encuentra el mosaico de un proveedor cuyo nombre tiene '_' (CartoDB.Positron_NoLabels) y no lo confunde con otro proveedor de prefijo similar.")
+@allure.tag("tiles", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_provider_name_with_underscore(fake_tiles, tmp_path):
+    source = ctx.providers.CartoDB.PositronNoLabels.copy()
+    source["name"] = "CartoDB.Positron_NoLabels"
+    path = seedBasemap(zoom=12, source=source, cacheDir=str(tmp_path))
+
+    assert findBasemap((5.30, 60.35, 5.35, 60.40), zoom=12, source=source, cacheDir=str(tmp_path)) == path
+    assert findBasemap((5.30, 60.35, 5.35, 60.40), zoom=12, cacheDir=str(tmp_path)) is None
+    assert len(fake_tiles) == 1
+
+# Test para verificar que el modo offline solo usa la caché
+@allure.feature("Basemap Tile Cache")
+@allure.title("Test Offline Basemap Mode")
+@allure.description("Verifica que addCachedBasemap en modo offline no descarga teselas: retorna False con la caché vacía y dibuja el mapa base cuando está en caché.")
+@allure.tag("tiles", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_offline_mode(fake_tiles, tmp_path):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.axis((5.30, 5.35, 60.35, 60.40))
+
+    assert addCachedBasemap(ax, offline=True, cacheDir=str(tmp_path)) == False
+    assert fake_tiles == []
+
+    seedBasemap(cacheDir=str(tmp_path))
+    assert addCachedBasemap(ax, offline=True, cacheDir=str(tmp_path)) == True
+    assert len(fake_tiles) == 1
+    assert len(ax.images) == 1
+    assert ax.axis() == pytest.approx((5.30, 5.35, 60.35, 60.40))
+
+# Test para verificar que un área sin caché se descarga una sola vez
+@allure.feature("Basemap Tile Cache")
+@allure.title("Test Online Mode Populates Cache")
+@allure.description("Verifica que addCachedBasemap descarga el mapa base la primera vez y lo reutiliza desde disco en las siguientes llamadas.")
+@allure.tag("tiles", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_online_mode_populates_cache(fake_tiles, tmp_path):
+    for _ in range(3):
+        ax = Figure().subplots()
+        ax.axis((5.30, 5.35, 60.35, 60.40))
+        assert addCachedBasemap(ax, cacheDir=str(tmp_path)) == True
+    assert len(fake_tiles) == 1
+
+# Test para verificar que el mapa offline es determinista
+@allure.feature("Basemap Tile Cache")
+@allure.title("Test Deterministic Offline Map Plot")
+@allure.description("Verifica que create_map_plot en modo offline con la caché precargada genera exactamente la misma imagen en ejecuciones sucesivas.")
+@allure.tag("tiles", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_offline_map_plot_is_deterministic(fake_tiles, stations, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    seedBasemap()
+    first = create_map_plot(stations, offline=True).getvalue()
+    second = create_map_plot(stations, offline=True).getvalue()
+    assert first == second
+    assert len(fake_tiles) == 1
@@ -0,0 +1,99 @@
+import pytest
+import pandas as pd
+from modules._08stations import encodeRoutes, routeLabels, stationRegistry, STATION_COLUMNS
+from modules._04report import create_map_plot
+import allure
+from allure_commons.types import Severity
+
+@pytest.fixture
+def trips():
+    return pd.DataFrame({
+        "start_station_id": [641, 1894, 641, 810],
+        "start_station_name": ["Krohnviken", "Kong Oscars gate", "Krohnviken", "Amalie Skrams vei"],
+        "start_station_latitude": [60.378107, 60.393323, 60.378107, 60.408097],
+        "start_station_longitude": [5.331021, 5.330654, 5.331021, 5.325511],
+        "end_station_id": [1894, 810, 1890, 641],
+        "end_station_name": ["Kong Oscars gate", "Amalie Skrams vei", "Christian Michelsens institutt", "Krohnviken"],
+        "end_station_latitude": [60.393323, 60.408097, 60.38971, 60.378107],
+        "end_station_longitude": [5.330654, 5.325511, 5.314042, 5.331021],
+        "duration": [518, 757, 300, 410]
+    })
+
+# Test para verificar que el registro contiene una fila por estación
+@allure.feature("Station Registry")
+@allure.title("Test Unique Stations From Trips")
+@allure.description("Verifica que stationRegistry extrae una fila por estación, uniendo estaciones de inicio y fin, con su id, nombre y coordenadas.")
+@allure.tag("stations", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_registry_unique_stations(trips):
+    stations = stationRegistry(trips)
+    assert list(stations.columns) == STATION_COLUMNS
+    assert stations["station_id"].tolist() == [641, 810, 1890, 1894]
+    krohnviken = stations[stations["station_id"] == 641].iloc[0]
+    assert krohnviken["station_name"] == "Krohnviken"
+    assert krohnviken["latitude"] == pytest.approx(60.378107)
+    assert krohnviken["longitude"] == pytest.approx(5.331021)
+
+# Test para verificar el uso del nombre cuando no hay ids
+@allure.feature("Station Registry")
+@allure.title("Test Registry Without Station Ids")
+@allure.description("Verifica que stationRegistry identifica las estaciones por nombre cuando los viajes no incluyen ids de estación.")
+@allure.tag("stations", "unit", "edge")
+@allure.severity(Severity.NORMAL)
+def test_registry_without_ids(trips):
+    stations = stationRegistry(trips.drop(columns=["start_station_id", "end_station_id"]))
+    assert len(stations) == 4
+    assert (stations["station_id"] == stations["station_name"]).all()
+
+# Test para verificar que el registro se puede pasar de nuevo sin recalcularse
+@allure.feature("Station Registry")
+@allure.title("Test Registry Is Idempotent")
+@allure.description("Verifica que stationRegistry retorna el mismo registro cuando recibe un registro de estaciones, permitiendo reutilizarlo en el mapa.")
+@allure.tag("stations", "unit", "positive")
+@allure.severity(Severity.MINOR)
+def test_registry_idempotent(trips):
+    stations = stationRegistry(trips)
+    assert stationRegistry(stations) is stations
+
+# Test para verificar que el mapa acepta el registro de estaciones
+@allure.feature("Station Registry")
+@allure.title("Test Map Plot From Registry")
+@allure.description("Verifica que create_map_plot genera el mismo mapa a partir de los viajes o del registro de estaciones.")
+@allure.tag("stations", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_map_plot_from_registry(trips, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from_trips = create_map_plot(trips, offline=True).getvalue()
+    from_registry = create_map_plot(stationRegistry(trips), offline=True).getvalue()
+    assert from_trips[:8] == b'\x89PNG\r\n\x1a\n'
+    assert from_trips == from_registry
+
+# Test para verificar que el código de ruta distingue origen y destino
+@allure.feature("Station Registry")
+@allure.title("Test Route Codes And Labels")
+@allure.description("Verifica que encodeRoutes asigna el mismo código a viajes con el mismo origen y destino, distingue el sentido de la ruta y que routeLabels reconstruye el texto 'Origen to Destino'.")
+@allure.tag("stations", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_route_codes_and_labels(trips):
+    routes, stations = encodeRoutes(trips)
+    assert routes.dtype.kind == "i"
+    assert routes[0] != routes[3]  # Krohnviken -> Kong Oscars gate vs. Amalie Skrams vei -> Krohnviken
+    expected = (trips["start_station_name"] + " to " + trips["end_station_name"]).tolist()
+    assert routeLabels(routes, stations).tolist() == expected
+
+    repeated, _ = encodeRoutes(pd.concat([trips, trips], ignore_index=True))
+    assert (repeated[:4] == repeated[4:]).all()
+
+# Test para verificar las rutas con nombre de estación faltante
+@allure.feature("Station Registry")
+@allure.title("Test Route Codes With Missing Station Names")
+@allure.description("Verifica que las rutas con un nombre de estación faltante reciben el código -1 y etiqueta vacía, como el NaN de la concatenación de textos.")
+@allure.tag("stations", "unit", "edge")
+@allure.severity(Severity.NORMAL)
+def test_route_codes_missing_names(trips):
+    trips.loc[1, "end_station_name"] = None
+    routes, stations = encodeRoutes(trips)
+    assert routes[1] == -1
+    labels = routeLabels(routes, stations)
+    assert labels[1] is None
+    assert labels[0] == "Krohnviken to Kong Oscars gate"
@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+import pandas as pd
+from modules._09statistics import STAT_LABELS, RunningMoments, StreamingStats, TDigest, statsTable
+import allure
+from allure_commons.types import Severity
+
+# Fixture con duraciones log-normales parecidas a las de los viajes reales
+@pytest.fixture
+def durations():
+    rng = np.random.default_rng(11)
+    return rng.lognormal(6.4, 0.7, 200_000)
+
+# Test para verificar que los momentos por bloques coinciden con pandas
+@allure.feature("Streaming Statistics")
+@allure.title("Test Chunked Moments Match Pandas")
+@allure.description("Verifica que media, varianza, mínimo y máximo calculados por bloques y combinados coinciden con las reducciones de pandas.")
+@allure.tag("statistics", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_moments_match_pandas(durations):
+    moments = RunningMoments()
+    for chunk in np.array_split(durations, 7):
+        moments.update(chunk)
+    series = pd.Series(durations)
+    assert moments.count == len(series)
+    assert moments.mean == pytest.approx(series.mean(), rel=1e-12)
+    assert moments.variance == pytest.approx(series.var(), rel=1e-10)
+    assert moments.min == series.min()
+    assert moments.max == series.max()
+
+# Test para verificar que combinar resultados parciales no depende del orden
+@allure.feature("Streaming Statistics")
+@allure.title("Test Merge Of Partial Statistics")
+@allure.description("Verifica que dos StreamingStats calculados sobre mitades distintas se combinan en el mismo resultado que una sola pasada.")
+@allure.tag("statistics", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_merge_partial_stats(durations):
+    whole = StreamingStats().update(durations)
+    left = StreamingStats().update(durations[::2])
+    right = StreamingStats().update(durations[1::2])
+    merged = right.merge(left).summary()
+    expected = whole.summary()
+    for key in ("mean", "variance", "std_dev", "max", "min"):
+        assert merged[key] == pytest.approx(expected[key], rel=1e-10)
+    for key in ("25th_percentile", "50th_percentile", "75th_percentile"):
+        assert merged[key] == pytest.approx(expected[key], rel=1e-2)
+
+# Test para verificar el error de rango de los cuantiles del t-digest
+@allure.feature("Streaming Statistics")
+@allure.title("Test T-Digest Quantile Accuracy")
+@allure.description("Verifica que los cuantiles del t-digest tienen un error de rango menor a 0.5% y que su tamaño queda acotado por la compresión.")
+@allure.tag("statistics", "unit", "positive")
+@allure.severity(Severity.CRITICAL)
+@pytest.mark.parametrize("compression", [50, 200])
+def test_tdigest_accuracy(durations, compression):
+    digest = TDigest(compression)
+    for chunk in np.array_split(durations, 20):
+        digest.update(chunk)
+    digest._compress()
+    assert len(digest.means) <= compression
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        rank = (durations < digest.quantile(q)).mean()
+        assert abs(rank - q) < 0.005
+
+# Test para verificar que con pocos datos los percentiles son exactos
+@allure.feature("Streaming Statistics")
+@allure.title("Test Exact Quantiles For Small Inputs")
+@allure.description("Verifica que mientras los valores caben en el buffer del t-digest los percentiles coinciden con Series.quantile.")
+@allure.tag("statistics", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_small_input_exact():
+    values = pd.Series([300, 120, 950, 410, 410, 75, 1800])
+    summary = StreamingStats().update(values).summary()
+    assert summary["25th_percentile"] == values.quantile(0.25)
+    assert summary["50th_percentile"] == values.quantile(0.50)
+    assert summary["75th_percentile"] == values.quantile(0.75)
+
+# Test para verificar la tabla de estadísticas con columnas vacías y NaN
+@allure.feature("Streaming Statistics")
+@allure.title("Test Stats Table With Empty And NaN Values")
+@allure.description("Verifica que statsTable mantiene las filas del reporte, ignora NaN y retorna NaN cuando una columna no tiene valores.")
+@allure.tag("statistics", "unit", "negative")
+@allure.severity(Severity.NORMAL)
+def test_stats_table_empty_and_nan():
+    table = statsTable({
+        "Duration": StreamingStats().update([np.nan, 10.0, 20.0]),
+        "Distance (km)": StreamingStats().update([])
+    })
+    assert table["Statistic"].tolist() == list(STAT_LABELS)
+    assert table["Duration"].iloc[0] == 15.0
+    assert table["Distance (km)"].isna().all()
@@ -0,0 +1,81 @@
+import os
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from modules._03analytics import Analytics
+from modules._10aggregates import TripAggregates, mergeSamples
+from benchmarks.synthetic import syntheticTrips
+import allure
+from allure_commons.types import Severity
+
+MONTHS = ["2024-08", "2024-09"]
+
+# Fixture con dos meses de viajes sintéticos en {path}/{YYYY-MM}/data.parquet
+@pytest.fixture
+def monthly_trips(tmp_path):
+    frames = []
+    for seed, month in enumerate(MONTHS):
+        folder = tmp_path / "input" / month
+        folder.mkdir(parents=True)
+        trips = syntheticTrips(3_000, stations=25, seed=seed, month=month)
+        trips.to_parquet(folder / "data.parquet", index=False)
+        frames.append(trips)
+    return tmp_path, pd.concat(frames, ignore_index=True)
+
+# Test para verificar que combinar meses equivale a analizar todos los viajes juntos
+@allure.feature("Incremental Analytics")
+@allure.title("Test Merged Monthly Aggregates Match Full Analysis")
+@allure.description("Verifica que AnalizeRange, combinando los agregados de cada mes, produce las mismas tablas de rutas y momentos que AnalizeData sobre todos los viajes.")
+@allure.tag("aggregates", "integration", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_range_matches_full_analysis(monthly_trips):
+    tmp_path, trips = monthly_trips
+    analytics = Analytics(precision="haversine", aggregatesPath=str(tmp_path / "aggregates"))
+    merged = analytics.AnalizeRange(MONTHS[0], MONTHS[-1], path=str(tmp_path / "input"))
+
+    with patch("pandas.read_parquet", return_value=trips):
+        full = Analytics(precision="haversine").AnalizeData()
+
+    for key in ("most_popular_routes", "distance_between_routes", "longest_duration_routes"):
+        pd.testing.assert_frame_equal(merged[key], full[key])
+    pd.testing.assert_frame_equal(merged["stats"].iloc[:5], full["stats"].iloc[:5], rtol=1e-9)
+    assert len(merged["data"]) == len(full["data"])  # Menos viajes que SAMPLE_SIZE: la muestra es completa
+    stations = set(trips["start_station_name"]) | set(trips["end_station_name"])
+    assert set(merged["stations"]["station_name"]) == stations
+
+# Test para verificar que un mes ya procesado no vuelve a leerse
+@allure.feature("Incremental Analytics")
+@allure.title("Test Stored Months Are Reused")
+@allure.description("Verifica que una segunda ejecución reutiliza los agregados guardados y que solo el mes cuyo archivo cambió se vuelve a procesar.")
+@allure.tag("aggregates", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_stored_months_are_reused(monthly_trips):
+    tmp_path, _ = monthly_trips
+    analytics = Analytics(precision="haversine", aggregatesPath=str(tmp_path / "aggregates"))
+    first = analytics.AnalizeRange(MONTHS[0], MONTHS[-1], path=str(tmp_path / "input"))
+    assert os.path.exists(tmp_path / "aggregates" / MONTHS[0] / "summary.json")
+
+    with patch("modules._10aggregates.TripAggregates.fromTrips", wraps=TripAggregates.fromTrips) as fromTrips:
+        again = analytics.AnalizeRange(MONTHS[0], MONTHS[-1], path=str(tmp_path / "input"))
+        assert fromTrips.call_count == 0
+        pd.testing.assert_frame_equal(again["most_popular_routes"], first["most_popular_routes"])
+
+        # Un mes nuevo o modificado es el único que se procesa
+        updated = syntheticTrips(1_000, stations=25, seed=9, month=MONTHS[-1])
+        updated.to_parquet(tmp_path / "input" / MONTHS[-1] / "data.parquet", index=False)
+        os.utime(tmp_path / "input" / MONTHS[-1] / "data.parquet", (0, 0))
+        analytics.AnalizeRange(MONTHS[0], MONTHS[-1], path=str(tmp_path / "input"))
+        assert fromTrips.call_count == 1
+
+# Test para verificar la combinación de muestras de viajes
+@allure.feature("Incremental Analytics")
+@allure.title("Test Sample Merge Is Proportional")
+@allure.description("Verifica que mergeSamples respeta el tamaño pedido y toma de cada muestra según la cantidad de viajes que representa.")
+@allure.tag("aggregates", "unit", "positive")
+@allure.severity(Severity.MINOR)
+def test_merge_samples_proportional():
+    small = pd.DataFrame({"duration": [1] * 100})
+    large = pd.DataFrame({"duration": [2] * 100})
+    merged = mergeSamples([small, large], [1_000, 9_000], size=100, seed=3)
+    assert len(merged) == 100
+    assert 80 <= (merged["duration"] == 2).sum() <= 98
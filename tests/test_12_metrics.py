@@ -0,0 +1,73 @@
+import json
+import pytest
+from modules._03analytics import Analytics
+from modules._12metrics import Metrics, metrics
+from benchmarks.synthetic import syntheticTrips
+import allure
+from allure_commons.types import Severity
+
+# Fixture que activa las métricas compartidas y las desactiva al terminar
+@pytest.fixture
+def shared_metrics(tmp_path):
+    yield metrics.configure(logPath=str(tmp_path / "metrics.jsonl"), spanPath=str(tmp_path / "spans.jsonl"))
+    metrics.configure(enabled=False)
+
+# Test para verificar las mediciones de etapas anidadas
+@allure.feature("Metrics System")
+@allure.title("Test Nested Stages")
+@allure.description("Verifica que cada etapa registra tiempo de pared, CPU, filas y pico de tracemalloc, y que las etapas anidadas comparten la traza y apuntan a su padre.")
+@allure.tag("metrics", "unit", "positive")
+@allure.severity(Severity.NORMAL)
+def test_nested_stages():
+    recorder = Metrics().configure(traceMemory=True)
+    records = recorder.records
+    try:
+        with recorder.stage("outer") as outer:
+            with recorder.stage("inner", rows=3):
+                buffer = bytearray(8 * 2**20)
+            del buffer
+            outer["rows"] = 5
+    finally:
+        recorder.configure(enabled=False)
+
+    inner, outer = records
+    assert (inner["stage"], inner["rows"], outer["stage"], outer["rows"]) == ("inner", 3, "outer", 5)
+    assert inner["trace_id"] == outer["trace_id"] and inner["parent_id"] == outer["span_id"]
+    assert outer["parent_id"] is None
+    assert outer["wall_s"] >= inner["wall_s"] >= 0 and outer["cpu_s"] >= 0
+    # El pico de la etapa interna también cuenta para la externa
+    assert outer["tracemalloc_peak_mb"] >= inner["tracemalloc_peak_mb"] >= 8
+
+# Test para verificar que sin configurar no se registra nada
+@allure.feature("Metrics System")
+@allure.title("Test Disabled Metrics")
+@allure.description("Verifica que con las métricas sin configurar las etapas no registran ni escriben nada.")
+@allure.tag("metrics", "unit", "positive")
+@allure.severity(Severity.MINOR)
+def test_disabled_metrics():
+    recorder = Metrics()
+    with recorder.stage("ignored") as span:
+        span["rows"] = 1
+    assert recorder.records == []
+
+# Test para verificar las etapas de Analytics en JSON lines y spans OTLP
+@allure.feature("Metrics System")
+@allure.title("Test Analytics Stages Export")
+@allure.description("Verifica que AnalizeData escribe una línea JSON por etapa con sus filas y un span OTLP/JSON por etapa con el padre correcto.")
+@allure.tag("metrics", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_analytics_stages_export(shared_metrics, tmp_path):
+    trips = syntheticTrips(2_000, stations=20)
+    Analytics(precision="haversine").AnalizeData(trips)
+
+    lines = [json.loads(line) for line in open(tmp_path / "metrics.jsonl", encoding="utf-8")]
+    stages = {line["stage"]: line for line in lines}
+    assert list(stages) == ["analytics.load", "analytics.prepare", "analytics.routes", "analytics.stats", "analytics"]
+    assert stages["analytics.load"]["rows"] == 2_000
+    assert stages["analytics.routes"]["rows"] == stages["analytics.prepare"]["rows"] < 2_000
+
+    spans = [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for line in open(tmp_path / "spans.jsonl", encoding="utf-8")]
+    root = spans[-1]
+    assert root["name"] == "analytics" and "parentSpanId" not in root
+    assert all(span["parentSpanId"] == root["spanId"] and span["traceId"] == root["traceId"] for span in spans[:-1])
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
@@ -0,0 +1,33 @@
+import re
+import pstats
+from modules._03analytics import Analytics
+from modules._12metrics import metrics
+from modules._13profiling import StageProfiler
+from benchmarks.synthetic import syntheticTrips
+import allure
+from allure_commons.types import Severity
+
+# Test para verificar los perfiles por etapa del análisis
+@allure.feature("Profiling System")
+@allure.title("Test Stage Profiles")
+@allure.description("Verifica que StageProfiler escribe un pstats por etapa de AnalizeData, pilas muestreadas en formato colapsado bajo la ruta de etapas y deja las métricas como estaban.")
+@allure.tag("profiling", "integration", "positive")
+@allure.severity(Severity.NORMAL)
+def test_stage_profiles(tmp_path):
+    trips = syntheticTrips(50_000)
+    with StageProfiler(str(tmp_path), interval=0.001) as profiler:
+        Analytics(precision="vincenty").AnalizeData(trips)
+
+    for stage in ("main", "analytics", "analytics.load", "analytics.prepare", "analytics.routes", "analytics.stats"):
+        assert (tmp_path / f"{stage}.pstats").exists()
+    # El tiempo de las distancias queda en la etapa que las calcula, no en sus padres
+    prepare = pstats.Stats(str(tmp_path / "analytics.prepare.pstats")).stats
+    analytics = pstats.Stats(str(tmp_path / "analytics.pstats")).stats
+    assert any(function == "resolve" for _, _, function in prepare)
+    assert not any(function == "resolve" for _, _, function in analytics)
+
+    lines = (tmp_path / "pipeline.collapsed").read_text(encoding="utf-8").splitlines()
+    assert lines and all(re.fullmatch(r"main;\S.* \d+", line) for line in lines)
+    assert any(line.startswith("main;analytics;analytics.") for line in lines)
+    assert profiler.stages == ("main",)
+    assert not metrics.enabled and profiler not in metrics.listeners
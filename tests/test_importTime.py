@@ -0,0 +1,52 @@
+import os
+import sys
+import subprocess
+import allure
+from allure_commons.types import Severity
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencias que solo necesita el reporte (o el motor polars)
+HEAVY = ("matplotlib", "geopandas", "shapely", "contextily", "seaborn", "reportlab", "polars")
+
+# Ejecuta code con python -X importtime y retorna {módulo: tiempo acumulado en µs}
+def importTimes(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+# Test para verificar que el arranque no carga las dependencias del reporte
+@allure.feature("Startup Performance")
+@allure.title("Test Startup Skips Report Dependencies")
+@allure.description("Verifica con python -X importtime que importar main y modules (autenticación, descarga y análisis) no carga matplotlib, geopandas, reportlab ni polars, y que esas dependencias se cargan al pedir el reporte.")
+@allure.tag("imports", "performance", "positive")
+@allure.severity(Severity.NORMAL)
+def test_startup_skips_report_dependencies():
+    startup = importTimes("import main, modules; modules.Authentication; modules.getData; modules.Analytics")
+    loaded = [name for name in startup if name.split(".")[0] in HEAVY]
+    assert loaded == [], f"Dependencias pesadas cargadas al iniciar: {sorted(set(n.split('.')[0] for n in loaded))}"
+
+    # Las importaciones más lentas del arranque quedan adjuntas al reporte de Allure
+    slowest = sorted(startup.items(), key=lambda item: -item[1])[:15]
+    allure.attach("\n".join(f"{us / 1000:10.1f} ms  {name}" for name, us in slowest), "import time", allure.attachment_type.TEXT)
+
+    # El reporte sí las carga, recién al pedirlo
+    withReport = importTimes("import modules; modules.report")
+    assert "matplotlib" in withReport and "reportlab" in withReport
+
+# Test para verificar que el mapa offline desde la caché no carga contextily
+@allure.feature("Startup Performance")
+@allure.title("Test Offline Basemap Lookup Skips Contextily")
+@allure.description("Verifica que buscar el mapa base en la caché de teselas (modo offline) no importa contextily ni rasterio, que solo se necesitan para descargar teselas.")
+@allure.tag("imports", "performance", "positive")
+@allure.severity(Severity.MINOR)
+def test_offline_basemap_lookup_skips_contextily():
+    lookup = importTimes("from modules._07tiles import findBasemap, BERGEN_BBOX; findBasemap(BERGEN_BBOX)")
+    assert "contextily" not in lookup and "rasterio" not in lookup
@@ -1,4 +1,5 @@
 import os
+import json
 import pandas as pd
 import pytest
 import threading
@@ -12,6 +13,7 @@ from modules._03analytics import Analytics
 from modules._04report import report
 from modules._02request import getData
 import main
+from benchmarks.synthetic import syntheticTrips
 import allure
 from allure_commons.types import Severity
 
@@ -77,7 +79,7 @@ def temp_dirs(tmp_path):
         "root": tmp_path,
         "input": input_dir,
         "output": output_dir,
-        "excel_path": input_dir / "data.xlsx"
+        "data_path": input_dir / "data.parquet"
     }
 
 @pytest.fixture
@@ -160,7 +162,7 @@ def test_full_system_integration(auth_stub, temp_dirs, mock_http_response):
         url = "http://fake.url"
         result = getData(url, str(temp_dirs["input"]))
         assert result is True, "getData debe devolver True con respuesta exitosa"
-        assert temp_dirs["excel_path"].exists(), "El archivo Excel debe haberse creado"
+        assert temp_dirs["data_path"].exists(), "El archivo Parquet debe haberse creado"
 
     # 3. Ejecutar Analytics
     analytics = Analytics()
@@ -240,4 +242,118 @@ def test_full_system_integration_main_request_analytics(
     # Verificar generación del reporte PDF
     report_path = temp_working_dir / "data" / "output" / "report.pdf"
     assert report_path.exists(), "El reporte PDF debe existir"
-    assert report_path.stat().st_size > 0, "El reporte PDF no debe estar vacío"
\ No newline at end of file
+    assert report_path.stat().st_size > 0, "El reporte PDF no debe estar vacío"
+
+# Prueba del modo sin interfaz: credenciales desde archivo o entorno y reportes de varios meses
+@allure.feature("System Integration")
+@allure.title("Test Headless CLI Reports")
+@allure.description(
+    "Verifica el modo sin interfaz de main.py, incluyendo: "
+    "1. Rechazo sin credenciales o con credenciales inválidas, "
+    "2. Credenciales desde variables de entorno y desde archivo, "
+    "3. Un reporte por mes y un reporte del rango completo sin abrir el visor de PDF."
+)
+@allure.tag("integration", "positive")
+@allure.severity(Severity.CRITICAL)
+def test_headless_cli_reports(auth_stub_main, temp_working_dir, create_fake_logo, monkeypatch):
+    monkeypatch.setattr("main.os.startfile", MagicMock(side_effect=AssertionError("No debe abrirse el visor")), raising=False)
+    monkeypatch.delenv("BIKES_USER", raising=False)
+    monkeypatch.delenv("BIKES_PASSWORD", raising=False)
+    for seed, month in enumerate(["2024-08", "2024-09"]):
+        (temp_working_dir / "data" / "input" / month).mkdir(parents=True)
+        syntheticTrips(2_000, stations=20, seed=seed, month=month).to_parquet(temp_working_dir / "data" / "input" / month / "data.parquet", index=False)
+    command = ["report", "2024-08", "2024-09", "--precision", "haversine", "--offline"]
+
+    assert main.cli(command) == 2
+    monkeypatch.setenv("BIKES_USER", "test_user")
+    monkeypatch.setenv("BIKES_PASSWORD", "wrong")
+    assert main.cli(command) == 2
+
+    credentials = temp_working_dir / "credentials.json"
+    credentials.write_text(json.dumps({"user": "test_user", "password": "test_password"}))
+    with patch("main.getDataRange") as mock_fetch:
+        assert main.cli(["--credentials", str(credentials)] + command + ["--each-month"]) == 0
+        mock_fetch.assert_not_called()
+    monkeypatch.setenv("BIKES_PASSWORD", "test_password")
+    assert main.cli(command) == 0
+
+    for name in ("report_2024-08.pdf", "report_2024-09.pdf", "report_2024-08_2024-09.pdf"):
+        assert (temp_working_dir / "data" / "output" / name).stat().st_size > 0
+    assert (temp_working_dir / "data" / "aggregates" / "2024-09" / "summary.json").exists()
+
+# Prueba del comando run: descarga y reporte en un solo proceso
+@allure.feature("System Integration")
+@allure.title("Test Headless CLI Run")
+@allure.description("Verifica que el comando run descarga el rango de meses y no genera reportes si alguna descarga falla.")
+@allure.tag("integration", "negative")
+@allure.severity(Severity.NORMAL)
+def test_headless_cli_run(auth_stub_main, temp_working_dir, monkeypatch):
+    monkeypatch.setenv("BIKES_USER", "test_user")
+    monkeypatch.setenv("BIKES_PASSWORD", "test_password")
+    with patch("main.getDataRange", return_value={"2024-08": True, "2024-09": False}) as mock_fetch, \
+         patch("main.report") as mock_report:
+        assert main.cli(["run", "2024-08", "2024-09", "--download-workers", "2"]) == 1
+        mock_fetch.assert_called_once_with("2024-08", "2024-09", "data/input", workers=2, stream=False)
+        mock_report.assert_not_called()
+
+# Prueba de los comandos analyze y report con meses sin descargar
+@allure.feature("System Integration")
+@allure.title("Test Headless CLI Missing Months")
+@allure.description("Verifica que analyze y report con un mes que no fue descargado informan qué meses faltan y retornan 1 sin analizar ni generar reportes.")
+@allure.tag("integration", "negative")
+@allure.severity(Severity.NORMAL)
+def test_headless_cli_missing_months(auth_stub_main, temp_working_dir, monkeypatch, capsys):
+    monkeypatch.setenv("BIKES_USER", "test_user")
+    monkeypatch.setenv("BIKES_PASSWORD", "test_password")
+    (temp_working_dir / "data" / "input" / "2024-10").mkdir(parents=True)
+    syntheticTrips(500, stations=10, month="2024-10").to_parquet(temp_working_dir / "data" / "input" / "2024-10" / "data.parquet", index=False)
+    with patch("main.report") as mock_report:
+        assert main.cli(["analyze", "2024-10", "2024-11"]) == 1
+        assert main.cli(["report", "2024-10", "2024-11", "--offline"]) == 1
+        mock_report.assert_not_called()
+    assert "Faltan los viajes de: 2024-11." in capsys.readouterr().out
+    assert not (temp_working_dir / "data" / "aggregates").exists()
+
+# Prueba de analyze y report con una estación sin viajes
+@allure.feature("System Integration")
+@allure.title("Test Headless CLI Station Without Trips")
+@allure.description("Verifica que analyze y report con una --station que no tiene viajes informan que no hay viajes para analizar y retornan 1 sin generar reportes.")
+@allure.tag("integration", "negative")
+@allure.severity(Severity.NORMAL)
+def test_headless_cli_station_without_trips(auth_stub_main, temp_working_dir, monkeypatch, capsys):
+    monkeypatch.setenv("BIKES_USER", "test_user")
+    monkeypatch.setenv("BIKES_PASSWORD", "test_password")
+    (temp_working_dir / "data" / "input" / "2024-10").mkdir(parents=True)
+    syntheticTrips(500, stations=10, month="2024-10").to_parquet(temp_working_dir / "data" / "input" / "2024-10" / "data.parquet", index=False)
+    with patch("main.report") as mock_report:
+        assert main.cli(["analyze", "2024-10", "--station", "Estación inexistente"]) == 1
+        assert main.cli(["report", "2024-10", "--station", "Estación inexistente", "--offline"]) == 1
+        mock_report.assert_not_called()
+    assert "No hay viajes para analizar." in capsys.readouterr().out
+
+# Prueba de --engine sin --station
+@allure.feature("System Integration")
+@allure.title("Test Headless CLI Rejects Engine Without Station")
+@allure.description("Verifica que --engine polars sin --station se rechaza con código 2 antes de autenticarse, ya que los rangos se combinan desde los agregados mensuales de pandas.")
+@allure.tag("integration", "negative")
+@allure.severity(Severity.MINOR)
+def test_headless_cli_rejects_engine_without_station(monkeypatch):
+    with patch("main.authenticate") as mock_authenticate:
+        with pytest.raises(SystemExit) as exit_info:
+            main.cli(["analyze", "2024-10", "--engine", "polars"])
+        assert exit_info.value.code == 2
+        mock_authenticate.assert_not_called()
+
+# Prueba de credenciales con tipos inválidos en el archivo JSON
+@allure.feature("System Integration")
+@allure.title("Test Headless CLI Invalid Credential Types")
+@allure.description("Verifica que un archivo de credenciales con usuario o contraseña que no son texto, o que no es un objeto JSON, informa que faltan credenciales y retorna 2 sin llegar a Authentication.login.")
+@allure.tag("integration", "negative")
+@allure.severity(Severity.NORMAL)
+@pytest.mark.parametrize("content", [{"user": 123, "password": "test_password"}, {"user": "test_user", "password": ["x"]},
+                                     {"user": None, "password": "test_password"}, ["test_user", "test_password"]])
+def test_headless_cli_invalid_credential_types(auth_stub_main, temp_working_dir, content, capsys):
+    credentials = temp_working_dir / "credentials.json"
+    credentials.write_text(json.dumps(content))
+    assert main.cli(["--credentials", str(credentials), "analyze", "2024-10"]) == 2
+    assert "Faltan credenciales" in capsys.readouterr().out